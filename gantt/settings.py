@@ -63,6 +63,12 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Статистика SQL запросов и времени обработки (эндпоинт `stats/queries/`)
+QUERY_STATS_ENABLED = True if environ.get("DJANGO_QUERY_STATS") in ("1", "True", "true") else False  # noqa: SIM210
+logger.debug(f"{QUERY_STATS_ENABLED=}")
+if QUERY_STATS_ENABLED:
+    MIDDLEWARE.append("gantt_chart.middleware.QueryStatsMiddleware")
+
 
 # URLS
 ROOT_URLCONF = "gantt.urls"
@@ -134,6 +140,19 @@ STATICFILES_DIRS = [BASE_DIR.joinpath("templates")]
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR.joinpath("media")
 
+# Фоновые задачи (команда run_jobs): количество процессов, интервал опроса очереди (с),
+# время без сигнала обработчика до возврата задачи в очередь (с), попытки и базовая задержка повтора (с)
+JOB_WORKERS = int(environ.get("JOB_WORKERS", 2))
+JOB_POLL_INTERVAL = float(environ.get("JOB_POLL_INTERVAL", 2))
+JOB_LEASE_TIMEOUT = int(environ.get("JOB_LEASE_TIMEOUT", 300))
+JOB_MAX_ATTEMPTS = int(environ.get("JOB_MAX_ATTEMPTS", 3))
+JOB_RETRY_DELAY = int(environ.get("JOB_RETRY_DELAY", 30))
+
+# История процента выполнения (команда compact_progress_history): записи старше первого порога (дней)
+# прореживаются до одной на событие в неделю, старше второго - до одной в месяц
+PROGRESS_HISTORY_DAILY_DAYS = int(environ.get("PROGRESS_HISTORY_DAILY_DAYS", 90))
+PROGRESS_HISTORY_WEEKLY_DAYS = int(environ.get("PROGRESS_HISTORY_WEEKLY_DAYS", 365))
+
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -1,2 +1,5 @@
+from .baseline import ProjectBaselineAdmin
+from .calendar import ProjectCalendarAdmin
 from .event import ChartEventAdmin
+from .job import BackgroundJobAdmin
 from .project import ProjectAdmin
@@ -0,0 +1,26 @@
+from django.contrib import admin
+from django.db.models import QuerySet
+from django.http.request import HttpRequest
+
+from gantt_chart.models import ProjectBaseline
+from gantt_chart.service.baseline import delete_baseline
+
+
+@admin.register(ProjectBaseline)
+class ProjectBaselineAdmin(admin.ModelAdmin):
+    list_display = ("name", "project", "events_count", "is_keyframe", "created_by", "created_at")
+    search_fields = ("name", "project__name")
+    readonly_fields = ("project", "events_count", "is_keyframe", "created_by", "created_at")
+    fields = ("name", *readonly_fields)
+
+    def has_add_permission(self, request: HttpRequest) -> bool:
+        # Базовые планы сохраняются из интерфейса проекта
+        return False
+
+    def delete_model(self, request: HttpRequest, obj: ProjectBaseline):
+        # Следующий план может хранить изменения относительно удаляемого
+        delete_baseline(obj)
+
+    def delete_queryset(self, request: HttpRequest, queryset: QuerySet[ProjectBaseline]):
+        for baseline in queryset.order_by("-pk"):
+            delete_baseline(baseline)
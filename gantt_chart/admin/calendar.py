@@ -0,0 +1,27 @@
+from django.contrib import admin
+from django.http.request import HttpRequest
+
+from gantt_chart.models import ProjectCalendar, ProjectHoliday
+from gantt_chart.service.job import enqueue_job
+
+
+class ProjectHolidayInline(admin.TabularInline):
+    model = ProjectHoliday
+    extra = 0
+
+
+@admin.register(ProjectCalendar)
+class ProjectCalendarAdmin(admin.ModelAdmin):
+    list_display = ("project", "weekend_days")
+    search_fields = ("project__name",)
+    autocomplete_fields = ("project",)
+    inlines = (ProjectHolidayInline,)
+
+    def save_related(self, request: HttpRequest, form, formsets, change: bool):
+        super().save_related(request, form, formsets, change)
+        # Даты событий пересчитываются фоновой задачей после сохранения нерабочих дней
+        enqueue_job("project_recalculate_dates", form.instance.project, user=request.user)
+
+    def delete_model(self, request: HttpRequest, obj: ProjectCalendar):
+        super().delete_model(request, obj)
+        enqueue_job("project_recalculate_dates", obj.project, user=request.user)
@@ -0,0 +1,16 @@
+from django.contrib import admin
+from django.http.request import HttpRequest
+
+from gantt_chart.models import BackgroundJob
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "project", "status", "progress", "attempts", "created_at", "finished_at")
+    list_filter = ("status", "kind")
+    search_fields = ("project__name",)
+    readonly_fields = tuple(field.name for field in BackgroundJob._meta.fields)
+
+    def has_add_permission(self, request: HttpRequest) -> bool:
+        # Задачи ставятся в очередь из интерфейса проекта
+        return False
@@ -1,7 +1,10 @@
 from django.contrib import admin
+from django.db.models import QuerySet
 from django.http.request import HttpRequest
 
-from gantt_chart.models import Project, ProjectParticipant
+from gantt_chart.models import ChartEvent, ChartEventLink, Project, ProjectParticipant
+from gantt_chart.service import ProjectService
+from gantt_chart.service.job import enqueue_job
 
 
 class ProjectParticipantInline(admin.TabularInline):
@@ -20,11 +23,31 @@ class ProjectAdmin(admin.ModelAdmin):
     inlines = (ProjectParticipantInline,)
     readonly_fields = ("project_version",)
 
+    def save_model(self, request: HttpRequest, obj: Project, form, change: bool):
+        super().save_model(request, obj, form, change)
+        if change and "update_parent_dates" in form.changed_data and obj.update_parent_dates:
+            enqueue_job("project_recalculate_summary_dates", obj, user=request.user)
+
     def delete_model(self, request: HttpRequest, obj: Project):
-        from gantt_chart.signals import post_delete, set_actual_draft_state_from_project_participant
-        from gantt_chart.utils import SignalDisconnectContextManager
+        ProjectService(obj).delete()
+
+    def delete_queryset(self, request: HttpRequest, queryset: QuerySet[Project]):
+        for obj in queryset:
+            ProjectService(obj).delete()
+
+    def get_deleted_objects(self, objs, request: HttpRequest):
+        # Штатный сбор удаляемых объектов загружает все события проектов - вместо списка выводятся количества
+        project_ids = [obj.pk for obj in objs]
+        model_count = {
+            Project._meta.verbose_name_plural: len(project_ids),
+            ChartEvent._meta.verbose_name_plural: ChartEvent._base_manager.filter(project__in=project_ids).count(),
+            ChartEventLink._meta.verbose_name_plural: ChartEventLink.objects.filter(
+                predecessor__project__in=project_ids
+            ).count(),
+            ProjectParticipant._meta.verbose_name_plural: ProjectParticipant.objects.filter(
+                project__in=project_ids
+            ).count(),
+        }
+        perms_needed = set() if self.has_delete_permission(request) else {Project._meta.verbose_name}
 
-        with SignalDisconnectContextManager(
-            post_delete, ProjectParticipant, set_actual_draft_state_from_project_participant
-        ):
-            return super().delete_model(request, obj)
+        return [str(obj) for obj in objs], model_count, perms_needed, []
@@ -0,0 +1,2 @@
+from . import chart, clone, concurrency, hot_paths
+from .base import BENCHMARKS, Measurement, measure, register_benchmark
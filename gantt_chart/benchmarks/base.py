@@ -0,0 +1,57 @@
+from time import perf_counter
+from typing import Any, Callable, NamedTuple
+
+from django.db import connection
+
+
+class Measurement(NamedTuple):
+    """Результат замера"""
+
+    name: str
+    wall_time: float
+    queries: int
+
+
+BenchmarkFunc = Callable[[dict[str, Any]], list[Measurement]]
+BENCHMARKS: dict[str, BenchmarkFunc] = {}
+
+
+def register_benchmark(name: str, rollback: bool = True) -> Callable[[BenchmarkFunc], BenchmarkFunc]:
+    """
+    Регистрация бенчмарка для команды `manage.py benchmark`
+
+    При `rollback=False` бенчмарк выполняется вне общей транзакции и сам удаляет созданные данные
+    (нужно, когда данные должны быть видны другим соединениям)
+    """
+
+    def decorator(func: BenchmarkFunc) -> BenchmarkFunc:
+        func.rollback = rollback
+        BENCHMARKS[name] = func
+        return func
+
+    return decorator
+
+
+class QueryCounter:
+    """Счетчик SQL запросов (без накопления самих запросов в памяти)"""
+
+    __slots__ = ("count",)
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(name: str, func: Callable[[], Any]) -> tuple[Measurement, Any]:
+    """Замер времени выполнения и количества SQL запросов"""
+
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        start = perf_counter()
+        result = func()
+        wall_time = perf_counter() - start
+
+    return Measurement(name, wall_time, counter.count), result
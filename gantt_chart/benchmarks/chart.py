@@ -0,0 +1,74 @@
+from datetime import date
+from typing import Any
+
+from rest_framework.renderers import JSONRenderer
+
+from gantt_chart.constants import TypeDate
+from gantt_chart.serializers import ChartEventActualSerializer, ChartEventPlannedSerializer
+from gantt_chart.service.chart import (
+    ChartFilter,
+    build_chart_tasks,
+    get_chart_rows_queryset,
+    get_compact_chart_data,
+    to_chart_rows,
+)
+
+from .base import Measurement, measure, register_benchmark
+from .fixtures import bulk_generate_project
+
+SERIALIZERS = {
+    TypeDate.planned.value: ChartEventPlannedSerializer,
+    TypeDate.actual.value: ChartEventActualSerializer,
+}
+
+
+@register_benchmark("chart_data_serialization")
+def chart_data_serialization(options: dict[str, Any]) -> list[Measurement]:
+    """Сериализаторы DRF против сборки задач из `values_list` (ответы должны совпадать побайтно)"""
+
+    measurements = []
+    renderer = JSONRenderer()
+
+    for size in options["sizes"]:
+        project = bulk_generate_project(f"chart_data_serialization_{size}", size)
+        for type_date, serializer_class in SERIALIZERS.items():
+            queryset = project.chart_events.all()
+            serializer_measurement, serializer_data = measure(
+                f"{type_date} serializer {size}",
+                lambda: renderer.render(serializer_class(queryset, many=True).data),  # noqa: B023
+            )
+            fast_measurement, fast_data = measure(
+                f"{type_date} values_list {size}",
+                lambda: renderer.render(
+                    build_chart_tasks(
+                        list(to_chart_rows(get_chart_rows_queryset(project, type_date), type_date)),  # noqa: B023
+                    )
+                ),
+            )
+            if serializer_data != fast_data:
+                raise AssertionError(f"Ответы сериализатора и быстрого пути различаются ({type_date}, {size})")
+            measurements += [serializer_measurement, fast_measurement]
+
+    return measurements
+
+
+@register_benchmark("chart_data_window")
+def chart_data_window(options: dict[str, Any]) -> list[Measurement]:
+    """Компактные данные графика: весь проект против окна дат в один квартал"""
+
+    measurements = []
+    window = ChartFilter(date(2024, 4, 1), date(2024, 6, 30))
+
+    for size in options["sizes"]:
+        project = bulk_generate_project(f"chart_data_window_{size}", size)
+        measurement, _ = measure(
+            f"compact full {size}", lambda: get_compact_chart_data(project, TypeDate.planned.value)  # noqa: B023
+        )
+        measurements.append(measurement)
+        measurement, _ = measure(
+            f"compact quarter window {size}",
+            lambda: get_compact_chart_data(project, TypeDate.planned.value, window),  # noqa: B023
+        )
+        measurements.append(measurement)
+
+    return measurements
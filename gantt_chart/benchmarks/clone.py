@@ -0,0 +1,33 @@
+from typing import Any
+
+from gantt_chart.models import ChartEvent
+from gantt_chart.service.clone import CloneService
+
+from .base import Measurement, measure, register_benchmark
+from .fixtures import bulk_generate_project
+
+
+@register_benchmark("clone")
+def clone(options: dict[str, Any]) -> list[Measurement]:
+    """Копирование проекта-шаблона и поддерева со сдвигом дат"""
+
+    measurements = []
+    for size in options["sizes"]:
+        template = bulk_generate_project(f"benchmark_template_{size}", size)
+        clone_service = CloneService(days_offset=30)
+
+        measurement, project = measure(
+            f"clone project {size}",
+            lambda: clone_service.clone_project(template, f"benchmark_clone_{size}"),  # noqa: B023
+        )
+        measurements.append(measurement)
+
+        events = ChartEvent.objects.filter(project=project)
+        event, parent = events.get(hierarchical_number="1.1"), events.get(hierarchical_number="1.2")
+        subtree_size = event.get_subtree().count()
+        measurement, _ = measure(
+            f"clone subtree {subtree_size}/{size}", lambda: clone_service.clone_subtree(event, parent)  # noqa: B023
+        )
+        measurements.append(measurement)
+
+    return measurements
@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Any
+
+from django.db import connection, transaction
+
+from gantt_chart.models import ChartEvent, Project
+from gantt_chart.service import EventService
+
+from .base import Measurement, QueryCounter, register_benchmark
+from .fixtures import bulk_generate_project
+
+
+def _save_events(event_ids: list[int], lock_project_row: bool) -> int:
+    """Сохранение событий в отдельном соединении потока, возвращает количество SQL запросов"""
+
+    counter = QueryCounter()
+    try:
+        with connection.execute_wrapper(counter):
+            for event in ChartEvent.objects.filter(pk__in=event_ids).select_related("project", "parent"):
+                event.percentage_completion = 100 - event.percentage_completion
+                event_service = EventService(event)
+                event_service.validate()
+                with transaction.atomic():
+                    event_service.save()
+                    if lock_project_row:
+                        # Прежняя схема: версия меняется через Project.save внутри транзакции события
+                        # (сигналы Project + блокировка строки проекта до коммита)
+                        event.project.save(update_fields=("project_version",))
+    finally:
+        connection.close()
+
+    return counter.count
+
+
+@register_benchmark("concurrent_event_saves", rollback=False)
+def concurrent_event_saves(options: dict[str, Any]) -> list[Measurement]:
+    """Параллельное сохранение событий одного проекта несколькими потоками"""
+
+    # SQLite блокирует базу целиком на запись, параллельные транзакции на нем не сравнить
+    threads = 1 if connection.vendor == "sqlite" else options["threads"]
+    measurements = []
+    for size in options["sizes"]:
+        with transaction.atomic():
+            project = bulk_generate_project(f"benchmark_concurrency_{size}", size)
+        event_ids = list(ChartEvent.objects.filter(project=project, is_root=False).values_list("pk", flat=True))
+        chunks = [event_ids[number::threads] for number in range(threads)]
+
+        try:
+            for lock_project_row, label in ((True, "Project.save"), (False, "signal-free")):
+                start = perf_counter()
+                with ThreadPoolExecutor(max_workers=threads) as executor:
+                    queries = sum(executor.map(_save_events, chunks, [lock_project_row] * threads))
+                measurements.append(
+                    Measurement(f"{label} version x{threads} threads {size}", perf_counter() - start, queries)
+                )
+        finally:
+            Project.objects.filter(pk=project.pk).delete()
+
+    return measurements
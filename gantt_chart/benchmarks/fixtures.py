@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+from itertools import islice, pairwise
+
+from gantt_chart.models import ChartEvent, ChartEventLink, Project
+from gantt_chart.utils import get_or_create_root_event
+
+BULK_BATCH_SIZE = 2000
+
+
+def _make_event(project: Project, parent: ChartEvent, number: int, index: int, start: date) -> ChartEvent:
+    planned_start = start + timedelta(index)
+    percentage_completion = index % 101
+    return ChartEvent(
+        project=project,
+        parent=parent,
+        hierarchical_number=f"{parent.hierarchical_number}.{number}",
+        name=f"Событие {index}",
+        planned_start=planned_start,
+        planned_duration=5,
+        planned_end=planned_start + timedelta(4),
+        percentage_completion=percentage_completion,
+        actual_start=planned_start if percentage_completion else None,
+        actual_duration=5 if percentage_completion == 100 else None,
+        actual_end=planned_start + timedelta(4) if percentage_completion == 100 else None,
+    )
+
+
+def bulk_generate_project(name: str, events_count: int, fan_out: int = 10, link_every: int = 3) -> Project:
+    """
+    Быстрое наполнение проекта событиями в обход `EventService` (только для замеров чтения)
+
+    События создаются уровнями: у каждого события не более `fan_out` детей,
+    каждое `link_every`-е событие связывается с предыдущим
+    """
+
+    project = Project.objects.create(name=name)
+    root = get_or_create_root_event(project)
+    start = date(2024, 1, 1)
+
+    parents = [root]
+    created = 0
+    while created < events_count:
+        level = []
+        for parent in parents:
+            index = created + len(level)
+            count = min(fan_out, events_count - index)
+            level.extend(
+                [_make_event(project, parent, number, index + number - 1, start) for number in range(1, count + 1)]
+            )
+        for batch_start in range(0, len(level), BULK_BATCH_SIZE):
+            ChartEvent.objects.bulk_create(level[batch_start : batch_start + BULK_BATCH_SIZE])  # noqa: E203
+        created += len(level)
+        parents = level
+
+    pks = ChartEvent.objects.filter(project=project, is_root=False).order_by("pk").values_list("pk", flat=True)
+    links = (
+        ChartEventLink(predecessor_id=predecessor, follower_id=follower)
+        for index, (predecessor, follower) in enumerate(pairwise(pks.iterator(chunk_size=BULK_BATCH_SIZE)))
+        if index % link_every == 0
+    )
+    while batch := list(islice(links, BULK_BATCH_SIZE)):
+        ChartEventLink.objects.bulk_create(batch)
+
+    return project
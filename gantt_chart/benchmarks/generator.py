@@ -0,0 +1,75 @@
+from datetime import date, timedelta
+from random import Random
+
+from django.contrib.auth import get_user_model
+
+from gantt_chart.models import ChartEvent, ChartEventLink, Project, ProjectParticipant, ProjectParticipantRole
+from gantt_chart.service import EventService
+from gantt_chart.utils import get_or_create_root_event
+
+User = get_user_model()
+
+START_DATE = date(2024, 1, 1)
+PERCENTAGES = (0, 0, 0, 10, 25, 50, 75, 100)
+
+
+def generate_project(
+    name: str,
+    events: int,
+    depth: int = 5,
+    fan_out: int = 5,
+    link_density: float = 0.3,
+    participants: int = 5,
+    seed: int = 0,
+) -> Project:
+    """
+    Генерация синтетического проекта через `EventService`
+
+    Дерево событий строится в глубину: у каждого события не более `fan_out` детей, вложенность не более `depth`.
+    Доля событий `link_density` получает связь с одним из ранее созданных событий
+    """
+
+    rng = Random(seed)
+    project = Project.objects.create(name=name, update_percentage_completion=True)
+
+    users = [User.objects.get_or_create(username=f"{name}_user_{number}")[0] for number in range(participants)]
+    for number, user in enumerate(users):
+        role = ProjectParticipantRole.supervisor if number == 0 else rng.choice(ProjectParticipantRole.values)
+        ProjectParticipant.objects.create(project=project, participant=user, role=role)
+    project.refresh_from_db()
+
+    created: list[ChartEvent] = []
+    stack = [(get_or_create_root_event(project), 1, 0)]
+    while stack and len(created) < events:
+        parent, level, children_count = stack.pop()
+        if children_count >= fan_out:
+            continue
+        stack.append((parent, level, children_count + 1))
+
+        event = ChartEvent(
+            project=project,
+            parent=parent,
+            name=f"Событие {len(created) + 1}",
+            planned_start=START_DATE + timedelta(rng.randint(0, 365)),
+            planned_duration=rng.randint(1, 30),
+            percentage_completion=rng.choice(PERCENTAGES),
+            responsible=rng.choice(users) if users else None,
+        )
+        event_service = EventService(event)
+        event_service.validate()
+        event_service.save()
+        created.append(event)
+
+        if level < depth:
+            stack.append((event, level + 1, 0))
+
+    links = {
+        (rng.choice(created[:index]).pk, event.pk)
+        for index, event in enumerate(created[1:], start=1)
+        if rng.random() < link_density
+    }
+    ChartEventLink.objects.bulk_create(
+        [ChartEventLink(predecessor_id=predecessor, follower_id=follower) for predecessor, follower in links]
+    )
+
+    return project
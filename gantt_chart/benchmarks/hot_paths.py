@@ -0,0 +1,146 @@
+from typing import Any, Callable, Iterator
+
+from django.contrib.auth import get_user_model
+from django.test import Client
+from django.urls import reverse
+
+from gantt_chart.constants import PROJECT_IDENTIFIER_FIELD
+from gantt_chart.models import ChartEvent, Project, ProjectParticipant, ProjectParticipantRole
+from gantt_chart.permissions import ALL_PERMISSIONS
+from gantt_chart.service import EventService
+
+from .base import Measurement, measure, register_benchmark
+from .fixtures import bulk_generate_project
+from .generator import generate_project
+
+User = get_user_model()
+
+PERMISSION_CHECKS = 100
+
+
+def _iter_projects(options: dict[str, Any]) -> Iterator[tuple[str, Project]]:
+    """Проект из опции `--project` или сгенерированные проекты для каждого размера из `--sizes`"""
+
+    if options.get("project"):
+        yield options["project"], Project.objects.get(name=options["project"])
+        return
+
+    for size in options["sizes"]:
+        yield str(size), bulk_generate_project(f"benchmark_{size}", size)
+
+
+def _get_client(project: Project) -> tuple[Client, User]:
+    user, _ = User.objects.get_or_create(username="benchmark_user")
+    ProjectParticipant.objects.get_or_create(
+        project=project, participant=user, defaults={"role": ProjectParticipantRole.supervisor}
+    )
+    client = Client()
+    client.force_login(user)
+    return client, user
+
+
+def _get(client: Client, url: str) -> Callable[[], Any]:
+    def request():
+        response = client.get(url)
+        if response.status_code != 200:
+            raise AssertionError(f"{url} -> {response.status_code}")
+        return b"".join(response.streaming_content) if response.streaming else response.content
+
+    return request
+
+
+def _project_url(name: str, project: Project, **kwargs) -> str:
+    return reverse(name, kwargs={PROJECT_IDENTIFIER_FIELD: project.pk, **kwargs})
+
+
+@register_benchmark("events_page")
+def events_page(options: dict[str, Any]) -> list[Measurement]:
+    """Страница событий проекта"""
+
+    measurements = []
+    for label, project in _iter_projects(options):
+        client, _ = _get_client(project)
+        measurement, _ = measure(f"events page {label}", _get(client, _project_url("events", project)))
+        measurements.append(measurement)
+
+    return measurements
+
+
+@register_benchmark("chart_data")
+def chart_data(options: dict[str, Any]) -> list[Measurement]:
+    """Эндпоинты данных графика (страница по умолчанию и компактный формат)"""
+
+    measurements = []
+    for label, project in _iter_projects(options):
+        client, _ = _get_client(project)
+        for url_name in ("chart_data_planned", "chart_data_actual"):
+            url = _project_url(url_name, project)
+            measurement, _ = measure(f"{url_name} {label}", _get(client, url))
+            measurements.append(measurement)
+            measurement, _ = measure(f"{url_name} compact {label}", _get(client, f"{url}?compact=1"))
+            measurements.append(measurement)
+
+    return measurements
+
+
+@register_benchmark("update_parents")
+def update_parents(options: dict[str, Any]) -> list[Measurement]:
+    """Сохранение листового события в глубоком дереве (пересчет процента выполнения родителей)"""
+
+    depth = options["depth"]
+    project = generate_project(f"benchmark_deep_{depth}", events=depth, depth=depth, fan_out=1, participants=1)
+    leaf = ChartEvent.objects.filter(project=project).order_by("-pk").first()
+
+    def save_leaf():
+        leaf.percentage_completion = 100 if leaf.percentage_completion != 100 else 50
+        event_service = EventService(leaf)
+        event_service.validate()
+        event_service.save()
+
+    measurement, _ = measure(f"update parents depth {depth}", save_leaf)
+    return [measurement]
+
+
+@register_benchmark("permissions")
+def permissions(options: dict[str, Any]) -> list[Measurement]:
+    """Проверки прав на проект"""
+
+    measurements = []
+    for label, project in _iter_projects(options):
+        _, user = _get_client(project)
+        project.is_draft = False
+        for name, permission in ALL_PERMISSIONS.items():
+            measurement, _ = measure(
+                f"{name} x{PERMISSION_CHECKS} {label}",
+                lambda: [permission(user, project) for _ in range(PERMISSION_CHECKS)],  # noqa: B023
+            )
+            measurements.append(measurement)
+
+    return measurements
+
+
+@register_benchmark("select2")
+def select2(options: dict[str, Any]) -> list[Measurement]:
+    """Поиск событий для select2"""
+
+    measurements = []
+    for label, project in _iter_projects(options):
+        client, _ = _get_client(project)
+        url = f"/event_select2/?project={project.pk}&term=1"
+        measurement, _ = measure(f"event select2 {label}", _get(client, url))
+        measurements.append(measurement)
+
+    return measurements
+
+
+@register_benchmark("project_detail")
+def project_detail(options: dict[str, Any]) -> list[Measurement]:
+    """Страница проекта с агрегатами корневого события"""
+
+    measurements = []
+    for label, project in _iter_projects(options):
+        client, _ = _get_client(project)
+        measurement, _ = measure(f"project detail {label}", _get(client, _project_url("project_detail", project)))
+        measurements.append(measurement)
+
+    return measurements
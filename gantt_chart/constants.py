@@ -17,3 +17,29 @@ class ValuesEnumMixin:
 class TypeDate(ValuesEnumMixin, Enum):
     planned = "planned"
     actual = "actual"
+
+
+class ChartScale(ValuesEnumMixin, Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+
+class ChartExportFormat(ValuesEnumMixin, Enum):
+    svg = "svg"
+    png = "png"
+
+
+class ExportTable(ValuesEnumMixin, Enum):
+    events = "events"
+    links = "links"
+
+
+class TableExportFormat(ValuesEnumMixin, Enum):
+    csv = "csv"
+    xlsx = "xlsx"
+
+
+class ImportFormat(ValuesEnumMixin, Enum):
+    xml = "xml"
+    csv = "csv"
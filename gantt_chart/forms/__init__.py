@@ -2,11 +2,13 @@ from typing import Any
 
 from bootstrap_datepicker_plus.widgets import DatePickerInput
 from django.contrib.auth import get_user_model
-from django.forms import ModelForm, ValidationError
+from django.forms import CharField, FileField, Form, HiddenInput, IntegerField, ModelForm, ValidationError
 from django_select2 import forms as s2forms
 
 from gantt_chart.models import ChartEvent, ChartEventLink, Project, ProjectParticipant, UniversalComment
 from gantt_chart.service import EventService
+from gantt_chart.service.importer import get_import_format
+from gantt_chart.service.leveling import LEVELING_MAX_CAPACITY
 
 from .dynamic import make_dynamic_event_select2_field, make_dynamic_participant_select2_field
 
@@ -16,7 +18,7 @@ User = get_user_model()
 class ProjectForm(ModelForm):
     class Meta:
         model = Project
-        fields = ("name", "description", "image", "update_percentage_completion")
+        fields = ("name", "description", "image", "update_percentage_completion", "update_parent_dates")
 
 
 class UserWidget(s2forms.ModelSelect2Widget):
@@ -145,6 +147,91 @@ class DynamicChartEventUpdateForm:
         return _ChartEventUpdateForm
 
 
+class ChartEventMoveForm(Form):
+    position = IntegerField(
+        label="Позиция",
+        min_value=1,
+        required=False,
+        help_text="Номер среди дочерних событий нового родителя, без номера - в конец",
+    )
+
+
+class DynamicChartEventMoveForm:
+    def __init__(self, project_pk: int) -> None:
+        self.parent = make_dynamic_event_select2_field(project_pk, "Новый родитель", True)
+
+    def get_form(self):
+        class _ChartEventMoveForm(ChartEventMoveForm):
+            parent = self.parent
+
+            field_order = ("parent", "position")
+
+        return _ChartEventMoveForm
+
+
+class ProjectCloneForm(Form):
+    name = CharField(label="Название", max_length=512)
+    days_offset = IntegerField(
+        label="Сдвиг дат (дней)", initial=0, help_text="Все даты копии сдвигаются на это число дней"
+    )
+
+    def clean_name(self) -> str:
+        name = self.cleaned_data["name"]
+        if Project.objects.filter(name=name).exists():
+            raise ValidationError("Проект с таким названием уже существует")
+        return name
+
+
+class ProjectBaselineForm(Form):
+    name = CharField(label="Название", max_length=256, help_text="Например, «Утвержденный план» или дата согласования")
+
+
+class ProjectLevelingForm(Form):
+    capacity = IntegerField(
+        label="Событий ответственного в день",
+        min_value=1,
+        max_value=LEVELING_MAX_CAPACITY,
+        initial=1,
+        widget=HiddenInput,
+    )
+    version = CharField(widget=HiddenInput)
+
+
+class ScheduleImportForm(Form):
+    file = FileField(
+        label="Файл графика",
+        help_text=(
+            "MS Project XML (.xml) или CSV в формате выгрузки событий (.csv),"
+            " задачи добавляются дочерними событиями корневого события проекта"
+        ),
+    )
+
+    def clean_file(self):
+        file = self.cleaned_data["file"]
+        if get_import_format(file.name) is None:
+            raise ValidationError("Поддерживаются файлы .xml (MS Project) и .csv")
+        return file
+
+
+class ChartEventCloneForm(Form):
+    days_offset = IntegerField(
+        label="Сдвиг дат (дней)", initial=0, help_text="Все даты копии сдвигаются на это число дней"
+    )
+
+
+class DynamicChartEventCloneForm:
+    def __init__(self, project_pk: int) -> None:
+        self.parent = make_dynamic_event_select2_field(project_pk, "Родитель копии", True)
+
+    def get_form(self):
+        class _ChartEventCloneForm(ChartEventCloneForm):
+            parent = self.parent
+
+            field_order = ("parent", "days_offset")
+
+        return _ChartEventCloneForm
+
+
 class ChartEventLinkCreateForm(ModelForm):
     class Meta:
         model = ChartEventLink
@@ -0,0 +1,61 @@
+import json
+from pathlib import Path
+
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.timezone import now
+from loguru import logger
+
+from gantt_chart.benchmarks import BENCHMARKS, Measurement
+
+
+class Command(BaseCommand):
+    help = "Замеры производительности (данные создаются в транзакции и откатываются)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help=f"Бенчмарки для запуска: {', '.join(BENCHMARKS)}")
+        parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000], help="Количество событий")
+        parser.add_argument("--depth", type=int, default=50, help="Глубина дерева для update_parents")
+        parser.add_argument("--project", help="Название существующего проекта вместо генерации по --sizes")
+        parser.add_argument("--threads", type=int, default=4, help="Количество потоков для concurrent_event_saves")
+        parser.add_argument("--save", type=Path, help="Сохранить результаты в JSON (базовая линия)")
+        parser.add_argument("--compare", type=Path, help="Сравнить с сохраненной базовой линией")
+
+    def handle(self, *args, **options):
+        logger.debug("COMMAND benchmark")
+        names = options["names"] or list(BENCHMARKS)
+        unknown = set(names) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f"Неизвестные бенчмарки: {', '.join(sorted(unknown))}")
+
+        baseline = json.loads(options["compare"].read_text())["results"] if options["compare"] else {}
+        results = {}
+        for name in names:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            benchmark = BENCHMARKS[name]
+            if benchmark.rollback:
+                with transaction.atomic():
+                    measurements = benchmark(options)
+                    transaction.set_rollback(True)
+            else:
+                measurements = benchmark(options)
+            for measurement in measurements:
+                key = f"{name}: {measurement.name}"
+                results[key] = {"wall_time": measurement.wall_time, "queries": measurement.queries}
+                self.stdout.write(self._format(measurement, baseline.get(key)))
+
+        if options["save"]:
+            options["save"].write_text(
+                json.dumps({"created_at": now().isoformat(), "results": results}, ensure_ascii=False, indent=2)
+            )
+            self.stdout.write(f"Результаты сохранены в {options['save']}")
+
+    @staticmethod
+    def _format(measurement: Measurement, baseline: dict | None) -> str:
+        line = f"  {measurement.name:<48} {measurement.wall_time:>10.3f} s {measurement.queries:>8} queries"
+        if baseline:
+            line += (
+                f"  (было {baseline['wall_time']:.3f} s, {baseline['queries']} queries;"
+                f" x{baseline['wall_time'] / (measurement.wall_time or 1e-9):.2f})"
+            )
+        return line
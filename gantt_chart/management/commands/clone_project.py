@@ -0,0 +1,36 @@
+from datetime import date
+
+from django.core.management import BaseCommand, CommandError
+from django.db.models import Min
+from loguru import logger
+
+from gantt_chart.models import ChartEvent, Project
+from gantt_chart.service.clone import CloneService
+
+
+class Command(BaseCommand):
+    help = "Копирование проекта (шаблона) с событиями и связями"
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Название проекта-шаблона")
+        parser.add_argument("name", help="Название нового проекта")
+        dates = parser.add_mutually_exclusive_group()
+        dates.add_argument("--offset", type=int, default=0, help="Сдвиг всех дат в днях")
+        dates.add_argument(
+            "--start", type=date.fromisoformat, help="Новая минимальная планируемая дата начала (YYYY-MM-DD)"
+        )
+
+    def handle(self, *args, **options):
+        logger.debug("COMMAND clone_project")
+        try:
+            project = Project.objects.get(name=options["source"])
+        except Project.DoesNotExist:
+            raise CommandError(f"Проект `{options['source']}` не найден")
+
+        days_offset = options["offset"]
+        if options["start"]:
+            min_planned_start = ChartEvent.objects.filter(project=project).aggregate(Min("planned_start"))
+            days_offset = (options["start"] - min_planned_start["planned_start__min"]).days
+
+        new_project = CloneService(days_offset).clone_project(project, options["name"])
+        self.stdout.write(f"Проект `{new_project}` (id={new_project.pk}) создан, сдвиг дат {days_offset} дн.")
@@ -0,0 +1,18 @@
+from django.core.management import BaseCommand
+from loguru import logger
+
+from gantt_chart.service.progress import compact_progress_samples
+
+
+class Command(BaseCommand):
+    help = (
+        "Прореживание истории процента выполнения событий: старые записи объединяются по неделям и месяцам"
+        " (для периодического запуска, например раз в сутки по cron)"
+    )
+
+    def handle(self, *args, **options):
+        logger.debug("COMMAND compact_progress_history")
+        result = compact_progress_samples()
+        updated = sum(counts[0] for counts in result.values())
+        deleted = sum(counts[1] for counts in result.values())
+        self.stdout.write(f"Обновлено записей - {updated}, удалено - {deleted}, проектов - {len(result)}")
@@ -0,0 +1,27 @@
+from django.core.management import BaseCommand, CommandError
+from loguru import logger
+
+from gantt_chart.models import Project
+from gantt_chart.service.snapshot import dump_project_snapshot
+
+
+class Command(BaseCommand):
+    help = "Сохранение сжатого снимка проекта (события, связи, участники, комментарии, календарь) в файл"
+
+    def add_arguments(self, parser):
+        parser.add_argument("project", help="Название проекта")
+        parser.add_argument("path", help="Путь к файлу снимка")
+
+    def handle(self, *args, **options):
+        logger.debug("COMMAND dump_project")
+        try:
+            project = Project.objects.get(name=options["project"])
+        except Project.DoesNotExist:
+            raise CommandError(f"Проект `{options['project']}` не найден")
+
+        with open(options["path"], "wb") as file:
+            counters = dump_project_snapshot(project, file)
+        self.stdout.write(
+            f"Снимок проекта `{project}` сохранен: событий - {counters['events']}, связей - {counters['links']},"
+            f" участников - {counters['participants']}, комментариев - {counters['comments']}"
+        )
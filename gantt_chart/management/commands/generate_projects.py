@@ -0,0 +1,35 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+from loguru import logger
+
+from gantt_chart.benchmarks.generator import generate_project
+
+
+class Command(BaseCommand):
+    help = "Генерация синтетических проектов через EventService"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="synthetic", help="Префикс названий проектов")
+        parser.add_argument("--projects", type=int, default=1, help="Количество проектов")
+        parser.add_argument("--events", type=int, default=1000, help="Количество событий в проекте")
+        parser.add_argument("--depth", type=int, default=5, help="Максимальная вложенность событий")
+        parser.add_argument("--fan-out", type=int, default=5, help="Максимальное количество детей у события")
+        parser.add_argument("--link-density", type=float, default=0.3, help="Доля событий со связью")
+        parser.add_argument("--participants", type=int, default=5, help="Количество участников проекта")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        logger.debug("COMMAND generate_projects")
+        for number in range(options["projects"]):
+            name = f"{options['prefix']}_{number + 1}"
+            with transaction.atomic():
+                project = generate_project(
+                    name,
+                    events=options["events"],
+                    depth=options["depth"],
+                    fan_out=options["fan_out"],
+                    link_density=options["link_density"],
+                    participants=options["participants"],
+                    seed=options["seed"] + number,
+                )
+            self.stdout.write(f"Проект `{project}` (id={project.pk}) создан")
@@ -0,0 +1,34 @@
+from django.core.management import BaseCommand, CommandError
+from loguru import logger
+
+from gantt_chart.models import Project
+from gantt_chart.service.exceptions import ScheduleImportException
+from gantt_chart.service.importer import TASK_PARSERS, get_import_format, import_schedule
+
+
+class Command(BaseCommand):
+    help = "Импорт графика из файла MS Project XML (MSPDI) или CSV в проект"
+
+    def add_arguments(self, parser):
+        parser.add_argument("project", type=str, help="Название проекта")
+        parser.add_argument("path", type=str, help="Путь к файлу графика")
+        parser.add_argument("--format", choices=tuple(TASK_PARSERS), help="Формат файла (по умолчанию - по расширению)")
+
+    def handle(self, *args, **options):
+        logger.debug("COMMAND import_schedule")
+        import_format = options["format"] or get_import_format(options["path"])
+        if import_format is None:
+            raise CommandError("Не удалось определить формат файла, укажите --format")
+
+        try:
+            project = Project.objects.get(name=options["project"])
+        except Project.DoesNotExist:
+            raise CommandError(f"Проект {options['project']} не найден")
+
+        try:
+            with open(options["path"], "rb") as file:
+                result = import_schedule(project, file, import_format)
+        except ScheduleImportException as error:
+            raise CommandError("\n".join(error.errors))
+
+        self.stdout.write(f"Импортировано событий - {result['events']}, связей - {result['links']}")
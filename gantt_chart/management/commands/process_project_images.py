@@ -0,0 +1,26 @@
+from django.core.management import BaseCommand
+from django.db.models import Q
+from loguru import logger
+
+from gantt_chart.models import Project
+from gantt_chart.service.image import process_project_image
+
+
+class Command(BaseCommand):
+    help = "Обработка изображений проектов, для которых еще нет готовых вариантов (например, после перезапуска)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Пересоздать файлы вариантов для всех изображений")
+
+    def handle(self, *args, **options):
+        logger.debug("COMMAND process_project_images")
+        projects = Project.objects.exclude(Q(image="") | Q(image__isnull=True)).values_list(
+            "pk", "image", "image_variants"
+        )
+
+        processed = 0
+        for project_id, image, image_variants in projects.iterator():
+            if options["all"] or image_variants.get("source") != image:
+                process_project_image(project_id, rebuild=options["all"])
+                processed += 1
+        self.stdout.write(f"Обработано изображений - {processed}")
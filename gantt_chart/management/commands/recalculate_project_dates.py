@@ -0,0 +1,22 @@
+from django.core.management import BaseCommand
+from loguru import logger
+
+from gantt_chart.models import Project
+from gantt_chart.service.calendar import recalculate_project_dates
+
+
+class Command(BaseCommand):
+    help = "Пересчет планируемых дат окончания и фактических длительностей событий по рабочим календарям проектов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Названия проектов (по умолчанию - все проекты)")
+
+    def handle(self, *args, **options):
+        logger.debug("COMMAND recalculate_project_dates")
+        projects = Project.objects.order_by("pk")
+        if options["names"]:
+            projects = projects.filter(name__in=options["names"])
+
+        for project_id, name in projects.values_list("pk", "name"):
+            updated = recalculate_project_dates(project_id)
+            self.stdout.write(f"Проект `{name}`: обновлено событий - {updated}")
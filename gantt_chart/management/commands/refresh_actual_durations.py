@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+from loguru import logger
+
+from gantt_chart.service.calendar import refresh_actual_durations
+
+
+class Command(BaseCommand):
+    help = (
+        "Обновление фактических длительностей незавершенных событий на текущую дату"
+        " (для периодического запуска, например раз в сутки по cron)"
+    )
+
+    def handle(self, *args, **options):
+        logger.debug("COMMAND refresh_actual_durations")
+        updated, project_ids = refresh_actual_durations()
+        self.stdout.write(f"Обновлено событий - {updated}, проектов - {len(project_ids)}")
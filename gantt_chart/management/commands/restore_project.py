@@ -0,0 +1,29 @@
+from django.core.management import BaseCommand, CommandError
+from loguru import logger
+
+from gantt_chart.service.exceptions import ProjectSnapshotException
+from gantt_chart.service.snapshot import restore_project_snapshot
+
+
+class Command(BaseCommand):
+    help = "Восстановление проекта из снимка (команда `dump_project`) в новый проект"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к файлу снимка")
+        parser.add_argument("--name", help="Название нового проекта (по умолчанию - из снимка)")
+
+    def handle(self, *args, **options):
+        logger.debug("COMMAND restore_project")
+        try:
+            with open(options["path"], "rb") as file:
+                project, result = restore_project_snapshot(file, options["name"])
+        except ProjectSnapshotException as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(
+            f"Проект `{project}` (id={project.pk}) восстановлен: событий - {result['events']},"
+            f" связей - {result['links']}, участников - {result['participants']},"
+            f" комментариев - {result['comments']}"
+        )
+        if result["missing_users"]:
+            self.stdout.write(f"Не найдены пользователи: {', '.join(result['missing_users'])}")
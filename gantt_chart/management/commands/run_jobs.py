@@ -0,0 +1,102 @@
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from time import monotonic
+
+import django
+from django.conf import settings
+from django.core.management import BaseCommand
+from loguru import logger
+
+from gantt_chart.service.job import claim_job, execute_job, renew_job_leases, requeue_lost_jobs, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Обработчик фоновых задач: задачи забираются из очереди в БД и выполняются в пуле процессов,"
+        " задачи одного проекта выполняются по очереди"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=settings.JOB_WORKERS, help="Количество процессов")
+        parser.add_argument(
+            "--poll-interval", type=float, default=settings.JOB_POLL_INTERVAL, help="Интервал опроса очереди (с)"
+        )
+        parser.add_argument("--once", action="store_true", help="Выполнить готовые задачи и завершиться")
+
+    def handle(self, *args, **options):
+        logger.debug("COMMAND run_jobs")
+        self._processes = max(options["processes"], 1)
+        self._pool = self._create_pool()
+        self._running: dict[Future, int] = {}
+        self._completed = 0
+        poll_interval = options["poll_interval"]
+        requeued_at = 0.0
+        try:
+            while True:
+                if monotonic() - requeued_at > poll_interval * 10:
+                    requeue_stale_jobs()
+                    requeued_at = monotonic()
+
+                self._submit_jobs()
+                if options["once"] and not self._running:
+                    break
+
+                self._wait_jobs(poll_interval)
+                renew_job_leases(self._running.values())
+        except KeyboardInterrupt:
+            logger.debug("COMMAND run_jobs interrupted")
+        finally:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+        self.stdout.write(f"Выполнено задач - {self._completed}")
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        # spawn: процессы пула не наследуют открытые соединения с БД, Django настраивается в каждом процессе
+        return ProcessPoolExecutor(
+            self._processes, mp_context=multiprocessing.get_context("spawn"), initializer=django.setup
+        )
+
+    def _restart_pool(self):
+        """
+        Пересоздание пула процессов
+
+        После аварийного завершения процесса (например, по нехватке памяти) пул непригоден:
+        все его задачи завершаются с `BrokenProcessPool`, новые задачи не принимаются.
+        Задачи прежнего пула сразу возвращаются в очередь и не держат очередь своего проекта до истечения аренды
+        """
+
+        logger.error(f"JOB worker pool is broken, restarting, lost jobs: {sorted(self._running.values())}")
+        requeue_lost_jobs(self._running.values())
+        self._running.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = self._create_pool()
+
+    def _submit_jobs(self):
+        while len(self._running) < self._processes:
+            job = claim_job()
+            if job is None:
+                break
+            try:
+                future = self._pool.submit(execute_job, job.pk)
+            except BrokenProcessPool:
+                self._restart_pool()
+                future = self._pool.submit(execute_job, job.pk)
+            self._running[future] = job.pk
+
+    def _wait_jobs(self, timeout: float):
+        done, _ = wait(self._running, timeout=timeout, return_when=FIRST_COMPLETED)
+        crashed, broken = [], False
+        for future in done:
+            job_id = self._running.pop(future)
+            self._completed += 1
+            if future.exception() is not None:
+                # Процесс пула аварийно завершился, не завершив задачу - она сразу возвращается в очередь
+                logger.error(f"JOB #{job_id} worker crashed: {future.exception()!r}")
+                crashed.append(job_id)
+                broken = broken or isinstance(future.exception(), BrokenProcessPool)
+
+        if crashed:
+            requeue_lost_jobs(crashed)
+        if broken:
+            self._restart_pool()
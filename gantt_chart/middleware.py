@@ -0,0 +1,163 @@
+from bisect import bisect_left
+from collections import Counter
+from threading import Lock
+from time import perf_counter
+from traceback import extract_stack
+from typing import Any
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpRequest, HttpResponse
+from loguru import logger
+
+# Границы корзин гистограмм (последняя корзина - все, что больше)
+TIME_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERIES_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+_request_stats_attribute = "_query_stats"
+
+
+class RequestQueryStats:
+    """Статистика SQL запросов и времени обработки одного запроса"""
+
+    __slots__ = ("queries", "db_time", "duplicates", "origins", "view_start", "view_time", "render_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.duplicates: Counter[str] = Counter()
+        self.origins: dict[str, str] = {}
+        self.view_start = 0.0
+        self.view_time = 0.0
+        self.render_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        key = f"{sql} | {params}"
+        self.duplicates[key] += 1
+        # Стек снимается только для повторного запроса, чтобы найти место дублирования
+        if self.duplicates[key] == 2:
+            self.origins[key] = _get_origin()
+
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += perf_counter() - start
+            self.queries += 1
+
+    def get_duplicates(self) -> list[tuple[str, int, str]]:
+        return [(sql, count, self.origins[sql]) for sql, count in self.duplicates.items() if count > 1]
+
+
+class QueryStatsRegistry:
+    """Агрегированная статистика по именам URL (в памяти процесса)"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._stats: dict[str, dict[str, Any]] = {}
+
+    def add(self, url_name: str, stats: RequestQueryStats, total_time: float):
+        with self._lock:
+            item = self._stats.setdefault(
+                url_name,
+                {
+                    "requests": 0,
+                    "queries": 0,
+                    "db_time": 0.0,
+                    "view_time": 0.0,
+                    "render_time": 0.0,
+                    "total_time": 0.0,
+                    "duplicate_queries": 0,
+                    "time_histogram_ms": [0] * (len(TIME_BUCKETS_MS) + 1),
+                    "queries_histogram": [0] * (len(QUERIES_BUCKETS) + 1),
+                },
+            )
+            item["requests"] += 1
+            item["queries"] += stats.queries
+            item["db_time"] += stats.db_time
+            item["view_time"] += stats.view_time
+            item["render_time"] += stats.render_time
+            item["total_time"] += total_time
+            item["duplicate_queries"] += sum(count - 1 for count in stats.duplicates.values())
+            item["time_histogram_ms"][bisect_left(TIME_BUCKETS_MS, total_time * 1000)] += 1
+            item["queries_histogram"][bisect_left(QUERIES_BUCKETS, stats.queries)] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "time_buckets_ms": TIME_BUCKETS_MS,
+                "queries_buckets": QUERIES_BUCKETS,
+                "urls": {url_name: dict(item) for url_name, item in self._stats.items()},
+            }
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+
+
+QUERY_STATS = QueryStatsRegistry()
+
+
+def _get_origin() -> str:
+    """Последний кадр стека из кода проекта (вне виртуального окружения и самой статистики)"""
+
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(extract_stack()):
+        if frame.filename.startswith(base_dir) and "site-packages" not in frame.filename and frame.filename != __file__:
+            return f"{frame.filename}:{frame.lineno} in {frame.name}"
+
+    return "unknown"
+
+
+class QueryStatsMiddleware:
+    """
+    Сбор статистики SQL запросов и времени обработки по именам URL
+
+    Подключается только при `QUERY_STATS_ENABLED` (см. settings), в выключенном состоянии накладных расходов нет.
+    Результаты пишутся в лог и агрегируются в `QUERY_STATS` (эндпоинт `query_stats`)
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        stats = RequestQueryStats()
+        setattr(request, _request_stats_attribute, stats)
+
+        start = perf_counter()
+        with connection.execute_wrapper(stats):
+            response = self.get_response(request)
+        end = perf_counter()
+        total_time = end - start
+
+        # Для ответов без TemplateResponse отрисовка входит во время представления
+        if stats.view_start and not stats.view_time:
+            stats.view_time = end - stats.view_start
+
+        match = request.resolver_match
+        url_name = (match.view_name if match else None) or request.path
+        QUERY_STATS.add(url_name, stats, total_time)
+
+        logger.info(
+            f"{url_name} | queries={stats.queries} db={stats.db_time * 1000:.1f}ms"
+            f" view={stats.view_time * 1000:.1f}ms render={stats.render_time * 1000:.1f}ms"
+            f" total={total_time * 1000:.1f}ms"
+        )
+        for sql, count, origin in stats.get_duplicates():
+            logger.warning(f"{url_name} | duplicate query x{count} from {origin}: {sql[:500]}")
+
+        return response
+
+    def process_view(self, request: HttpRequest, *args, **kwargs):
+        getattr(request, _request_stats_attribute).view_start = perf_counter()
+
+    def process_template_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        stats: RequestQueryStats = getattr(request, _request_stats_attribute)
+        render_start = perf_counter()
+        stats.view_time = render_start - stats.view_start
+
+        def set_render_time(response: HttpResponse):
+            stats.render_time = perf_counter() - render_start
+
+        response.add_post_render_callback(set_render_time)
+        return response
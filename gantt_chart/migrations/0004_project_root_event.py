@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def set_projects_root_event(apps, schema_editor):
+    Project = apps.get_model("gantt_chart", "Project")
+    ChartEvent = apps.get_model("gantt_chart", "ChartEvent")
+
+    root_events = ChartEvent.objects.filter(project=OuterRef("pk"), is_root=True).order_by("pk").values("pk")[:1]
+    Project.objects.update(root_event=Subquery(root_events))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gantt_chart", "0003_alter_project_update_percentage_completion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="root_event",
+            field=models.OneToOneField(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="gantt_chart.chartevent",
+                verbose_name="Корневое событие",
+            ),
+        ),
+        migrations.RunPython(set_projects_root_event, migrations.RunPython.noop),
+    ]
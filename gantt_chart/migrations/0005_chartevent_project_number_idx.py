@@ -0,0 +1,16 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gantt_chart", "0004_project_root_event"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="chartevent",
+            index=models.Index(fields=["project", "hierarchical_number"], name="event_project_number_idx"),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+import gantt_chart.models.calendar
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gantt_chart", "0005_chartevent_project_number_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectCalendar",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "weekend_days",
+                    models.CharField(
+                        blank=True,
+                        default="5,6",
+                        help_text="Номера дней недели через запятую: 0 - понедельник, 6 - воскресенье",
+                        max_length=13,
+                        validators=[gantt_chart.models.calendar.validate_weekend_days],
+                        verbose_name="Выходные дни недели",
+                    ),
+                ),
+                ("version", models.UUIDField(default=uuid.uuid4, editable=False, verbose_name="Версия календаря")),
+                (
+                    "project",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="calendar",
+                        to="gantt_chart.project",
+                        verbose_name="Проект",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Рабочий календарь проекта",
+                "verbose_name_plural": "Рабочие календари проектов",
+            },
+        ),
+        migrations.CreateModel(
+            name="ProjectHoliday",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField(verbose_name="Дата")),
+                ("name", models.CharField(blank=True, max_length=256, verbose_name="Название")),
+                (
+                    "calendar",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="holidays",
+                        to="gantt_chart.projectcalendar",
+                        verbose_name="Календарь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Нерабочий день",
+                "verbose_name_plural": "Нерабочие дни",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="projectholiday",
+            constraint=models.UniqueConstraint(fields=("calendar", "date"), name="unique_calendar_holiday"),
+        ),
+    ]
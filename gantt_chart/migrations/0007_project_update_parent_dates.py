@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gantt_chart", "0006_project_calendar"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="update_parent_dates",
+            field=models.BooleanField(default=False, verbose_name="Обновлять даты родительских событий по дочерним"),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gantt_chart", "0007_project_update_parent_dates"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="chartevent",
+            index=models.Index(fields=["project", "planned_start", "planned_end"], name="event_project_planned_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="chartevent",
+            index=models.Index(fields=["project", "actual_start", "actual_end"], name="event_project_actual_idx"),
+        ),
+    ]
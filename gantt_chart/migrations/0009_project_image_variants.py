@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gantt_chart", "0008_chartevent_window_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name="Варианты изображения"),
+        ),
+        migrations.AlterField(
+            model_name="project",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                help_text="Изображение обрезается до соотношения сторон 4:1 (например, 960x240)",
+                max_length=512,
+                null=True,
+                upload_to="projects/original/",
+                verbose_name="Изображение",
+            ),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("gantt_chart", "0009_project_image_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BackgroundJob",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("kind", models.CharField(max_length=64, verbose_name="Тип задачи")),
+                (
+                    "lock_key",
+                    models.BigIntegerField(blank=True, editable=False, null=True, verbose_name="Ключ очереди"),
+                ),
+                ("params", models.JSONField(blank=True, default=dict, verbose_name="Параметры")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("QUEUED", "В очереди"),
+                            ("RUNNING", "Выполняется"),
+                            ("SUCCEEDED", "Выполнено"),
+                            ("FAILED", "Ошибка"),
+                        ],
+                        default="QUEUED",
+                        max_length=16,
+                        verbose_name="Статус",
+                    ),
+                ),
+                ("progress", models.PositiveSmallIntegerField(default=0, verbose_name="Прогресс")),
+                ("message", models.CharField(blank=True, max_length=512, verbose_name="Сообщение")),
+                ("result", models.JSONField(blank=True, default=dict, verbose_name="Результат")),
+                ("error", models.TextField(blank=True, verbose_name="Ошибка")),
+                ("attempts", models.PositiveSmallIntegerField(default=0, verbose_name="Попыток")),
+                ("max_attempts", models.PositiveSmallIntegerField(default=3, verbose_name="Максимум попыток")),
+                ("run_after", models.DateTimeField(default=django.utils.timezone.now, verbose_name="Не ранее")),
+                (
+                    "heartbeat_at",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Последний сигнал обработчика"),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Создана")),
+                ("started_at", models.DateTimeField(blank=True, null=True, verbose_name="Начата")),
+                ("finished_at", models.DateTimeField(blank=True, null=True, verbose_name="Завершена")),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Автор",
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="jobs",
+                        to="gantt_chart.project",
+                        verbose_name="Проект",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Фоновая задача",
+                "verbose_name_plural": "Фоновые задачи",
+                "indexes": [
+                    models.Index(fields=["status", "run_after"], name="job_status_run_after_idx"),
+                    models.Index(fields=["lock_key", "status"], name="job_lock_key_status_idx"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("gantt_chart", "0010_background_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectBaseline",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=256, verbose_name="Название")),
+                ("is_keyframe", models.BooleanField(default=False, editable=False, verbose_name="Полный снимок")),
+                ("data", models.BinaryField(verbose_name="Даты событий")),
+                ("events_count", models.PositiveIntegerField(default=0, editable=False, verbose_name="Событий")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Создан")),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Автор",
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="baselines",
+                        to="gantt_chart.project",
+                        verbose_name="Проект",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Базовый план",
+                "verbose_name_plural": "Базовые планы",
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gantt_chart", "0011_project_baseline"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventProgressSample",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField(verbose_name="Дата")),
+                (
+                    "previous_completion",
+                    models.PositiveSmallIntegerField(default=0, verbose_name="Процент выполнения до изменения"),
+                ),
+                (
+                    "percentage_completion",
+                    models.PositiveSmallIntegerField(default=0, verbose_name="Процент выполнения"),
+                ),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="progress_samples",
+                        to="gantt_chart.chartevent",
+                        verbose_name="Событие",
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="gantt_chart.project",
+                        verbose_name="Проект",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Изменение процента выполнения",
+                "verbose_name_plural": "История процента выполнения",
+                "indexes": [models.Index(fields=["project", "date"], name="progress_project_date_idx")],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="eventprogresssample",
+            constraint=models.UniqueConstraint(fields=("event", "date"), name="progress_event_date_uniq"),
+        ),
+    ]
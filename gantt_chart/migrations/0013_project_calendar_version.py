@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:01
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def set_projects_calendar_version(apps, schema_editor):
+    Project = apps.get_model("gantt_chart", "Project")
+    ProjectCalendar = apps.get_model("gantt_chart", "ProjectCalendar")
+
+    versions = ProjectCalendar.objects.filter(project=OuterRef("pk")).values("version")[:1]
+    Project.objects.update(calendar_version=Subquery(versions))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("gantt_chart", "0012_event_progress_sample"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="calendar_version",
+            field=models.UUIDField(blank=True, editable=False, null=True, verbose_name="Версия календаря"),
+        ),
+        migrations.RunPython(set_projects_calendar_version, migrations.RunPython.noop),
+    ]
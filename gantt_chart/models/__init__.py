@@ -1,3 +1,7 @@
+from .baseline import ProjectBaseline
+from .calendar import ProjectCalendar, ProjectHoliday
 from .common import UniversalComment
 from .event import ChartEvent, ChartEventLink
+from .job import BackgroundJob, BackgroundJobStatus
+from .progress import EventProgressSample
 from .project import Project, ProjectParticipant, ProjectParticipantRole
@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class ProjectBaseline(models.Model):
+    """
+    Базовый план проекта - сохраненные планируемые даты событий
+
+    Даты хранятся упакованными массивами (`service.baseline`): полный снимок или изменения
+    относительно предыдущего базового плана проекта
+    """
+
+    project = models.ForeignKey(
+        "gantt_chart.Project",
+        on_delete=models.CASCADE,
+        blank=False,
+        null=False,
+        related_name="baselines",
+        verbose_name="Проект",
+    )
+    name = models.CharField("Название", max_length=256, blank=False, null=False)
+    is_keyframe = models.BooleanField("Полный снимок", default=False, editable=False)
+    data = models.BinaryField("Даты событий", editable=False)
+    events_count = models.PositiveIntegerField("Событий", default=0, editable=False)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="+",
+        verbose_name="Автор",
+    )
+    created_at = models.DateTimeField("Создан", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Базовый план"
+        verbose_name_plural = "Базовые планы"
+
+    def __str__(self) -> str:
+        return self.name
@@ -0,0 +1,69 @@
+from uuid import uuid4
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_comma_separated_integer_list
+from django.db import models
+
+
+def validate_weekend_days(value: str):
+    validate_comma_separated_integer_list(value)
+    days = {int(day) for day in value.split(",")}
+    if any(not 0 <= day <= 6 for day in days):
+        raise ValidationError("Дни недели задаются числами от 0 (понедельник) до 6 (воскресенье)")
+    if len(days) == 7:
+        raise ValidationError("В неделе должен быть хотя бы один рабочий день")
+
+
+class ProjectCalendar(models.Model):
+    """Рабочий календарь проекта"""
+
+    project = models.OneToOneField(
+        "gantt_chart.Project",
+        on_delete=models.CASCADE,
+        blank=False,
+        null=False,
+        related_name="calendar",
+        verbose_name="Проект",
+    )
+    weekend_days = models.CharField(
+        "Выходные дни недели",
+        max_length=13,
+        blank=True,
+        default="5,6",
+        validators=(validate_weekend_days,),
+        help_text="Номера дней недели через запятую: 0 - понедельник, 6 - воскресенье",
+    )
+    version = models.UUIDField("Версия календаря", default=uuid4, editable=False)
+
+    class Meta:
+        verbose_name = "Рабочий календарь проекта"
+        verbose_name_plural = "Рабочие календари проектов"
+
+    def __str__(self) -> str:
+        return f"Календарь проекта {self.project}"
+
+    def get_weekend_days(self) -> frozenset[int]:
+        return frozenset(int(day) for day in self.weekend_days.split(",") if day)
+
+
+class ProjectHoliday(models.Model):
+    """Нерабочий день календаря проекта"""
+
+    calendar = models.ForeignKey(
+        ProjectCalendar,
+        on_delete=models.CASCADE,
+        blank=False,
+        null=False,
+        related_name="holidays",
+        verbose_name="Календарь",
+    )
+    date = models.DateField("Дата", blank=False, null=False)
+    name = models.CharField("Название", max_length=256, blank=True)
+
+    class Meta:
+        verbose_name = "Нерабочий день"
+        verbose_name_plural = "Нерабочие дни"
+        constraints = (models.UniqueConstraint(fields=("calendar", "date"), name="unique_calendar_holiday"),)
+
+    def __str__(self) -> str:
+        return f"{self.date} {self.name}".strip()
@@ -1,27 +1,68 @@
-from datetime import date, timedelta
-from typing import TYPE_CHECKING, Optional
+from datetime import date
+from typing import TYPE_CHECKING, Iterable, Optional
 
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import connection, models
 from django.db.models import Max, Min, Sum
+from django.db.models.expressions import RawSQL
 from django.db.models.query import QuerySet
+from django.utils.functional import cached_property
 from django.utils.timezone import now
 
 from .mixins import ModelDiffMixin
 
 if TYPE_CHECKING:
     from gantt_chart.models import Project
+    from gantt_chart.service.calendar import CalendarDays
 
 User = get_user_model()
 
 
+def _get_tree_ids(event_ids: Iterable[int], descendants: bool) -> RawSQL:
+    quote = connection.ops.quote_name
+    table, pk, parent = quote(ChartEvent._meta.db_table), quote("id"), quote("parent_id")
+    event_ids = list(event_ids)
+    placeholders = ", ".join(["%s"] * len(event_ids)) or "NULL"
+    if descendants:
+        step = f"SELECT event.{pk} FROM {table} event INNER JOIN tree ON event.{parent} = tree.{pk}"
+    else:
+        step = (
+            f"SELECT event.{parent} FROM {table} event INNER JOIN tree ON event.{pk} = tree.{pk} "
+            f"WHERE event.{parent} IS NOT NULL"
+        )
+    return RawSQL(
+        f"WITH RECURSIVE tree ({pk}) AS (SELECT {pk} FROM {table} WHERE {pk} IN ({placeholders}) UNION {step}) "
+        f"SELECT {pk} FROM tree",
+        event_ids,
+    )
+
+
+def get_subtree_ids(event_ids: Iterable[int]) -> RawSQL:
+    """
+    Подзапрос идентификаторов событий `event_ids` и всех их потомков
+
+    Поддерево выбирается рекурсивным CTE по `parent_id`, а не по префиксу иерархического номера:
+    номера не уникальны (в старых данных у соседних событий встречаются одинаковые номера)
+    """
+
+    return _get_tree_ids(event_ids, descendants=True)
+
+
+def get_ancestor_ids(event_ids: Iterable[int]) -> RawSQL:
+    """Подзапрос идентификаторов событий `event_ids` и всех их предков (рекурсивным CTE по `parent_id`)"""
+
+    return _get_tree_ids(event_ids, descendants=False)
+
+
 class ChartEventManager(models.Manager):
     def get_queryset(self) -> QuerySet:
         return super().get_queryset().order_by("project", "hierarchical_number")
 
     def get_root_from_project(self, project: "Project") -> Optional["ChartEvent"]:
-        return self.filter(project=project, is_root=True).first()
+        if project.root_event_id is None:
+            return None
+        return project.root_event
 
 
 class ChartEvent(ModelDiffMixin, models.Model):
@@ -73,6 +114,12 @@ class ChartEvent(ModelDiffMixin, models.Model):
     class Meta:
         verbose_name = "Событие графика"
         verbose_name_plural = "События графика"
+        indexes = (
+            models.Index(fields=("project", "hierarchical_number"), name="event_project_number_idx"),
+            # Выборка событий графика по окну дат (пересечение диапазонов)
+            models.Index(fields=("project", "planned_start", "planned_end"), name="event_project_planned_idx"),
+            models.Index(fields=("project", "actual_start", "actual_end"), name="event_project_actual_idx"),
+        )
 
     def __str__(self) -> str:
         return f"{self.hierarchical_number} | {self.name}"
@@ -80,18 +127,23 @@ class ChartEvent(ModelDiffMixin, models.Model):
     def get_children(self) -> QuerySet:
         return self.__class__.objects.filter(parent=self)
 
+    def get_subtree(self) -> QuerySet:
+        """Событие и все его потомки (по цепочке `parent`)"""
+
+        return self.__class__.objects.filter(project_id=self.project_id, pk__in=get_subtree_ids((self.pk,)))
+
     def get_min_planned_start(self) -> date:
         return self.__class__.objects.filter(project=self.project).aggregate(Min("planned_start"))["planned_start__min"]
 
     def get_full_planned_duration(self) -> int:
         min_planned_start = self.get_min_planned_start()
         max_planned_end = self.get_max_planned_end()
-        return (max_planned_end - min_planned_start + timedelta(1)).days
+        return self.working_calendar.count_working_days(min_planned_start, max_planned_end)
 
     def get_rest_planned(self) -> int:
         current_date = self.get_current_date()
         max_planned_end = self.get_max_planned_end()
-        return (max_planned_end - current_date - timedelta(1)).days
+        return self.working_calendar.working_days_diff(current_date, max_planned_end) - 1
 
     def get_max_planned_end(self) -> date:
         return self.__class__.objects.filter(project=self.project).aggregate(Max("planned_end"))["planned_end__max"]
@@ -108,11 +160,12 @@ class ChartEvent(ModelDiffMixin, models.Model):
         max_actual_end = self.get_max_actual_end()
         current_date = self.get_current_date()
         if min_actual_start:
+            calendar = self.working_calendar
             if max_actual_end and max_actual_end > max_actual_start:
-                return (max_actual_end - min_actual_start + timedelta(1)).days
+                return calendar.count_working_days(min_actual_start, max_actual_end)
             if current_date > max_actual_start:
-                return (current_date - min_actual_start + timedelta(1)).days
-            return (max_actual_start - min_actual_start + timedelta(1)).days
+                return calendar.count_working_days(min_actual_start, current_date)
+            return calendar.count_working_days(min_actual_start, max_actual_start)
         return 0
 
     def get_actual_deviation(self) -> int:
@@ -122,7 +175,7 @@ class ChartEvent(ModelDiffMixin, models.Model):
         current_date = self.get_current_date()
 
         if percentage_completion == 0:
-            return abs((max_planned_end - current_date).days) + 1
+            return abs(self.working_calendar.working_days_diff(current_date, max_planned_end)) + 1
 
         max_actual_start = self.get_max_actual_start()
         max_actual_end = self.get_max_actual_end()
@@ -131,11 +184,19 @@ class ChartEvent(ModelDiffMixin, models.Model):
         else:
             max_actual_date = max_actual_start
 
-        return abs((max_planned_end - max_actual_date).days) + 1
+        return abs(self.working_calendar.working_days_diff(max_actual_date, max_planned_end)) + 1
 
     def get_max_actual_end(self) -> Optional[date]:
         return self.__class__.objects.filter(project=self.project).aggregate(Max("actual_end"))["actual_end__max"]
 
+    @cached_property
+    def working_calendar(self) -> "CalendarDays":
+        """Рабочий календарь проекта для расчета длительностей в сводке"""
+
+        from gantt_chart.service.calendar import get_project_calendar
+
+        return get_project_calendar(self.project)
+
     def get_current_date(self) -> date:
         return now().date()
 
@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils.timezone import now
+
+User = get_user_model()
+
+
+class BackgroundJobStatus(models.TextChoices):
+    queued = "QUEUED", "В очереди"
+    running = "RUNNING", "Выполняется"
+    succeeded = "SUCCEEDED", "Выполнено"
+    failed = "FAILED", "Ошибка"
+
+
+class BackgroundJob(models.Model):
+    """Фоновая задача (выполняется командой `run_jobs`)"""
+
+    kind = models.CharField("Тип задачи", max_length=64, blank=False, null=False)
+    project = models.ForeignKey(
+        "gantt_chart.Project",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="jobs",
+        verbose_name="Проект",
+    )
+    # Задачи с одним ключом выполняются строго по очереди (ключ - идентификатор проекта,
+    # сохраняется и после удаления проекта)
+    lock_key = models.BigIntegerField("Ключ очереди", blank=True, null=True, editable=False)
+    params = models.JSONField("Параметры", default=dict, blank=True)
+    status = models.CharField(
+        "Статус", choices=BackgroundJobStatus.choices, max_length=16, default=BackgroundJobStatus.queued
+    )
+    progress = models.PositiveSmallIntegerField("Прогресс", default=0)
+    message = models.CharField("Сообщение", max_length=512, blank=True)
+    result = models.JSONField("Результат", default=dict, blank=True)
+    error = models.TextField("Ошибка", blank=True)
+    attempts = models.PositiveSmallIntegerField("Попыток", default=0)
+    max_attempts = models.PositiveSmallIntegerField("Максимум попыток", default=3)
+    run_after = models.DateTimeField("Не ранее", default=now)
+    heartbeat_at = models.DateTimeField("Последний сигнал обработчика", blank=True, null=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="+",
+        verbose_name="Автор",
+    )
+    created_at = models.DateTimeField("Создана", auto_now_add=True)
+    started_at = models.DateTimeField("Начата", blank=True, null=True)
+    finished_at = models.DateTimeField("Завершена", blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        indexes = (
+            models.Index(fields=("status", "run_after"), name="job_status_run_after_idx"),
+            models.Index(fields=("lock_key", "status"), name="job_lock_key_status_idx"),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.kind} #{self.pk}"
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (BackgroundJobStatus.queued, BackgroundJobStatus.running)
@@ -0,0 +1,39 @@
+from django.db import models
+
+
+class EventProgressSample(models.Model):
+    """
+    Изменение процента выполнения события за день
+
+    Одна запись на событие в день: правки за день объединяются, `previous_completion` - значение
+    до первой правки дня. Старые записи прореживаются (`service.progress.compact_progress_samples`)
+    """
+
+    project = models.ForeignKey(
+        "gantt_chart.Project",
+        on_delete=models.CASCADE,
+        blank=False,
+        null=False,
+        related_name="+",
+        verbose_name="Проект",
+    )
+    event = models.ForeignKey(
+        "gantt_chart.ChartEvent",
+        on_delete=models.CASCADE,
+        blank=False,
+        null=False,
+        related_name="progress_samples",
+        verbose_name="Событие",
+    )
+    date = models.DateField("Дата", blank=False, null=False)
+    previous_completion = models.PositiveSmallIntegerField("Процент выполнения до изменения", default=0)
+    percentage_completion = models.PositiveSmallIntegerField("Процент выполнения", default=0)
+
+    class Meta:
+        verbose_name = "Изменение процента выполнения"
+        verbose_name_plural = "История процента выполнения"
+        constraints = (models.UniqueConstraint(fields=("event", "date"), name="progress_event_date_uniq"),)
+        indexes = (models.Index(fields=("project", "date"), name="progress_project_date_idx"),)
+
+    def __str__(self) -> str:
+        return f"{self.event_id} | {self.date}: {self.previous_completion} -> {self.percentage_completion}"
@@ -1,9 +1,8 @@
 from uuid import uuid4
 
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.db import models
-from imagekit.models import ProcessedImageField
-from imagekit.processors import Resize
 
 User = get_user_model()
 
@@ -13,14 +12,16 @@ class Project(models.Model):
 
     name = models.CharField("Название", max_length=512, unique=True, blank=False, null=False)
     description = models.TextField("Описание", blank=True)
-    image = ProcessedImageField(
-        verbose_name="Изображение (960x240)",
+    image = models.ImageField(
+        "Изображение",
+        upload_to="projects/original/",
         max_length=512,
-        processors=[Resize(960, 240)],
-        options={"quality": 100},
         blank=True,
         null=True,
+        help_text="Изображение обрезается до соотношения сторон 4:1 (например, 960x240)",
     )
+    # Обработанные варианты изображения: {"source": исходный файл, "webp"/"jpeg": {ширина: файл}}
+    image_variants = models.JSONField("Варианты изображения", default=dict, blank=True, editable=False)
     is_draft = models.BooleanField("Черновик", default=True)
     project_version = models.UUIDField(
         "Версия проекта", unique=True, blank=False, null=False, default=uuid4, editable=False
@@ -28,6 +29,18 @@ class Project(models.Model):
     update_percentage_completion = models.BooleanField(
         "Обновлять процент выполнения родительским событиям", default=False
     )
+    update_parent_dates = models.BooleanField("Обновлять даты родительских событий по дочерним", default=False)
+    # Копия `ProjectCalendar.version` (None - календаря нет): календарь события берется без запроса к календарю
+    calendar_version = models.UUIDField("Версия календаря", blank=True, null=True, editable=False)
+    root_event = models.OneToOneField(
+        "gantt_chart.ChartEvent",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        editable=False,
+        related_name="+",
+        verbose_name="Корневое событие",
+    )
 
     class Meta:
         verbose_name = "Проект"
@@ -36,6 +49,32 @@ class Project(models.Model):
     def __str__(self) -> str:
         return self.name
 
+    @property
+    def image_ready(self) -> bool:
+        """Варианты изображения построены для текущего загруженного файла"""
+
+        return bool(self.image) and self.image_variants.get("source") == self.image.name
+
+    def get_image_srcset(self, image_format: str) -> str:
+        variants = self.image_variants.get(image_format, {})
+        return ", ".join(f"{default_storage.url(name)} {width}w" for width, name in variants.items())
+
+    @property
+    def image_webp_srcset(self) -> str:
+        return self.get_image_srcset("webp")
+
+    @property
+    def image_jpeg_srcset(self) -> str:
+        return self.get_image_srcset("jpeg")
+
+    @property
+    def image_fallback_url(self) -> str:
+        """Вариант по умолчанию для браузеров без поддержки `srcset`"""
+
+        variants = self.image_variants.get("jpeg", {})
+        name = variants.get("960") or next(iter(variants.values()), None)
+        return default_storage.url(name) if name else self.image.url
+
 
 class ProjectParticipantRole(models.TextChoices):
     supervisor = "SUPERVISOR", "Руководитель"  # все права
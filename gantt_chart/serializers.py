@@ -1,6 +1,23 @@
-from rest_framework.serializers import CharField, IntegerField, ModelSerializer, SerializerMethodField
-
-from gantt_chart.models import ChartEvent, ProjectParticipant
+from datetime import date, timedelta
+
+from rest_framework.serializers import (
+    CharField,
+    ChoiceField,
+    DateField,
+    IntegerField,
+    ListField,
+    ModelSerializer,
+    Serializer,
+    SerializerMethodField,
+    ValidationError,
+)
+
+from gantt_chart.models import BackgroundJob, ChartEvent, ProjectParticipant, ProjectParticipantRole
+from gantt_chart.service.earned_value import EARNED_VALUE_MAX_DATES
+from gantt_chart.service.job import JOB_TITLES
+from gantt_chart.service.leveling import LEVELING_MAX_CAPACITY
+from gantt_chart.service.progress import PROGRESS_MAX_DAYS
+from gantt_chart.service.workload import WORKLOAD_MAX_DAYS
 
 
 class ProjectParticipantSerializer(ModelSerializer):
@@ -12,6 +29,99 @@ class ProjectParticipantSerializer(ModelSerializer):
         fields = ("id", "text")
 
 
+class ProjectParticipantRoleSerializer(Serializer):
+    participant = IntegerField()
+    role = ChoiceField(choices=ProjectParticipantRole.choices)
+
+
+class ProjectParticipantBulkSerializer(Serializer):
+    set = ProjectParticipantRoleSerializer(many=True, required=False, default=list)
+    remove = ListField(child=IntegerField(), required=False, default=list)
+
+
+class BackgroundJobSerializer(ModelSerializer):
+    title = SerializerMethodField()
+    status_display = CharField(source="get_status_display")
+
+    class Meta:
+        model = BackgroundJob
+        fields = (
+            "id",
+            "kind",
+            "title",
+            "status",
+            "status_display",
+            "progress",
+            "message",
+            "result",
+            "error",
+            "attempts",
+        )
+
+    def get_title(self, obj: BackgroundJob) -> str:
+        return JOB_TITLES.get(obj.kind, obj.kind)
+
+
+class ChartFilterSerializer(Serializer):
+    start = DateField(required=False)
+    end = DateField(required=False)
+    root = IntegerField(required=False)
+    responsible = IntegerField(required=False)
+
+    def validate(self, attrs):
+        if "start" in attrs and "end" in attrs and attrs["start"] > attrs["end"]:
+            raise ValidationError("Начало окна дат не может быть больше окончания")
+        return attrs
+
+
+class ChartBaselineSerializer(Serializer):
+    baseline = IntegerField(required=False)
+
+
+class ProjectProgressSerializer(Serializer):
+    days = IntegerField(required=False, min_value=1, max_value=PROGRESS_MAX_DAYS)
+    window = IntegerField(required=False, min_value=1, max_value=90)
+
+
+class EarnedValueSerializer(Serializer):
+    event = IntegerField(required=False)
+    dates = ListField(child=DateField(), required=False, max_length=EARNED_VALUE_MAX_DATES)
+    start = DateField(required=False)
+    end = DateField(required=False)
+    step = IntegerField(required=False, min_value=1, default=7)
+
+    def validate(self, attrs):
+        if ("start" in attrs) != ("end" in attrs):
+            raise ValidationError("Для ряда дат нужны начало и окончание")
+        if "start" in attrs:
+            if attrs["start"] > attrs["end"]:
+                raise ValidationError("Начало ряда дат не может быть больше окончания")
+            if (attrs["end"] - attrs["start"]).days // attrs["step"] + 2 > EARNED_VALUE_MAX_DATES:
+                raise ValidationError(f"В ряду не может быть больше {EARNED_VALUE_MAX_DATES} дат")
+        return attrs
+
+
+class ProjectLevelingSerializer(Serializer):
+    capacity = IntegerField(required=False, min_value=1, max_value=LEVELING_MAX_CAPACITY, default=1)
+
+
+class WorkloadSerializer(Serializer):
+    start = DateField(required=False)
+    end = DateField(required=False)
+    users = ListField(child=IntegerField(), required=False)
+    capacity = IntegerField(required=False, min_value=1, default=1)
+
+    def validate(self, attrs):
+        # По умолчанию - месяц до текущей даты и полгода после
+        attrs.setdefault("start", date.today() - timedelta(30))
+        attrs.setdefault("end", attrs["start"] + timedelta(210))
+        if attrs["start"] > attrs["end"]:
+            raise ValidationError("Начало периода не может быть больше окончания")
+        if (attrs["end"] - attrs["start"]).days >= WORKLOAD_MAX_DAYS:
+            raise ValidationError(f"Период не может быть длиннее {WORKLOAD_MAX_DAYS} дней")
+        return attrs
+
+
 class EventSerializer(ModelSerializer):
     text = SerializerMethodField()
 
@@ -29,9 +139,10 @@ class ChartEventBaseSerializer(ModelSerializer):
     dependencies = SerializerMethodField()
 
     def get_dependencies(self, obj: ChartEvent) -> str:
-        followers = tuple(obj.followers_links.select_related("follower__id").values_list("id", flat=True))
-        if followers:
-            return ", ".join([str(follower) for follower in followers])
+        # Зависимости задачи в Frappe Gantt - идентификаторы событий-предшественников
+        predecessors = tuple(obj.predecessors_links.order_by("pk").values_list("predecessor_id", flat=True))
+        if predecessors:
+            return ", ".join([str(predecessor) for predecessor in predecessors])
 
         return ""
 
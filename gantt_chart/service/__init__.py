@@ -1 +1,3 @@
 from .event import EventService
+from .participant import ParticipantService
+from .project import ProjectService
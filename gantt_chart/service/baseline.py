@@ -0,0 +1,249 @@
+import struct
+import sys
+import zlib
+from array import array
+from datetime import date
+from typing import Any, Iterable, Optional
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Max
+
+from gantt_chart.models import ChartEvent, Project, ProjectBaseline
+
+User = get_user_model()
+
+# Даты события в базовом плане: (начало, окончание) - порядковые номера дней (`date.toordinal`)
+BaselineDates = dict[int, tuple[int, int]]
+
+BASELINE_FORMAT_VERSION = 1
+# Каждый N-й базовый план хранится полным снимком, чтобы цепочка изменений при чтении была короткой
+BASELINE_KEYFRAME_INTERVAL = 20
+# Заголовок: версия формата, базовая дата, количество измененных и удаленных событий
+BASELINE_HEADER = struct.Struct("<BiII")
+
+
+def _to_bytes(values: array) -> bytes:
+    # Массивы хранятся в порядке байтов little-endian независимо от платформы
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _delta_encode(values: list[int]) -> array:
+    return array("q", (value - previous for previous, value in zip([0, *values], values)))
+
+
+def _delta_decode(values: array) -> list[int]:
+    result, current = [], 0
+    for value in values:
+        current += value
+        result.append(current)
+    return result
+
+
+def pack_baseline_dates(changed: BaselineDates, removed: Iterable[int] = ()) -> bytes:
+    """
+    Упаковка дат базового плана
+
+    Идентификаторы событий сортируются и хранятся разностями соседних значений, начало - смещением в днях
+    от минимальной даты, окончание - длительностью в днях от начала. Массивы сжимаются `zlib`
+    """
+
+    ids = sorted(changed)
+    removed = sorted(removed)
+    base = min((changed[pk][0] for pk in ids), default=date.today().toordinal())
+    starts = array("i", (changed[pk][0] - base for pk in ids))
+    lengths = array("i", (changed[pk][1] - changed[pk][0] for pk in ids))
+
+    header = BASELINE_HEADER.pack(BASELINE_FORMAT_VERSION, base, len(ids), len(removed))
+    body = b"".join(_to_bytes(values) for values in (_delta_encode(ids), starts, lengths, _delta_encode(removed)))
+    return zlib.compress(header + body)
+
+
+def unpack_baseline_dates(data: bytes) -> tuple[BaselineDates, list[int]]:
+    """Распаковка дат базового плана: измененные (или все) события и удаленные события"""
+
+    data = zlib.decompress(data)
+    version, base, changed_count, removed_count = BASELINE_HEADER.unpack_from(data)
+    if version != BASELINE_FORMAT_VERSION:
+        raise ValueError(f"Неподдерживаемая версия формата базового плана: {version}")
+
+    offset = BASELINE_HEADER.size
+    arrays = []
+    for typecode, count in (("q", changed_count), ("i", changed_count), ("i", changed_count), ("q", removed_count)):
+        size = array(typecode).itemsize * count
+        arrays.append(_from_bytes(typecode, data[offset : offset + size]))  # noqa: E203
+        offset += size
+
+    ids, starts, lengths, removed = arrays
+    changed = {
+        pk: (base + start, base + start + length) for pk, start, length in zip(_delta_decode(ids), starts, lengths)
+    }
+    return changed, _delta_decode(removed)
+
+
+def get_current_dates(project_id: int) -> BaselineDates:
+    """Текущие планируемые даты событий проекта"""
+
+    return {
+        pk: (planned_start.toordinal(), planned_end.toordinal())
+        for pk, planned_start, planned_end in ChartEvent._base_manager.filter(project_id=project_id).values_list(
+            "pk", "planned_start", "planned_end"
+        )
+    }
+
+
+def get_baseline_dates(baseline: ProjectBaseline) -> BaselineDates:
+    """
+    Даты событий базового плана
+
+    Восстанавливаются применением цепочки изменений от ближайшего предшествующего полного снимка
+    (не более `BASELINE_KEYFRAME_INTERVAL` записей, одним запросом)
+    """
+
+    baselines = ProjectBaseline.objects.filter(project_id=baseline.project_id, pk__lte=baseline.pk)
+    keyframe_id = baselines.filter(is_keyframe=True).aggregate(Max("pk"))["pk__max"] or 0
+
+    dates: BaselineDates = {}
+    for data in baselines.filter(pk__gte=keyframe_id).order_by("pk").values_list("data", flat=True):
+        changed, removed = unpack_baseline_dates(bytes(data))
+        for pk in removed:
+            dates.pop(pk, None)
+        dates.update(changed)
+    return dates
+
+
+def create_baseline(project: Project, name: str, user: Optional[User] = None) -> ProjectBaseline:
+    """
+    Сохранение базового плана проекта
+
+    Хранятся только события, даты которых изменились относительно предыдущего базового плана,
+    и удаленные события. Каждый `BASELINE_KEYFRAME_INTERVAL`-й план - полный снимок
+    """
+
+    with transaction.atomic():
+        # Базовые планы проекта создаются по очереди: изменения считаются от последнего сохраненного
+        if connection.features.has_select_for_update:
+            Project.objects.select_for_update().filter(pk=project.pk).exists()
+
+        dates = get_current_dates(project.pk)
+        previous = ProjectBaseline.objects.filter(project=project).order_by("pk").last()
+        keyframe_id = (
+            ProjectBaseline.objects.filter(project=project, is_keyframe=True).aggregate(Max("pk"))["pk__max"] or 0
+        )
+        is_keyframe = (
+            previous is None
+            or ProjectBaseline.objects.filter(project=project, pk__gt=keyframe_id).count()
+            >= BASELINE_KEYFRAME_INTERVAL - 1
+        )
+
+        if is_keyframe:
+            data = pack_baseline_dates(dates)
+        else:
+            previous_dates = get_baseline_dates(previous)
+            changed = {pk: value for pk, value in dates.items() if previous_dates.get(pk) != value}
+            data = pack_baseline_dates(changed, previous_dates.keys() - dates.keys())
+
+        return ProjectBaseline.objects.create(
+            project=project,
+            name=name,
+            is_keyframe=is_keyframe,
+            data=data,
+            events_count=len(dates),
+            created_by=user if user is not None and user.is_authenticated else None,
+        )
+
+
+def delete_baseline(baseline: ProjectBaseline):
+    """Удаление базового плана, следующий план (если хранит изменения) становится полным снимком"""
+
+    with transaction.atomic():
+        following = (
+            ProjectBaseline.objects.filter(project_id=baseline.project_id, pk__gt=baseline.pk).order_by("pk").first()
+        )
+        if following is not None and not following.is_keyframe:
+            following.data = pack_baseline_dates(get_baseline_dates(following))
+            following.is_keyframe = True
+            following.save(update_fields=("data", "is_keyframe"))
+        baseline.delete()
+
+
+def get_baseline_offsets(
+    planned: list[Optional[tuple[int, int]]], base: int
+) -> tuple[list[Optional[int]], list[Optional[int]]]:
+    """Даты базового плана строк графика смещениями в днях от `base` (`None` - события нет в базовом плане)"""
+
+    return (
+        [value[0] - base if value is not None else None for value in planned],
+        [value[1] - base if value is not None else None for value in planned],
+    )
+
+
+def get_baseline_comparison(project: Project, baseline: ProjectBaseline) -> dict[str, Any]:
+    """
+    Сравнение текущего плана с базовым
+
+    Колоночный формат как у компактных данных графика (`service.chart`): даты - смещения в днях от `base`,
+    по ним же график рисует полосы базового плана. Отклонения - в календарных днях (положительное - позже
+    базового плана, `None` - события нет в базовом плане). Сводное отклонение события - наибольшее отклонение
+    окончания в его поддереве: считается одним проходом в обратном порядке иерархических номеров
+    (потомки идут после предка)
+    """
+
+    baseline_dates = get_baseline_dates(baseline)
+    rows = list(
+        ChartEvent.objects.filter(project=project)
+        .order_by("hierarchical_number")
+        .values_list("pk", "parent_id", "hierarchical_number", "planned_start", "planned_end")
+    )
+    ids, parents, numbers, starts, ends = map(list, zip(*rows)) if rows else ([], [], [], [], [])
+    starts = [value.toordinal() for value in starts]
+    ends = [value.toordinal() for value in ends]
+    planned = [baseline_dates.get(pk) for pk in ids]
+
+    base = min(starts + [value[0] for value in planned if value is not None], default=date.today().toordinal())
+    baseline_starts, baseline_ends = get_baseline_offsets(planned, base)
+    start_slippage = [start - value[0] if value else None for start, value in zip(starts, planned)]
+    end_slippage = [end - value[1] if value else None for end, value in zip(ends, planned)]
+
+    index = {pk: position for position, pk in enumerate(ids)}
+    rolled_slippage = list(end_slippage)
+    for position in range(len(ids) - 1, -1, -1):
+        parent_position = index.get(parents[position])
+        value = rolled_slippage[position]
+        if parent_position is not None and value is not None:
+            parent_value = rolled_slippage[parent_position]
+            rolled_slippage[parent_position] = value if parent_value is None else max(parent_value, value)
+
+    delays = [value for value in end_slippage if value is not None]
+    return {
+        "baseline": {"id": baseline.pk, "name": baseline.name, "created_at": baseline.created_at.isoformat()},
+        "base": date.fromordinal(base).isoformat(),
+        "id": ids,
+        "number": numbers,
+        "start": [start - base for start in starts],
+        "end": [end - base for end in ends],
+        "baseline_start": baseline_starts,
+        "baseline_end": baseline_ends,
+        "start_slippage": start_slippage,
+        "end_slippage": end_slippage,
+        "rolled_slippage": rolled_slippage,
+        "summary": {
+            "events": len(ids),
+            "added": len(ids) - len(delays),
+            "removed": len(baseline_dates.keys() - index.keys()),
+            "delayed": sum(1 for value in delays if value > 0),
+            "ahead": sum(1 for value in delays if value < 0),
+            "max_slippage": max(delays, default=None),
+        },
+    }
@@ -0,0 +1,320 @@
+from array import array
+from datetime import date, timedelta
+from functools import lru_cache
+from threading import Lock
+from typing import Any, Callable, Iterable, Optional
+from uuid import UUID
+
+from django.db import connection, transaction
+from django.db.models import F, Func, IntegerField, Q, Value
+from django.utils.timezone import now
+
+from gantt_chart.models import ChartEvent, Project, ProjectCalendar, ProjectHoliday
+
+from .project import bump_project_version
+
+# Запас (дни) при построении префиксных сумм вокруг запрошенных дат
+CALENDAR_MARGIN_DAYS = 3 * 366
+CALENDAR_CACHE_SIZE = 256
+REFRESH_CHUNK_SIZE = 5000
+UPDATE_BATCH_SIZE = 1000
+
+
+class CalendarDays:
+    """Календарь без выходных: все дни рабочие (поведение проектов без рабочего календаря)"""
+
+    __slots__ = ()
+
+    def is_working_day(self, day: date) -> bool:
+        return True
+
+    def add_working_days(self, start: date, days: int) -> date:
+        """Дата `days`-го рабочего дня, начиная со `start` включительно"""
+
+        return start + timedelta(max(days, 1) - 1)
+
+    def count_working_days(self, start: date, end: date) -> int:
+        """Количество рабочих дней в отрезке [start, end]"""
+
+        return max((end - start).days + 1, 0)
+
+    def working_days_diff(self, start: date, end: date) -> int:
+        """Количество рабочих дней в полуинтервале (start, end] со знаком (аналог `(end - start).days`)"""
+
+        return (end - start).days
+
+
+class WorkingCalendar(CalendarDays):
+    """
+    Рабочий календарь с выходными днями недели и праздниками
+
+    Для диапазона дат строятся массивы: префиксная сумма рабочих дней и порядковые номера рабочих дней,
+    поэтому "дата + N рабочих дней" и "рабочих дней между датами" вычисляются за O(1).
+    Диапазон расширяется при обращении к датам за его пределами. Календарь общий для потоков процесса:
+    диапазон заменяется целиком (читатель берет его одной ссылкой и не видит наполовину замененный),
+    перестроение идет под блокировкой
+    """
+
+    __slots__ = ("_weekend_days", "_holidays", "_range", "_lock")
+
+    def __init__(self, weekend_days: Iterable[int] = (), holidays: Iterable[date] = ()):
+        self._weekend_days = frozenset(weekend_days)
+        self._holidays = frozenset(holiday.toordinal() for holiday in holidays)
+        if len(self._weekend_days) >= 7:
+            raise ValueError("В календаре должен быть хотя бы один рабочий день недели")
+        # Первый день диапазона, префиксные суммы рабочих дней, порядковые номера рабочих дней
+        self._range: tuple[int, array, array] = (0, array("l"), array("l"))
+        self._lock = Lock()
+
+    def is_working_day(self, day: date) -> bool:
+        return self._is_working(day.toordinal())
+
+    def add_working_days(self, start: date, days: int) -> date:
+        ordinal = start.toordinal() - 1
+        first, prefix, working = self._get_range(ordinal, ordinal)
+        while True:
+            index = prefix[ordinal - first] + max(days, 1)
+            if index <= len(working):
+                return date.fromordinal(working[index - 1])
+            first, prefix, working = self._get_range(ordinal, first + len(prefix))
+
+    def count_working_days(self, start: date, end: date) -> int:
+        if end < start:
+            return 0
+        first, prefix, _ = self._get_range(start.toordinal() - 1, end.toordinal())
+        return prefix[end.toordinal() - first] - prefix[start.toordinal() - 1 - first]
+
+    def working_days_diff(self, start: date, end: date) -> int:
+        low, high = sorted((start.toordinal(), end.toordinal()))
+        first, prefix, _ = self._get_range(low, high)
+        return prefix[end.toordinal() - first] - prefix[start.toordinal() - first]
+
+    def _is_working(self, ordinal: int) -> bool:
+        # date.fromordinal(1) - понедельник
+        return (ordinal - 1) % 7 not in self._weekend_days and ordinal not in self._holidays
+
+    def _get_range(self, low: int, high: int) -> tuple[int, array, array]:
+        """Диапазон массивов, покрывающий порядковые номера дней [low, high]"""
+
+        current = self._range
+        first, prefix, _ = current
+        if first <= low and high < first + len(prefix):
+            return current
+
+        with self._lock:
+            current = self._range
+            first, prefix, _ = current
+            if first <= low and high < first + len(prefix):
+                return current
+            low, high = low - CALENDAR_MARGIN_DAYS, high + CALENDAR_MARGIN_DAYS
+            if prefix:
+                low, high = min(low, first), max(high, first + len(prefix) - 1)
+            self._range = self._build(low, high)
+            return self._range
+
+    def _build(self, first: int, last: int) -> tuple[int, array, array]:
+        prefix, working = array("l"), array("l")
+        count = 0
+        for ordinal in range(first, last + 1):
+            if self._is_working(ordinal):
+                count += 1
+                working.append(ordinal)
+            prefix.append(count)
+        return first, prefix, working
+
+
+CALENDAR_DAYS = CalendarDays()
+
+
+@lru_cache(maxsize=CALENDAR_CACHE_SIZE)
+def _get_working_calendar(project_id: int, version: UUID) -> CalendarDays:
+    # Версия календаря входит в ключ кэша: при изменении календаря или праздников кэш не используется
+    weekend_days = ProjectCalendar.objects.filter(project_id=project_id).values_list("weekend_days", flat=True).first()
+    if weekend_days is None:
+        return CALENDAR_DAYS
+    holidays = ProjectHoliday.objects.filter(calendar__project_id=project_id).values_list("date", flat=True)
+    return WorkingCalendar((int(day) for day in weekend_days.split(",") if day), holidays)
+
+
+def get_project_calendar(project: Project | int) -> CalendarDays:
+    """
+    Рабочий календарь проекта (без календаря - все дни рабочие)
+
+    По объекту проекта календарь берется без запросов: версия календаря хранится в `Project.calendar_version`,
+    сам календарь кэшируется по версии. По идентификатору проекта версия забирается одним запросом
+    """
+
+    if isinstance(project, Project):
+        project_id, version = project.pk, project.calendar_version
+    else:
+        project_id = project
+        version = Project.objects.filter(pk=project_id).values_list("calendar_version", flat=True).first()
+    if version is None:
+        return CALENDAR_DAYS
+    return _get_working_calendar(project_id, version)
+
+
+class _DaysCount(Func):
+    """Количество дней в отрезке [start, end] в SQL (аналог `CalendarDays.count_working_days`)"""
+
+    output_field = IntegerField()
+
+    def __init__(self, start, end):
+        super().__init__(end, start)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # date - date в PostgreSQL - целое число дней
+        return super().as_sql(
+            compiler, connection, template="GREATEST(%(expressions)s + 1, 0)", arg_joiner=" - ", **extra_context
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler,
+            connection,
+            template="MAX(CAST(julianday(%(expressions)s) AS INTEGER) + 1, 0)",
+            arg_joiner=") - julianday(",
+            **extra_context,
+        )
+
+
+def _update_field(field: str, values: list[tuple[Any, int]]):
+    """
+    Обновление поля событий по парам (значение, pk) пачками `UPDATE ... FROM (VALUES ...)`
+
+    `bulk_update` строит CASE-выражение на каждую строку, на десятках тысяч строк это основная часть времени
+    """
+
+    opts = ChartEvent._meta
+    model_field = opts.get_field(field)
+    quote_name = connection.ops.quote_name
+    table = quote_name(opts.db_table)
+    with connection.cursor() as cursor:
+        for batch_start in range(0, len(values), UPDATE_BATCH_SIZE):
+            batch = values[batch_start : batch_start + UPDATE_BATCH_SIZE]  # noqa: E203
+            rows = ", ".join(["(%s, %s)"] * len(batch))
+            cursor.execute(
+                f"UPDATE {table} SET {quote_name(model_field.column)} = v.column1"
+                f" FROM (VALUES {rows}) AS v WHERE {table}.{quote_name(opts.pk.column)} = v.column2",
+                [param for value, pk in batch for param in (model_field.get_db_prep_value(value, connection), pk)],
+            )
+
+
+def _recalculate_row(
+    row: tuple, calendar: CalendarDays, current_date: date
+) -> tuple[int, Optional[date], Optional[int]]:
+    """Новые планируемая дата окончания и фактическая длительность события (None - значение не изменилось)"""
+
+    pk, planned_start, planned_duration, planned_end, completion, actual_start, actual_end, actual_duration = row
+    new_planned_end = calendar.add_working_days(planned_start, planned_duration)
+    new_actual_duration = None
+    if completion and actual_start:
+        new_actual_duration = calendar.count_working_days(actual_start, actual_end or current_date)
+    return (
+        pk,
+        new_planned_end if new_planned_end != planned_end else None,
+        new_actual_duration if new_actual_duration != actual_duration else None,
+    )
+
+
+def recalculate_project_dates(project_id: int, progress: Optional[Callable[..., None]] = None) -> int:
+    """
+    Пересчет планируемых дат окончания и фактических длительностей событий проекта по его календарю
+
+    События читаются кортежами значений, в БД записываются только изменившиеся строки.
+    `progress(percent, message)` вызывается через каждые `REFRESH_CHUNK_SIZE` событий и перед записью.
+    Возвращает количество обновленных событий
+    """
+
+    calendar = get_project_calendar(project_id)
+    current_date = now().date()
+    queryset = ChartEvent._base_manager.filter(project_id=project_id)
+    total = queryset.count() if progress is not None else 0
+    rows = queryset.values_list(
+        "pk",
+        "planned_start",
+        "planned_duration",
+        "planned_end",
+        "percentage_completion",
+        "actual_start",
+        "actual_end",
+        "actual_duration",
+    )
+
+    planned_ends, actual_durations = [], []
+    updated = set()
+    for index, row in enumerate(rows.iterator(chunk_size=REFRESH_CHUNK_SIZE), 1):
+        if progress is not None and index % REFRESH_CHUNK_SIZE == 0:
+            progress(index * 90 // total, f"Пересчитано событий: {index} из {total}")
+        pk, new_planned_end, new_actual_duration = _recalculate_row(row, calendar, current_date)
+        if new_planned_end is not None:
+            planned_ends.append((new_planned_end, pk))
+            updated.add(pk)
+        if new_actual_duration is not None:
+            actual_durations.append((new_actual_duration, pk))
+            updated.add(pk)
+
+    if progress is not None:
+        progress(90, f"Сохранение изменений: {len(updated)}")
+    with transaction.atomic():
+        _update_field("planned_end", planned_ends)
+        _update_field("actual_duration", actual_durations)
+        if updated:
+            bump_project_version(project_id)
+
+    return len(updated)
+
+
+def refresh_actual_durations() -> tuple[int, set[int]]:
+    """
+    Обновление фактических длительностей незавершенных событий всех проектов на текущую дату
+
+    В проектах без календаря все дни рабочие: длительность считается в БД одним UPDATE по устаревшим строкам.
+    События проектов с календарем читаются кортежами значений потоком, длительность пересчитывается
+    по календарю проекта, в БД пачками `UPDATE ... FROM (VALUES ...)` записываются только устаревшие значения.
+    Версия меняется только у затронутых проектов.
+    Возвращает количество обновленных событий и идентификаторы затронутых проектов
+    """
+
+    current_date = now().date()
+    in_progress = Q(percentage_completion__gt=0, percentage_completion__lt=100, actual_start__isnull=False)
+    calendars = {
+        project_id: _get_working_calendar(project_id, version)
+        for project_id, version in Project.objects.filter(calendar_version__isnull=False).values_list(
+            "pk", "calendar_version"
+        )
+    }
+
+    with transaction.atomic():
+        days = _DaysCount(F("actual_start"), Value(current_date))
+        stale = (
+            ChartEvent._base_manager.filter(in_progress, project__calendar_version__isnull=True)
+            .exclude(actual_duration=days)
+            .order_by()
+        )
+        project_ids = set(stale.values_list("project_id", flat=True).distinct())
+        updated = stale.update(actual_duration=days)
+
+        rows = (
+            ChartEvent._base_manager.filter(in_progress, project_id__in=calendars)
+            .order_by()
+            .values_list("pk", "project_id", "actual_start", "actual_duration")
+        )
+        actual_durations = []
+        for pk, project_id, actual_start, actual_duration in rows.iterator(chunk_size=REFRESH_CHUNK_SIZE):
+            new_actual_duration = calendars[project_id].count_working_days(actual_start, current_date)
+            if new_actual_duration == actual_duration:
+                continue
+            actual_durations.append((new_actual_duration, pk))
+            project_ids.add(project_id)
+            if len(actual_durations) == REFRESH_CHUNK_SIZE:
+                _update_field("actual_duration", actual_durations)
+                updated += len(actual_durations)
+                actual_durations = []
+
+        _update_field("actual_duration", actual_durations)
+        updated += len(actual_durations)
+        if project_ids:
+            bump_project_version(*project_ids)
+
+    return updated, project_ids
@@ -0,0 +1,283 @@
+from collections import defaultdict
+from datetime import date
+from itertools import chain, pairwise
+from typing import Any, Iterable, Iterator, NamedTuple, Optional, Sequence
+
+from django.db.models import F, Max, Min, Q, QuerySet, Value
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+from gantt_chart.constants import TypeDate
+from gantt_chart.models import ChartEvent, ChartEventLink, Project, ProjectBaseline
+
+from .baseline import get_baseline_dates, get_baseline_offsets
+
+CHART_ROWS_CHUNK_SIZE = 2000
+CHART_TASKS_IN_LOOKUP_LIMIT = 500
+COMPACT_FORMAT_VERSION = 2
+# GET-параметры фильтра графика (`ChartFilterSerializer`)
+CHART_FILTER_PARAMS = ("start", "end", "root", "responsible")
+
+
+class ChartRow(NamedTuple):
+    """Строка графика"""
+
+    id: int
+    hierarchical_number: str
+    name: str
+    start: date
+    end: date
+    progress: int
+
+
+class ChartFilter(NamedTuple):
+    """Фильтр строк графика: окно дат, поддерево и ответственный"""
+
+    start: Optional[date] = None
+    end: Optional[date] = None
+    root_id: Optional[int] = None
+    responsible_id: Optional[int] = None
+
+    @property
+    def has_window(self) -> bool:
+        return self.start is not None or self.end is not None
+
+
+def get_chart_filter(data: dict[str, Any]) -> Optional[ChartFilter]:
+    """Фильтр графика из проверенных данных `ChartFilterSerializer` (None - фильтр не задан)"""
+
+    if not data:
+        return None
+    return ChartFilter(data.get("start"), data.get("end"), data.get("root"), data.get("responsible"))
+
+
+def get_date_fields(type_date: str) -> tuple[str, str]:
+    if type_date == TypeDate.planned.value:
+        return "planned_start", "planned_end"
+    return "actual_start", "actual_end"
+
+
+def get_window_condition(chart_filter: ChartFilter, type_date: str) -> Q:
+    """
+    Пересечение событий с окном дат: начало события <= конец окна и окончание события >= начало окна
+
+    Условие по диапазону обслуживается индексами (project, start, end). Незаполненные фактические даты
+    на графике заменяются текущей датой (см. `to_chart_rows`), поэтому они сравниваются как текущая дата
+    """
+
+    start_field, end_field = get_date_fields(type_date)
+    replace_empty = type_date == TypeDate.actual.value
+    current_date = now().date()
+
+    condition = Q()
+    if chart_filter.end is not None:
+        starts_before_end = Q(**{f"{start_field}__lte": chart_filter.end})
+        if replace_empty and current_date <= chart_filter.end:
+            starts_before_end |= Q(**{f"{start_field}__isnull": True})
+        condition &= starts_before_end
+    if chart_filter.start is not None:
+        ends_after_start = Q(**{f"{end_field}__gte": chart_filter.start})
+        if replace_empty and current_date >= chart_filter.start:
+            ends_after_start |= Q(**{f"{end_field}__isnull": True})
+        condition &= ends_after_start
+
+    return condition
+
+
+def filter_chart_events(queryset: QuerySet, project: Project, chart_filter: ChartFilter, type_date: str) -> QuerySet:
+    """
+    Применение фильтра графика к событиям проекта
+
+    Поддерево выбирается по цепочке родителей (`ChartEvent.DoesNotExist`, если корня нет в проекте)
+    """
+
+    if chart_filter.root_id is not None:
+        root = ChartEvent._base_manager.only("pk", "project_id", "hierarchical_number").get(
+            project=project, pk=chart_filter.root_id
+        )
+        queryset = queryset.filter(pk__in=root.get_subtree().values("pk"))
+    if chart_filter.responsible_id is not None:
+        queryset = queryset.filter(responsible_id=chart_filter.responsible_id)
+    if chart_filter.has_window:
+        queryset = queryset.filter(get_window_condition(chart_filter, type_date))
+    return queryset
+
+
+def get_chart_rows_queryset(project: Project, type_date: str, chart_filter: Optional[ChartFilter] = None) -> QuerySet:
+    """Кортежи значений строк графика в порядке полей `ChartRow`"""
+
+    queryset = ChartEvent.objects.filter(project=project)
+    if chart_filter is not None:
+        queryset = filter_chart_events(queryset, project, chart_filter, type_date)
+
+    return queryset.values_list(
+        "id", "hierarchical_number", "name", *get_date_fields(type_date), "percentage_completion"
+    )
+
+
+def get_chart_bounds(project: Project, type_date: str, chart_filter: Optional[ChartFilter] = None) -> dict[str, Any]:
+    """Границы дат графика без учета окна (для догрузки данных при прокрутке)"""
+
+    queryset = ChartEvent.objects.filter(project=project)
+    if chart_filter is not None:
+        queryset = filter_chart_events(queryset, project, chart_filter._replace(start=None, end=None), type_date)
+
+    start_field, end_field = get_date_fields(type_date)
+    start, end = F(start_field), F(end_field)
+    if type_date == TypeDate.actual.value:
+        # Незаполненные фактические даты на графике - текущая дата
+        current_date = Value(now().date())
+        start, end = Coalesce(start, current_date), Coalesce(end, current_date)
+
+    bounds = queryset.order_by().aggregate(start=Min(start), end=Max(end))
+    return {key: value.isoformat() if value else None for key, value in bounds.items()}
+
+
+def to_chart_rows(rows: Iterable[tuple], type_date: str) -> Iterator[ChartRow]:
+    """Преобразование кортежей значений в строки графика"""
+
+    if type_date == TypeDate.planned.value:
+        for row in rows:
+            yield ChartRow(*row)
+        return
+
+    # Для фактических дат незаполненные значения заменяются текущей датой (как в ChartEventActualSerializer),
+    # текущая дата вычисляется один раз на весь набор строк
+    current_date = now().date()
+    for pk, hierarchical_number, name, start, end, progress in rows:
+        yield ChartRow(pk, hierarchical_number, name, start or current_date, end or current_date, progress)
+
+
+def iter_chart_rows(project: Project, type_date: str, chart_filter: Optional[ChartFilter] = None) -> Iterator[ChartRow]:
+    """Строки графика проекта, собранные напрямую из записей БД (без инстансов модели)"""
+
+    rows = get_chart_rows_queryset(project, type_date, chart_filter).iterator(chunk_size=CHART_ROWS_CHUNK_SIZE)
+    return to_chart_rows(rows, type_date)
+
+
+def get_followers_links(follower_ids: Sequence[int], followers: Optional[QuerySet] = None) -> Iterator[tuple[int, int]]:
+    """
+    Связи (предшественник, последователь), ведущие в события `follower_ids`
+
+    Предшественник может быть вне набора (например, за границей окна дат).
+    Для большого набора связи выбираются подзапросом по `followers` (отфильтрованные строки графика),
+    без него - пачками по `CHART_TASKS_IN_LOOKUP_LIMIT` идентификаторов
+    """
+
+    links = ChartEventLink.objects.order_by("pk").values_list("predecessor_id", "follower_id")
+    if len(follower_ids) <= CHART_TASKS_IN_LOOKUP_LIMIT:
+        return links.filter(follower_id__in=follower_ids).iterator(chunk_size=CHART_ROWS_CHUNK_SIZE)
+    if followers is not None:
+        return links.filter(follower_id__in=followers.values("pk")).iterator(chunk_size=CHART_ROWS_CHUNK_SIZE)
+
+    batches = (
+        follower_ids[start:end]
+        for start, end in pairwise(
+            range(0, len(follower_ids) + CHART_TASKS_IN_LOOKUP_LIMIT, CHART_TASKS_IN_LOOKUP_LIMIT)
+        )
+    )
+    return chain.from_iterable(links.filter(follower_id__in=batch) for batch in batches)
+
+
+def build_chart_tasks(rows: Sequence[ChartRow]) -> list[dict[str, Any]]:
+    """
+    Задачи графика для Frappe Gantt без участия сериализаторов DRF
+
+    Результат совпадает с `ChartEventPlannedSerializer`/`ChartEventActualSerializer`,
+    но зависимости строк забираются одним запросом (пачками для больших страниц)
+    """
+
+    dependencies = defaultdict(list)
+    for predecessor, follower in get_followers_links([row.id for row in rows]):
+        dependencies[follower].append(str(predecessor))
+
+    return [
+        {
+            "id": str(row.id),
+            "name": row.name,
+            "start": row.start.isoformat(),
+            "end": row.end.isoformat(),
+            "progress": row.progress,
+            "dependencies": ", ".join(dependencies[row.id]),
+        }
+        for row in rows
+    ]
+
+
+def get_chart_links(project: Project, followers: Optional[QuerySet] = None) -> Iterator[tuple[int, int]]:
+    """
+    Связи событий проекта в виде пар (предшественник, последователь)
+
+    При `followers` (отфильтрованные строки графика) - только связи, ведущие в эти события
+    """
+
+    links = ChartEventLink.objects.values_list("predecessor_id", "follower_id")
+    if followers is not None:
+        links = links.filter(follower_id__in=followers.values("pk"))
+    else:
+        links = links.filter(predecessor__project=project)
+    return links.iterator(chunk_size=CHART_ROWS_CHUNK_SIZE)
+
+
+def get_compact_chart_data(
+    project: Project,
+    type_date: str,
+    chart_filter: Optional[ChartFilter] = None,
+    baseline: Optional[ProjectBaseline] = None,
+) -> dict[str, Any]:
+    """
+    Данные графика в компактном колоночном формате
+
+    Вместо списка словарей отдаются массивы колонок:
+    - даты -> смещение в днях от минимальной даты начала строк (`base`)
+    - зависимости -> массивы индексов строк-предшественников
+    - внешние зависимости -> идентификаторы предшественников, не попавших в выборку (за границей окна дат)
+    При фильтре добавляются границы дат без учета окна (`bounds`) для догрузки при прокрутке.
+    С базовым планом добавляются его даты (`baseline_start`/`baseline_end`, смещения от того же `base`)
+    для отрисовки полос базового плана.
+    Декодер - `decodeCompactChartData` в `functions.js`
+    """
+
+    queryset = get_chart_rows_queryset(project, type_date, chart_filter)
+    ids, numbers, names, starts, ends, progress = [], [], [], [], [], []
+    row_index: dict[int, int] = {}
+    for row in to_chart_rows(queryset.iterator(chunk_size=CHART_ROWS_CHUNK_SIZE), type_date):
+        row_index[row.id] = len(ids)
+        ids.append(row.id)
+        numbers.append(row.hierarchical_number)
+        names.append(row.name)
+        starts.append(row.start.toordinal())
+        ends.append(row.end.toordinal())
+        progress.append(row.progress)
+
+    base = min(starts, default=date.today().toordinal())
+    dependencies: list[list[int]] = [[] for _ in ids]
+    external_dependencies: list[list[int]] = [[] for _ in ids]
+    for predecessor, follower in get_followers_links(ids, queryset):
+        if follower not in row_index:
+            continue
+        if predecessor in row_index:
+            dependencies[row_index[follower]].append(row_index[predecessor])
+        else:
+            external_dependencies[row_index[follower]].append(predecessor)
+
+    data = {
+        "version": COMPACT_FORMAT_VERSION,
+        "base": date.fromordinal(base).isoformat(),
+        "id": ids,
+        "number": numbers,
+        "name": names,
+        "start": [start - base for start in starts],
+        "end": [end - base for end in ends],
+        "progress": progress,
+        "dependencies": dependencies,
+        "external_dependencies": external_dependencies,
+    }
+    if chart_filter is not None:
+        data["bounds"] = get_chart_bounds(project, type_date, chart_filter)
+    if baseline is not None:
+        baseline_dates = get_baseline_dates(baseline)
+        data["baseline_start"], data["baseline_end"] = get_baseline_offsets(
+            [baseline_dates.get(pk) for pk in ids], base
+        )
+    return data
@@ -0,0 +1,177 @@
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Callable, Optional
+
+from django.db import transaction
+
+from gantt_chart.models import ChartEvent, ChartEventLink, Project, ProjectParticipant
+from gantt_chart.models.event import get_subtree_ids
+from gantt_chart.utils import get_number_key, get_or_create_root_event
+
+from .exceptions import ProjectLinkException
+from .project import bump_project_version
+from .rollup import update_ancestors_completion, update_ancestors_dates
+
+CLONE_BATCH_SIZE = 2000
+CLONE_DATE_FIELDS = ("planned_start", "planned_end", "actual_start", "actual_end")
+CLONE_VALUE_FIELDS = (
+    "name",
+    "planned_start",
+    "planned_duration",
+    "planned_end",
+    "actual_start",
+    "actual_duration",
+    "actual_end",
+    "percentage_completion",
+    "responsible_id",
+)
+
+
+def _get_last_child_number(parent: ChartEvent) -> int:
+    """Номер последнего дочернего события `parent` (0 - дочерних событий нет), как в `EventService`"""
+
+    numbers = ChartEvent._base_manager.filter(parent_id=parent.pk).values_list("hierarchical_number", flat=True)
+    return max((int(number.rpartition(".")[2]) for number in numbers), default=0)
+
+
+def _get_participants(project_id: int) -> set[int]:
+    return set(ProjectParticipant.objects.filter(project_id=project_id).values_list("participant_id", flat=True))
+
+
+class CloneService:
+    """
+    Сервис для копирования событий графика (проекта целиком или поддерева)
+
+    События копируются уровнями глубины (по цепочке `parent`) через `bulk_create`: к моменту вставки уровня
+    идентификаторы родителей уже известны, соответствие старых и новых идентификаторов хранится в памяти.
+    Связи копируются только между скопированными событиями. Все даты сдвигаются на `days_offset` дней.
+    Ответственный сохраняется, только если он участник целевого проекта
+    """
+
+    __slots__ = ("_days_offset",)
+
+    def __init__(self, days_offset: int = 0):
+        self._days_offset = timedelta(days_offset)
+
+    def clone_project(self, project: Project, name: str, progress: Optional[Callable[..., None]] = None) -> Project:
+        """
+        Копия проекта с событиями и связями (без участников и изображения, поэтому и без ответственных)
+
+        `progress(percent, message)` вызывается после копирования каждого уровня событий
+        """
+
+        with transaction.atomic():
+            new_project = Project.objects.create(
+                name=name,
+                description=project.description,
+                update_percentage_completion=project.update_percentage_completion,
+                update_parent_dates=project.update_parent_dates,
+            )
+            source_root = get_or_create_root_event(project)
+            new_root = get_or_create_root_event(new_project)
+            participants = _get_participants(new_project.pk)
+            for field, value in self._get_values(vars(source_root), participants).items():
+                setattr(new_root, field, value)
+            new_root.name = name
+            new_root.save()
+
+            self._clone_descendants(source_root, new_root, participants, progress)
+
+        return new_project
+
+    def clone_subtree(self, event: ChartEvent, parent: ChartEvent) -> ChartEvent:
+        """Копия события с поддеревом последним дочерним событием `parent` (в том числе в другом проекте)"""
+
+        if parent.project_id == event.project_id and event.get_subtree().filter(pk=parent.pk).exists():
+            raise ProjectLinkException(f"Событие {event} нельзя скопировать внутрь собственного поддерева")
+
+        with transaction.atomic():
+            participants = _get_participants(parent.project_id)
+            new_event = ChartEvent(
+                project_id=parent.project_id,
+                parent=parent,
+                hierarchical_number=f"{parent.hierarchical_number}.{_get_last_child_number(parent) + 1}",
+                **self._get_values(vars(event), participants),
+            )
+            new_event.save()
+
+            self._clone_descendants(event, new_event, participants)
+
+            if parent.project.update_percentage_completion:
+                update_ancestors_completion(parent.project_id, (parent.pk,))
+            if parent.project.update_parent_dates:
+                update_ancestors_dates(parent.project_id, (parent.pk,))
+            bump_project_version(parent.project_id)
+
+        return new_event
+
+    def _get_values(self, values: dict[str, Any], participants: set[int]) -> dict[str, Any]:
+        """Значения копируемых полей со сдвигом дат"""
+
+        values = {field: values[field] for field in CLONE_VALUE_FIELDS}
+        for field in CLONE_DATE_FIELDS:
+            if values[field] is not None:
+                values[field] += self._days_offset
+        if values["responsible_id"] not in participants:
+            values["responsible_id"] = None
+        return values
+
+    def _clone_descendants(
+        self,
+        source: ChartEvent,
+        target: ChartEvent,
+        participants: set[int],
+        progress: Optional[Callable[..., None]] = None,
+    ):
+        """Копирование потомков `source` под `target` уровнями глубины, затем связей внутри поддерева"""
+
+        subtree_ids = get_subtree_ids((source.pk,))
+        children, total = defaultdict(list), 0
+        for row in (
+            ChartEvent._base_manager.filter(pk__in=subtree_ids)
+            .exclude(pk=source.pk)
+            .order_by("pk")
+            .values("pk", "parent_id", "hierarchical_number", *CLONE_VALUE_FIELDS)
+        ):
+            children[row["parent_id"]].append(row)
+            total += 1
+        # Дочерние события нумеруются по порядку исходных номеров подряд, под `target` - после его дочерних
+        for rows in children.values():
+            rows.sort(key=lambda row: (get_number_key(row["hierarchical_number"]), row["pk"]))
+
+        id_map, numbers = {source.pk: target.pk}, {source.pk: target.hierarchical_number}
+        last_numbers = {source.pk: _get_last_child_number(target)}
+        level, copied = children[source.pk], 0
+        while level:
+            new_events = []
+            for row in level:
+                parent_id = row["parent_id"]
+                last_numbers[parent_id] = last_numbers.get(parent_id, 0) + 1
+                new_events.append(
+                    ChartEvent(
+                        project_id=target.project_id,
+                        parent_id=id_map[parent_id],
+                        hierarchical_number=f"{numbers[parent_id]}.{last_numbers[parent_id]}",
+                        **self._get_values(row, participants),
+                    )
+                )
+            ChartEvent.objects.bulk_create(new_events, batch_size=CLONE_BATCH_SIZE)
+            for row, new_event in zip(level, new_events):
+                id_map[row["pk"]], numbers[row["pk"]] = new_event.pk, new_event.hierarchical_number
+            copied += len(level)
+            if progress is not None:
+                # Последние проценты - копирование связей
+                progress(copied * 90 // total, f"Скопировано событий: {copied} из {total}")
+            level = [child for row in level for child in children[row["pk"]]]
+
+        # Связи отбираются по последователю из поддерева,
+        # предшественник проверяется по соответствию идентификаторов в памяти
+        links = ChartEventLink.objects.filter(follower_id__in=subtree_ids).values_list("predecessor_id", "follower_id")
+        ChartEventLink.objects.bulk_create(
+            [
+                ChartEventLink(predecessor_id=id_map[predecessor], follower_id=id_map[follower])
+                for predecessor, follower in links.iterator(chunk_size=CLONE_BATCH_SIZE)
+                if predecessor in id_map
+            ],
+            batch_size=CLONE_BATCH_SIZE,
+        )
@@ -0,0 +1,50 @@
+from typing import Callable, Optional
+
+from django.db import models, transaction
+from django.db.models import QuerySet
+
+from gantt_chart.models import ChartEvent
+
+
+def _iter_reverse_relations(model: type[models.Model]):
+    # Включая скрытые связи (related_name="+"), например `Project.root_event`
+    for field in model._meta.get_fields(include_hidden=True):
+        if field.auto_created and not field.concrete and (field.one_to_many or field.one_to_one):
+            yield field
+
+
+def bulk_delete_events(queryset: QuerySet[ChartEvent], progress: Optional[Callable[..., None]] = None) -> int:
+    """
+    Удаление событий набором запросов без коллектора Django
+
+    Коллектор загружает в память каждое событие (рекурсивно через `parent`) и каждую связанную запись,
+    здесь связанные записи удаляются/обновляются запросами по подзапросу идентификаторов событий.
+    Набор должен быть замкнут по потомкам (поддерево или весь проект): связь `parent` не обрабатывается.
+    Сигналы `pre_delete`/`post_delete` для событий и связей не отправляются.
+    `progress(percent, message)` вызывается перед каждым шагом удаления
+    """
+
+    relations = [
+        relation for relation in _iter_reverse_relations(ChartEvent) if relation.related_model is not ChartEvent
+    ]
+    steps = len(relations) + 1
+    with transaction.atomic():
+        event_ids = queryset.values("pk")
+        for step, relation in enumerate(relations):
+            if progress is not None:
+                progress(
+                    step * 100 // steps,
+                    f"Обработка связанных записей: {relation.related_model._meta.verbose_name_plural}",
+                )
+            related = relation.related_model._base_manager.filter(**{f"{relation.field.name}__in": event_ids})
+            if relation.on_delete is models.CASCADE:
+                related.delete()
+            elif relation.on_delete is models.SET_NULL:
+                related.update(**{relation.field.name: None})
+            elif relation.on_delete is not models.DO_NOTHING:
+                # PROTECT/RESTRICT/SET_DEFAULT - проверки остаются за штатным коллектором
+                return queryset.delete()[0]
+
+        if progress is not None:
+            progress(len(relations) * 100 // steps, "Удаление событий")
+        return queryset._raw_delete(queryset.db)
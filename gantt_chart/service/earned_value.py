@@ -0,0 +1,140 @@
+from bisect import bisect_right
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import Any, Iterable, Optional
+
+from django.utils.timezone import now
+
+from gantt_chart.models import ChartEvent, Project
+from gantt_chart.models.event import get_subtree_ids
+
+from .calendar import get_project_calendar
+from .progress import get_progress_changes, get_work_events
+
+# Наибольшее количество дат в одном расчете (ряд по API)
+EARNED_VALUE_MAX_DATES = 1000
+
+
+def _prefix_sums(values: Iterable[float]) -> list[float]:
+    return list(accumulate(values, initial=0))
+
+
+class EarnedValueService:
+    """
+    Освоенный объем (earned value) проекта или поддерева события
+
+    Объем работ - планируемая длительность событий без дочерних событий в рабочих днях (BAC - сумма).
+    Плановый объем (PV) на дату - доля прошедших рабочих дней события, освоенный (EV) - процент выполнения;
+    на прошедшие даты освоенный объем восстанавливается по истории процента выполнения (`service.progress`).
+    Отклонение по срокам SV = EV - PV, индекс выполнения сроков SPI = EV / PV.
+
+    Данные событий загружаются один раз, плановый объем на любую дату считается за O(log n):
+    вклад начатого незавершенного события линеен по числу рабочих дней от начала календаря до даты `P(t)`,
+    поэтому PV(t) = сумма длительностей завершенных + P(t) * сумма r - сумма r * P(начало - 1),
+    где r = длительность / рабочие дни события, а суммы по начатым и завершенным событиям -
+    префиксные суммы по событиям, упорядоченным по началу и по окончанию
+    """
+
+    __slots__ = (
+        "_calendar",
+        "_origin",
+        "_today",
+        "budget",
+        "earned",
+        "_starts",
+        "_start_rates",
+        "_start_offsets",
+        "_ends",
+        "_end_budgets",
+        "_end_rates",
+        "_end_offsets",
+        "_change_days",
+        "_change_sums",
+    )
+
+    def __init__(self, project: Project, event: Optional[ChartEvent] = None):
+        events = get_work_events(project.pk)
+        if event is not None and not event.is_root:
+            events = events.filter(pk__in=get_subtree_ids((event.pk,)))
+        rows = list(events.values_list("planned_start", "planned_end", "planned_duration", "percentage_completion"))
+
+        self._calendar = get_project_calendar(project)
+        self._today = now().date()
+        self._origin = min((row[0] for row in rows), default=self._today)
+        self.budget = sum(row[2] for row in rows)
+        self.earned = sum(row[2] * row[3] for row in rows) / 100
+
+        # Для каждого события: начало, окончание, длительность, r и r * P(начало - 1)
+        items = []
+        for planned_start, planned_end, duration, _ in rows:
+            before_start = self._get_prefix(planned_start - timedelta(1))
+            working_days = self._get_prefix(planned_end) - before_start
+            rate = duration / working_days if working_days > 0 else 0
+            items.append((planned_start.toordinal(), planned_end.toordinal(), duration, rate, rate * before_start))
+
+        items.sort(key=lambda item: item[0])
+        self._starts = [item[0] for item in items]
+        self._start_rates = _prefix_sums(item[3] for item in items)
+        self._start_offsets = _prefix_sums(item[4] for item in items)
+
+        items.sort(key=lambda item: item[1])
+        self._ends = [item[1] for item in items]
+        self._end_budgets = _prefix_sums(item[2] for item in items)
+        self._end_rates = _prefix_sums(item[3] for item in items)
+        self._end_offsets = _prefix_sums(item[4] for item in items)
+
+        changes = sorted(get_progress_changes(project.pk, events).items())
+        self._change_days = [day.toordinal() for day, _ in changes]
+        self._change_sums = _prefix_sums(value / 100 for _, value in changes)
+
+    def _get_prefix(self, day: date) -> int:
+        """Количество рабочих дней от начала календаря расчета до даты включительно"""
+
+        return self._calendar.count_working_days(self._origin, day)
+
+    def get_planned_value(self, day: date) -> float:
+        """Плановый объем на конец дня"""
+
+        ordinal = day.toordinal()
+        started = bisect_right(self._starts, ordinal)
+        finished = bisect_right(self._ends, ordinal)
+        rates = self._start_rates[started] - self._end_rates[finished]
+        offsets = self._start_offsets[started] - self._end_offsets[finished]
+        return self._end_budgets[finished] + self._get_prefix(day) * rates - offsets
+
+    def get_earned_value(self, day: date) -> Optional[float]:
+        """Освоенный объем на конец дня (`None` - дата в будущем)"""
+
+        if day > self._today:
+            return None
+        # Текущий объем за вычетом изменений после даты
+        later = self._change_sums[-1] - self._change_sums[bisect_right(self._change_days, day.toordinal())]
+        return self.earned - later
+
+    def evaluate_date(self, day: date) -> dict[str, Any]:
+        """Показатели освоенного объема на дату"""
+
+        planned = self.get_planned_value(day)
+        earned = self.get_earned_value(day)
+        return {
+            "date": day.isoformat(),
+            "pv": round(planned, 2),
+            "ev": round(earned, 2) if earned is not None else None,
+            "sv": round(earned - planned, 2) if earned is not None else None,
+            "spi": round(earned / planned, 3) if earned is not None and planned > 0 else None,
+        }
+
+    def evaluate(self, days: Iterable[date]) -> dict[str, Any]:
+        """Показатели освоенного объема на набор дат: колонки по датам"""
+
+        values = [self.evaluate_date(day) for day in days]
+        return {
+            "bac": self.budget,
+            **{key: [value[key] for value in values] for key in ("date", "pv", "ev", "sv", "spi")},
+        }
+
+
+def get_earned_value_dates(start: date, end: date, step: int = 7) -> list[date]:
+    """Даты ряда показателей освоенного объема: от `start` с шагом `step` дней, `end` - всегда последняя"""
+
+    return [*(start + timedelta(days=offset) for offset in range(0, (end - start).days, step)), end]
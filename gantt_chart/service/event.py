@@ -1,11 +1,12 @@
-from datetime import timedelta
-from uuid import uuid4
+from typing import Optional
 
 from django.db import transaction
 from django.utils.timezone import now
 
 from gantt_chart.models import ChartEvent
 
+from .calendar import CalendarDays, get_project_calendar
+from .delete import bulk_delete_events
 from .exceptions import (
     EventRootException,
     NotValidEventException,
@@ -15,6 +16,9 @@ from .exceptions import (
     ProjectLinkException,
     UniqueEventRootException,
 )
+from .progress import record_progress
+from .project import bump_project_version
+from .summary import get_event_dates, update_event_summary_dates, update_parents_dates
 
 
 class EventValidateService:
@@ -25,21 +29,24 @@ class EventValidateService:
     def __init__(self, event: ChartEvent):
         self._event = event
 
-    def validate_event_root(self, root_event: ChartEvent):
-        if root_event != self._event and self._event.parent is None:
+    def is_root_event(self, root_event_id: int) -> bool:
+        return self._event.pk is not None and self._event.pk == root_event_id
+
+    def validate_event_root(self, root_event_id: int):
+        if not self.is_root_event(root_event_id) and self._event.parent is None:
             raise UniqueEventRootException(
-                f"Основное событие графика для проекта {self._event.project} уже существует - {root_event}"
+                f"Основное событие графика для проекта {self._event.project} уже существует - id {root_event_id}"
             )
 
-    def validate_event_parent(self, root_event: ChartEvent):
-        if root_event != self._event:
+    def validate_event_parent(self, root_event_id: int):
+        if not self.is_root_event(root_event_id):
             if self._event.parent is None:
                 raise ParentEventRequiredException(f"Событие {self._event} должно иметь родителя")
             if self._event.parent == self._event:
                 raise ParentEventRequiredException(f"Событие {self._event} не может ссылаться само на себя")
 
-    def validate_project(self, root_event: ChartEvent):
-        if root_event != self._event and self._event.parent.project != self._event.project:
+    def validate_project(self, root_event_id: int):
+        if not self.is_root_event(root_event_id) and self._event.parent.project_id != self._event.project_id:
             raise ProjectLinkException(
                 f"Событие {self._event} должно быть привязано к проекту {self._event.parent.project}"
             )
@@ -56,13 +63,14 @@ class EventValidateService:
             )
 
     def validate(self):
-        root_event = ChartEvent.objects.get_root_from_project(self._event.project)
-        if not root_event:
+        # Корневое событие хранится ссылкой в проекте - сравнение идет по идентификатору без запросов к БД
+        root_event_id = self._event.project.root_event_id
+        if root_event_id is None:
             raise EventRootException(f"Основное событие графика для проекта {self._event.project} не найдено")
 
-        self.validate_event_root(root_event)
-        self.validate_event_parent(root_event)
-        self.validate_project(root_event)
+        self.validate_event_root(root_event_id)
+        self.validate_event_parent(root_event_id)
+        self.validate_project(root_event_id)
         self.valdate_plan_end()
         self.validate_plan_dates()
 
@@ -73,22 +81,21 @@ def get_event_hierarchical_number(event: ChartEvent):
     if not event.parent:
         return "1"
 
-    last_childer = event.parent.get_children().last()
-    if last_childer:
-        hierarchical_number = int(last_childer.hierarchical_number.split(".")[-1]) + 1
-    else:
-        hierarchical_number = 1
+    # Максимум берется по числу, а не по строке: при сортировке строк "1.10" < "1.9"
+    children_numbers = event.parent.get_children().values_list("hierarchical_number", flat=True)
+    hierarchical_number = max((int(number.split(".")[-1]) for number in children_numbers), default=0) + 1
 
     return f"{event.parent.hierarchical_number}.{hierarchical_number}"
 
 
-def get_event_planned_end(event: ChartEvent):
-    """Получение планируемой даты окончания"""
+def get_event_planned_end(event: ChartEvent, calendar: Optional[CalendarDays] = None):
+    """Получение планируемой даты окончания (длительность - в рабочих днях календаря проекта)"""
 
-    return event.planned_start + timedelta(event.planned_duration - 1)
+    calendar = calendar or get_project_calendar(event.project)
+    return calendar.add_working_days(event.planned_start, event.planned_duration)
 
 
-def set_event_actual_dates(event: ChartEvent):
+def set_event_actual_dates(event: ChartEvent, calendar: Optional[CalendarDays] = None):
     """Установка фактических дат для события"""
 
     if event.percentage_completion == 0:
@@ -97,12 +104,13 @@ def set_event_actual_dates(event: ChartEvent):
         event.actual_end = None
         return
 
+    calendar = calendar or get_project_calendar(event.project)
     current_date = now().date()
 
     if 0 < event.percentage_completion < 100:
         if not event.actual_start:
             event.actual_start = current_date
-        event.actual_duration = (current_date - event.actual_start + timedelta(1)).days
+        event.actual_duration = calendar.count_working_days(event.actual_start, current_date)
         event.actual_end = None
         return
 
@@ -110,7 +118,7 @@ def set_event_actual_dates(event: ChartEvent):
         event.actual_end = current_date
         if not event.actual_start:
             event.actual_start = current_date
-        event.actual_duration = (event.actual_end - event.actual_start + timedelta(1)).days
+        event.actual_duration = calendar.count_working_days(event.actual_start, event.actual_end)
         return
 
 
@@ -140,20 +148,30 @@ class EventService:
         if self._event.planned_duration == 0:
             self._event.planned_duration = 1
 
+        # Даты до сохранения нужны для инкрементального обновления сводных дат родителей
+        old_dates = None if self._event.new_object else self._get_initial_dates()
+        old_completion = self._get_initial_completion()
+
         with transaction.atomic():
             self._event.save()
+            record_progress(((self._event, old_completion),))
             if self._event.project.update_percentage_completion:
                 self._update_parents()
+            if self._event.project.update_parent_dates:
+                update_parents_dates(self._event, old_dates)
             self._update_project_version()
 
     def delete(self):
-        """Удаление события"""
+        """Удаление события вместе с поддеревом"""
 
         with transaction.atomic():
+            # Поддерево выпадает из родителя целиком, поэтому пересчет идет один раз от корня поддерева
             if self._event.project.update_percentage_completion:
                 self._update_parents(as_deleted=True)
+            if self._event.project.update_parent_dates:
+                update_parents_dates(self._event, get_event_dates(self._event), as_deleted=True)
             self._update_project_version()
-            self._event.delete()
+            bulk_delete_events(self._event.get_subtree())
 
     def _set_data(self):
         """Проставление/обновление данных для события"""
@@ -169,18 +187,31 @@ class EventService:
             self._event.planned_duration = 1
 
         # Проставление/обновление planned_end если его нет или изменились planned_duration/planned_start
-        if not self._event.planned_end or "planned_duration" in changed_fields or "planned_start" in changed_fields:
-            self._event.planned_end = get_event_planned_end(self._event)
-
-        # Обновление фактических дат
-        if "percentage_completion" in changed_fields:
-            set_event_actual_dates(self._event)
+        update_planned_end = (
+            not self._event.planned_end or "planned_duration" in changed_fields or "planned_start" in changed_fields
+        )
+        # Обновление фактических дат (у нового события процент мог быть задан сразу в конструкторе)
+        update_actual_dates = "percentage_completion" in changed_fields or self._event.new_object
+        if not update_planned_end and not update_actual_dates:
+            return
+
+        # Календарь проекта забирается один раз на обе даты
+        calendar = get_project_calendar(self._event.project)
+        if update_planned_end:
+            self._event.planned_end = get_event_planned_end(self._event, calendar)
+        if update_actual_dates:
+            set_event_actual_dates(self._event, calendar)
+
+        # Даты события-контейнера определяются дочерними событиями
+        if self._event.project.update_parent_dates and not self._event.new_object:
+            update_event_summary_dates(self._event, calendar)
 
     def _update_parents(self, as_deleted: bool = False):  # noqa: CCR001
         """Обновление факта родителей события"""
 
         event_for_update = []
         current_event = self._event
+        calendar = get_project_calendar(self._event.project)
 
         # Рекурсивно обновляем родителей
         while True:
@@ -216,7 +247,9 @@ class EventService:
                     parent_all_children_count += 1
 
                 parent.percentage_completion = parent_all_children_percentage / (parent_all_children_count or 1)
-                set_event_actual_dates(parent)
+                # При сводных датах фактические даты родителя определяются дочерними событиями
+                if not self._event.project.update_parent_dates:
+                    set_event_actual_dates(parent, calendar)
                 event_for_update.append(parent)
 
             current_event = parent
@@ -232,6 +265,23 @@ class EventService:
                 ),
             )
 
+    def _get_initial_dates(self) -> dict:
+        """Даты события до изменения"""
+
+        dates = get_event_dates(self._event)
+        for field in dates:
+            field_diff = self._event.get_field_diff(field)
+            if field_diff is not None:
+                dates[field] = field_diff[0]
+        return dates
+
+    def _get_initial_completion(self) -> int:
+        """Процент выполнения события до изменения (у нового события - 0)"""
+
+        if self._event.new_object:
+            return 0
+        field_diff = self._event.get_field_diff("percentage_completion")
+        return self._event.percentage_completion if field_diff is None else field_diff[0]
+
     def _update_project_version(self):
-        self._event.project.project_version = str(uuid4())
-        self._event.project.save(update_fields=("project_version",))
+        bump_project_version(self._event.project_id)
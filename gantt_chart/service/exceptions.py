@@ -24,3 +24,35 @@ class PlannedDatesException(Exception):
 
 class NotValidEventException(Exception):
     ...
+
+
+class ChartTooLargeException(Exception):
+    ...
+
+
+class ParticipantUserException(Exception):
+    ...
+
+
+class EventMoveException(Exception):
+    ...
+
+
+class BackgroundJobException(Exception):
+    """Ошибка фоновой задачи, при которой повторные попытки не выполняются"""
+
+
+class ScheduleImportException(Exception):
+    """Ошибки проверки импортируемого графика"""
+
+    def __init__(self, errors: list[str]):
+        self.errors = errors
+        super().__init__("; ".join(errors))
+
+
+class ProjectSnapshotException(Exception):
+    ...
+
+
+class ResourceLevelingException(Exception):
+    ...
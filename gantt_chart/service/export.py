@@ -0,0 +1,277 @@
+import csv
+import re
+import zipfile
+from datetime import date
+from typing import Any, Iterable, Iterator, NamedTuple, Sequence
+from xml.sax.saxutils import escape
+
+from django.db.models import QuerySet
+
+from gantt_chart.constants import ExportTable
+from gantt_chart.models import ChartEvent, ChartEventLink, Project
+from gantt_chart.utils import get_number_key
+
+EXPORT_CHUNK_SIZE = 2000
+CSV_CHUNK_ROWS = 500
+XLSX_CHUNK_ROWS = 500
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# Дата Excel - количество дней от 30.12.1899
+XLSX_EPOCH = date(1899, 12, 30).toordinal()
+# Начало текста, с которого Excel начинает формулу: такие значения выгружаются с апострофом
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class ExportColumn(NamedTuple):
+    """Колонка выгрузки: заголовок и поле выборки значений"""
+
+    header: str
+    field: str
+
+
+EVENT_EXPORT_COLUMNS = (
+    ExportColumn("Номер иерархии", "hierarchical_number"),
+    ExportColumn("Номер родителя", "parent__hierarchical_number"),
+    ExportColumn("Название", "name"),
+    ExportColumn("Планируемая дата начала", "planned_start"),
+    ExportColumn("Планируемая длительность", "planned_duration"),
+    ExportColumn("Планируемая дата окончания", "planned_end"),
+    ExportColumn("Фактическая дата начала", "actual_start"),
+    ExportColumn("Фактическая длительность", "actual_duration"),
+    ExportColumn("Фактическая дата окончания", "actual_end"),
+    ExportColumn("Процент выполнения", "percentage_completion"),
+    ExportColumn("Ответственный", "responsible__username"),
+)
+
+LINK_EXPORT_COLUMNS = (
+    ExportColumn("Номер предшественника", "predecessor__hierarchical_number"),
+    ExportColumn("Предшественник", "predecessor__name"),
+    ExportColumn("Номер последователя", "follower__hierarchical_number"),
+    ExportColumn("Последователь", "follower__name"),
+)
+
+
+class ExportTableData(NamedTuple):
+    """Таблица выгрузки: название, колонки и строки (кортежи значений)"""
+
+    title: str
+    columns: Sequence[ExportColumn]
+    rows: Iterable[tuple]
+
+
+def _iter_values(queryset: QuerySet, columns: Sequence[ExportColumn], *number_fields: str) -> Iterator[tuple]:
+    """
+    Строки выборки в порядке иерархических номеров `number_fields` по числам ("1.2" < "1.10")
+
+    Строковая сортировка БД здесь не подходит, поэтому сначала читаются только идентификаторы и номера
+    и упорядочиваются в памяти, затем строки целиком забираются порциями по `EXPORT_CHUNK_SIZE` идентификаторов
+    """
+
+    keys = queryset.order_by().values_list("pk", *number_fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    pks = [key[0] for key in sorted(keys, key=lambda key: (*map(get_number_key, key[1:]), key[0]))]
+
+    fields = ("pk", *(column.field for column in columns))
+    for start in range(0, len(pks), EXPORT_CHUNK_SIZE):
+        end = start + EXPORT_CHUNK_SIZE
+        chunk = pks[start:end]
+        rows = {row[0]: row[1:] for row in queryset.order_by().filter(pk__in=chunk).values_list(*fields)}
+        # Строки, удаленные во время выгрузки, пропускаются
+        yield from (rows[pk] for pk in chunk if pk in rows)
+
+
+def get_export_table(project: Project, table: str) -> ExportTableData:
+    """Строки выгрузки событий (в порядке иерархических номеров) или связей проекта"""
+
+    if table == ExportTable.events.value:
+        queryset = ChartEvent.objects.filter(project=project)
+        rows = _iter_values(queryset, EVENT_EXPORT_COLUMNS, "hierarchical_number")
+        return ExportTableData("События", EVENT_EXPORT_COLUMNS, rows)
+
+    queryset = ChartEventLink.objects.filter(predecessor__project=project)
+    rows = _iter_values(
+        queryset, LINK_EXPORT_COLUMNS, "predecessor__hierarchical_number", "follower__hierarchical_number"
+    )
+    return ExportTableData("Связи", LINK_EXPORT_COLUMNS, rows)
+
+
+def _escape_formula(value: Any) -> Any:
+    """Текст, который Excel принял бы за формулу, выгружается с апострофом (защита от CSV/формульных инъекций)"""
+
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+class _Echo:
+    """Приемник `csv.writer`, возвращающий записанную строку"""
+
+    __slots__ = ()
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv(table: ExportTableData) -> Iterator[str]:
+    """
+    Потоковая выгрузка таблицы в CSV
+
+    Разделитель - точка с запятой, в начале BOM: так файл открывается в Excel с русской локалью без мастера импорта
+    """
+
+    writer = csv.writer(_Echo(), delimiter=";")
+    yield "\ufeff" + writer.writerow(column.header for column in table.columns)
+
+    chunk = []
+    for row in table.rows:
+        chunk.append(writer.writerow("" if value is None else _escape_formula(value) for value in row))
+        if len(chunk) == CSV_CHUNK_ROWS:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+class _ZipSink:
+    """
+    Неперематываемый приемник архива: `zipfile` пишет локальные заголовки с дескрипторами данных,
+    записанные байты забираются генератором выгрузки
+    """
+
+    __slots__ = ("_chunks",)
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml"'
+    ' ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml"'
+    ' ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml"'
+    ' ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    "</Types>"
+)
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"'
+    ' Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"'
+    ' Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"'
+    ' Target="styles.xml"/>'
+    "</Relationships>"
+)
+# Стили ячеек: 0 - обычная, 1 - дата (встроенный формат 14), 2 - заголовок (полужирный)
+XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    "</styleSheet>"
+)
+XLSX_STYLE_DATE = 1
+XLSX_STYLE_HEADER = 2
+# Управляющие символы, недопустимые в XML
+XML_ILLEGAL_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _xlsx_cell(value: Any, style: int = 0) -> str:
+    if value is None:
+        return "<c/>"
+    if isinstance(value, date):
+        return f'<c s="{XLSX_STYLE_DATE}"><v>{value.toordinal() - XLSX_EPOCH}</v></c>'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"<c><v>{value}</v></c>"
+    style_attr = f' s="{style}"' if style else ""
+    text = escape(XML_ILLEGAL_CHARS.sub("", str(_escape_formula(value))))
+    return f'<c t="inlineStr"{style_attr}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_workbook(title: str) -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+        ' xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(title[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    )
+
+
+def _iter_sheet_xml(table: ExportTableData) -> Iterator[str]:
+    yield (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" state="frozen"/>'
+        "</sheetView></sheetViews><sheetData>"
+    )
+    yield "<row>" + "".join(_xlsx_cell(column.header, XLSX_STYLE_HEADER) for column in table.columns) + "</row>"
+
+    chunk = []
+    for row in table.rows:
+        chunk.append("<row>" + "".join(_xlsx_cell(value) for value in row) + "</row>")
+        if len(chunk) == XLSX_CHUNK_ROWS:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+    yield "</sheetData></worksheet>"
+
+
+def iter_xlsx(table: ExportTableData) -> Iterator[bytes]:
+    """
+    Потоковая выгрузка таблицы в XLSX без сторонних библиотек
+
+    Лист пишется построчно (строки - inline strings, без таблицы общих строк) прямо в ZIP-поток,
+    сжатые байты отдаются по мере записи: память не зависит от количества строк
+    """
+
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in (
+            ("[Content_Types].xml", XLSX_CONTENT_TYPES),
+            ("_rels/.rels", XLSX_ROOT_RELS),
+            ("xl/workbook.xml", _xlsx_workbook(table.title)),
+            ("xl/_rels/workbook.xml.rels", XLSX_WORKBOOK_RELS),
+            ("xl/styles.xml", XLSX_STYLES),
+        ):
+            archive.writestr(name, content)
+        yield sink.drain()
+
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            for part in _iter_sheet_xml(table):
+                sheet.write(part.encode())
+                data = sink.drain()
+                if data:
+                    yield data
+
+    yield sink.drain()
@@ -0,0 +1,108 @@
+from hashlib import sha256
+from io import BytesIO
+from typing import Any, Iterable
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from gantt_chart.models import Project
+
+# Ширины вариантов изображения (px) при соотношении сторон 4:1, варианты пересоздаются при смене версии
+IMAGE_WIDTHS = (480, 960, 1920)
+IMAGE_ASPECT_RATIO = 4
+IMAGE_FORMATS = {"webp": ("WEBP", {"quality": 82, "method": 6}), "jpeg": ("JPEG", {"quality": 85, "optimize": True})}
+IMAGE_VARIANTS_VERSION = 1
+IMAGE_VARIANTS_DIR = "projects/variants"
+
+
+def get_variant_prefix(project_id: int) -> str:
+    return f"{IMAGE_VARIANTS_DIR}/{project_id}-"
+
+
+def get_variant_names(image_variants: dict[str, Any], project_id: int) -> set[str]:
+    """
+    Файлы вариантов изображения, принадлежащие проекту
+
+    Варианты без идентификатора проекта в имени (построенные до его добавления) могли быть общими
+    для нескольких проектов, поэтому они не удаляются
+    """
+
+    prefix = get_variant_prefix(project_id)
+    return {
+        name
+        for image_format in IMAGE_FORMATS
+        for name in image_variants.get(image_format, {}).values()
+        if name.startswith(prefix)
+    }
+
+
+def build_image_variants(project_id: int, name: str, rebuild: bool = False) -> dict[str, Any]:
+    """
+    Построение вариантов изображения: обрезка до 4:1, несколько ширин, WebP и JPEG
+
+    Имена файлов - идентификатор проекта и хеш содержимого исходника, поэтому файл варианта никогда не меняется
+    по одному адресу (подходит для бессрочного кэширования), повторная загрузка того же файла не создает новых файлов,
+    а файлы разных проектов не пересекаются и удаляются вместе со своим проектом.
+    При `rebuild` существующие файлы вариантов пересоздаются
+    """
+
+    with default_storage.open(name, "rb") as file:
+        content = file.read()
+    version = f"v{IMAGE_VARIANTS_VERSION}".encode()
+    digest = sha256(content + version).hexdigest()[:20]
+
+    variants: dict[str, Any] = {"source": name}
+    with Image.open(BytesIO(content)) as source:
+        source = ImageOps.exif_transpose(source).convert("RGB")
+        for width in IMAGE_WIDTHS:
+            size = (min(width, source.width), min(width, source.width) // IMAGE_ASPECT_RATIO)
+            resized = None
+            for image_format, (pil_format, options) in IMAGE_FORMATS.items():
+                variant_name = f"{get_variant_prefix(project_id)}{digest}-{width}.{image_format}"
+                if rebuild:
+                    delete_files((variant_name,))
+                if not default_storage.exists(variant_name):
+                    resized = resized or ImageOps.fit(source, size, Image.LANCZOS)
+                    buffer = BytesIO()
+                    resized.save(buffer, format=pil_format, **options)
+                    variant_name = default_storage.save(variant_name, ContentFile(buffer.getvalue()))
+                variants.setdefault(image_format, {})[str(width)] = variant_name
+
+    return variants
+
+
+def delete_files(names: Iterable[str]):
+    for name in names:
+        if name and default_storage.exists(name):
+            default_storage.delete(name)
+
+
+def process_project_image(project_id: int, rebuild: bool = False):
+    """
+    Обработка загруженного изображения проекта (фоновая задача `project_image`)
+
+    Результат сохраняется `QuerySet.update` (без сигналов `Project`) только если за время обработки
+    изображение не заменили. Файлы прежней загрузки удаляются здесь же, а не в сигналах сохранения проекта.
+    При `rebuild` файлы вариантов пересоздаются, даже если они уже есть
+    """
+
+    row = Project.objects.filter(pk=project_id).values_list("image", "image_variants").first()
+    if row is None:
+        return
+    name, old_variants = row
+    name = name or ""
+
+    new_variants = build_image_variants(project_id, name, rebuild) if name else {}
+    if not Project.objects.filter(pk=project_id, image=name).update(image_variants=new_variants):
+        # Изображение заменено - варианты для него построит следующая задача.
+        # Файлы, на которые уже ссылается проект, не удаляются
+        current_variants = Project.objects.filter(pk=project_id).values_list("image_variants", flat=True).first()
+        used_files = get_variant_names(old_variants, project_id) | get_variant_names(current_variants or {}, project_id)
+        delete_files(get_variant_names(new_variants, project_id) - used_files)
+        return
+
+    old_files = get_variant_names(old_variants, project_id) - get_variant_names(new_variants, project_id)
+    if old_variants.get("source") and old_variants["source"] != name:
+        old_files.add(old_variants["source"])
+    delete_files(old_files)
@@ -0,0 +1,437 @@
+import csv
+import io
+from datetime import date, datetime
+from itertools import chain, groupby, islice
+from typing import IO, Callable, Iterable, Iterator, NamedTuple, Optional
+from xml.etree.ElementTree import ParseError, iterparse
+
+from django.db import transaction
+from django.utils.timezone import now
+
+from gantt_chart.constants import ImportFormat
+from gantt_chart.models import ChartEvent, ChartEventLink, Project, ProjectParticipant
+from gantt_chart.utils import get_or_create_root_event
+
+from .calendar import CalendarDays, get_project_calendar
+from .event import set_event_actual_dates
+from .exceptions import ScheduleImportException
+from .export import EVENT_EXPORT_COLUMNS
+from .project import bump_project_version
+from .rollup import update_ancestors_completion, update_ancestors_dates
+from .summary import SUMMARY_UPDATE_FIELDS, EventDates, get_event_dates, merge_dates, set_summary_dates
+
+IMPORT_BATCH_SIZE = 2000
+IMPORT_MAX_ERRORS = 50
+MSPDI_NAMESPACE = "{http://schemas.microsoft.com/project}"
+CSV_PREDECESSORS_HEADER = "Предшественники"
+CSV_DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y")
+NAME_MAX_LENGTH = ChartEvent._meta.get_field("name").max_length
+IMPORT_ROLLUP_FIELDS = (*SUMMARY_UPDATE_FIELDS, "percentage_completion")
+
+
+class ImportTask(NamedTuple):
+    """Задача импортируемого графика"""
+
+    # Идентификатор задачи в файле (для ссылок предшественников) и место в файле для сообщений об ошибках
+    uid: str
+    source: str
+    level: int
+    name: str
+    planned_start: Optional[date]
+    planned_end: Optional[date] = None
+    planned_duration: Optional[int] = None
+    actual_start: Optional[date] = None
+    actual_end: Optional[date] = None
+    percentage_completion: int = 0
+    responsible: str = ""
+    predecessors: tuple[str, ...] = ()
+    # Идентификатор родительской задачи, если он задан в файле явно (иначе родитель - по уровню)
+    parent_uid: Optional[str] = None
+
+
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    value = (value or "").strip()
+    if not value:
+        return None
+    for date_format in CSV_DATE_FORMATS:
+        try:
+            return datetime.strptime(value[:10], date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f"неизвестный формат даты: {value}")
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    value = (value or "").strip()
+    return int(float(value.replace(",", "."))) if value else None
+
+
+def _text(element, tag: str) -> Optional[str]:
+    return element.findtext(f"{MSPDI_NAMESPACE}{tag}")
+
+
+def _parse_mspdi_task(element) -> Optional[ImportTask]:
+    """Задача из элемента `Task` (None - сводная задача проекта уровня 0 или пустая задача)"""
+
+    uid = _text(element, "UID") or ""
+    level = _parse_int(_text(element, "OutlineLevel")) or 0
+    if level == 0 or _text(element, "IsNull") == "1":
+        return None
+
+    return ImportTask(
+        uid=uid,
+        source=f"задача UID {uid}",
+        level=level,
+        name=_text(element, "Name") or "",
+        planned_start=_parse_date(_text(element, "Start")),
+        planned_end=_parse_date(_text(element, "Finish")),
+        actual_start=_parse_date(_text(element, "ActualStart")),
+        actual_end=_parse_date(_text(element, "ActualFinish")),
+        percentage_completion=_parse_int(_text(element, "PercentComplete")) or 0,
+        predecessors=tuple(
+            link.findtext(f"{MSPDI_NAMESPACE}PredecessorUID") or ""
+            for link in element.iterfind(f"{MSPDI_NAMESPACE}PredecessorLink")
+        ),
+    )
+
+
+def iter_mspdi_tasks(file: IO[bytes]) -> Iterator[ImportTask]:
+    """
+    Задачи файла MS Project XML (MSPDI)
+
+    Файл читается потоково (`iterparse`): каждая запись раздела (задача, ресурс, назначение, календарь)
+    и каждый раздел удаляются из дерева сразу после разбора, память не зависит от размера файла.
+    Сводная задача проекта (уровень 0) и пустые задачи пропускаются
+    """
+
+    task_tag, tasks_tag = f"{MSPDI_NAMESPACE}Task", f"{MSPDI_NAMESPACE}Tasks"
+    # Открытые элементы: корень (Project), раздел (Tasks, Resources, ...), запись раздела
+    path = []
+
+    try:
+        for event, element in iterparse(file, events=("start", "end")):
+            if event == "start":
+                path.append(element)
+                continue
+
+            path.pop()
+            if len(path) == 2 and element.tag == task_tag and path[1].tag == tasks_tag:
+                task = _parse_mspdi_task(element)
+                if task is not None:
+                    yield task
+            if 1 <= len(path) <= 2:
+                path[-1].remove(element)
+    except ParseError as error:
+        raise ScheduleImportException([f"Некорректный XML: {error}"])
+    except ValueError as error:
+        raise ScheduleImportException([f"Некорректное значение: {error}"])
+
+
+def _iter_csv_rows(rows: Iterable[list[str]], fields: list[str]) -> Iterator[ImportTask]:
+    for line_number, values in enumerate(rows, start=2):
+        if not any(values):
+            continue
+        row = dict(zip(fields, values))
+        number = row["hierarchical_number"].strip()
+        source = f"строка {line_number}"
+        try:
+            yield ImportTask(
+                uid=number,
+                source=source,
+                level=number.count(".") + 1 if number else 0,
+                name=row["name"],
+                planned_start=_parse_date(row["planned_start"]),
+                planned_end=_parse_date(row.get("planned_end")),
+                planned_duration=_parse_int(row.get("planned_duration")),
+                actual_start=_parse_date(row.get("actual_start")),
+                actual_end=_parse_date(row.get("actual_end")),
+                percentage_completion=_parse_int(row.get("percentage_completion")) or 0,
+                responsible=(row.get("responsible__username") or "").strip(),
+                predecessors=tuple(uid.strip() for uid in (row.get("predecessors") or "").split(",") if uid.strip()),
+            )
+        except ValueError as error:
+            raise ScheduleImportException([f"{source}: некорректное значение: {error}"])
+
+
+def iter_csv_tasks(file: IO[bytes]) -> Iterator[ImportTask]:
+    """
+    Задачи CSV-файла в формате выгрузки событий (`service.export`)
+
+    Файл читается построчно в порядке строк. Идентификатор задачи - номер иерархии, уровень вложенности -
+    количество частей номера, родитель - номер без последней части: родитель должен идти в файле раньше
+    своих потомков (как в выгрузке), иначе импорт сообщит об ошибке строки. Корневое событие выгрузки
+    (первая строка с номером без точки, если следующая строка - ее дочерняя задача) пропускается,
+    его дочерние события становятся задачами первого уровня. Предшественники - колонка "Предшественники"
+    (номера иерархии через запятую). Разделитель (`;` или `,`) определяется по заголовку
+    """
+
+    text_file = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    header_line = text_file.readline()
+    delimiter = ";" if header_line.count(";") >= header_line.count(",") else ","
+    header = next(csv.reader([header_line], delimiter=delimiter), [])
+    columns = {column.header: column.field for column in EVENT_EXPORT_COLUMNS}
+    columns[CSV_PREDECESSORS_HEADER] = "predecessors"
+    fields = [columns.get(name.strip(), "") for name in header]
+
+    missing = {"hierarchical_number", "name", "planned_start"} - set(fields)
+    if missing:
+        names = [column.header for column in EVENT_EXPORT_COLUMNS if column.field in missing]
+        raise ScheduleImportException([f"В файле нет обязательных колонок: {', '.join(names)}"])
+
+    tasks = _iter_csv_rows(csv.reader(text_file, delimiter=delimiter), fields)
+    head = list(islice(tasks, 2))
+    root = None
+    if len(head) == 2 and head[0].level == 1 and head[1].uid.startswith(f"{head[0].uid}."):
+        root = head.pop(0).uid
+
+    offset = 1 if root is not None else 0
+    for task in chain(head, tasks):
+        if root is not None and not task.uid.startswith(f"{root}."):
+            raise ScheduleImportException([f"{task.source}: задача {task.uid} вне корневого события выгрузки {root}"])
+        level = task.level - offset
+        yield task._replace(level=level, parent_uid=task.uid.rpartition(".")[0] if level > 1 else None)
+
+
+TASK_PARSERS = {ImportFormat.xml.value: iter_mspdi_tasks, ImportFormat.csv.value: iter_csv_tasks}
+
+
+def get_import_format(filename: str) -> Optional[str]:
+    extension = filename.rpartition(".")[2].lower()
+    return extension if extension in TASK_PARSERS else None
+
+
+class _ImportLevel:
+    """
+    Открытое событие стека уровней: идентификатор задачи в файле, номер последнего дочернего события
+    и сводка по закрытым дочерним
+    """
+
+    __slots__ = ("event", "uid", "last_number", "children_dates", "children_completion")
+
+    def __init__(self, event: ChartEvent, uid: Optional[str] = None, last_number: int = 0):
+        self.event = event
+        self.uid = uid
+        self.last_number = last_number
+        self.children_dates: Optional[EventDates] = None
+        self.children_completion = 0
+
+
+class ScheduleImportService:
+    """
+    Импорт графика в проект: задачи становятся дочерними событиями корневого события проекта
+
+    Задачи читаются потоком в порядке структуры (родитель перед потомками), иерархические номера и родители
+    вычисляются по стеку уровней. Когда задача уходит со стека, ее поддерево прочитано целиком: сводные даты
+    и процент выполнения контейнера считаются в памяти, без отдельного пересчета по проекту после вставки.
+    События копятся порциями по `IMPORT_BATCH_SIZE` и создаются `bulk_create` уровнями глубины внутри порции:
+    к моменту вставки уровня идентификаторы родителей уже известны. Проверка идет в том же проходе, ошибки
+    собираются и откатывают импорт целиком. Связи создаются после событий, затем одна смена версии проекта
+    """
+
+    __slots__ = (
+        "_project",
+        "_calendar",
+        "_current_date",
+        "_stack",
+        "_pending",
+        "_rolled_up",
+        "_uid_map",
+        "_links",
+        "_users",
+        "_errors",
+        "_events",
+    )
+
+    def __init__(self, project: Project):
+        self._project = project
+        self._calendar: CalendarDays = get_project_calendar(project)
+        self._current_date = now().date()
+        self._stack: list[_ImportLevel] = []
+        self._pending: list[ChartEvent] = []
+        # Контейнеры, созданные до того, как было прочитано их поддерево
+        self._rolled_up: list[ChartEvent] = []
+        self._uid_map: dict[str, Optional[int]] = {}
+        self._links: list[tuple[str, str, str]] = []
+        self._users: dict[str, Optional[int]] = {}
+        self._errors: list[str] = []
+        self._events = 0
+
+    def import_tasks(
+        self, tasks: Iterable[ImportTask], progress: Optional[Callable[..., None]] = None
+    ) -> dict[str, int]:
+        """Импорт задач, вернет количество созданных событий и связей"""
+
+        with transaction.atomic():
+            root = get_or_create_root_event(self._project)
+            children_numbers = root.get_children().values_list("hierarchical_number", flat=True)
+            last_number = max((int(number.rpartition(".")[2]) for number in children_numbers), default=0)
+            self._stack = [_ImportLevel(root, last_number=last_number)]
+
+            for task in tasks:
+                self._add_task(task)
+                if len(self._pending) >= IMPORT_BATCH_SIZE:
+                    self._flush()
+                    if progress is not None:
+                        progress(0, f"Создано событий: {self._events}")
+            self._close_levels(1)
+            self._flush()
+
+            links = self._create_links()
+            if self._errors:
+                raise ScheduleImportException(self._errors)
+
+            if self._events:
+                ChartEvent.objects.bulk_update(self._rolled_up, IMPORT_ROLLUP_FIELDS)
+                # Корневое событие - по всем прямым дочерним, включая существовавшие до импорта
+                if self._project.update_percentage_completion:
+                    update_ancestors_completion(self._project.pk, [root.pk])
+                if self._project.update_parent_dates:
+                    update_ancestors_dates(self._project.pk, [root.pk])
+                bump_project_version(self._project.pk)
+
+        return {"events": self._events, "links": links}
+
+    def _error(self, message: str):
+        if len(self._errors) < IMPORT_MAX_ERRORS:
+            self._errors.append(message)
+
+    def _add_task(self, task: ImportTask):
+        # Уровень задачи может быть больше уровня предыдущей не более чем на 1
+        if not 1 <= task.level <= len(self._stack):
+            self._error(f"{task.source}: уровень {task.level} нарушает структуру графика")
+            return
+        if not task.name.strip():
+            self._error(f"{task.source}: не задано название")
+            return
+        if task.planned_start is None:
+            self._error(f"{task.source}: не задана планируемая дата начала")
+            return
+        if task.uid in self._uid_map:
+            self._error(f"{task.source}: идентификатор {task.uid} повторяется")
+            return
+        if not 0 <= task.percentage_completion <= 100:
+            self._error(f"{task.source}: процент выполнения должен быть от 0 до 100")
+            return
+
+        self._close_levels(task.level)
+        parent_level = self._stack[-1]
+        if task.parent_uid is not None and parent_level.uid != task.parent_uid:
+            self._error(f"{task.source}: родительская задача {task.parent_uid} не найдена выше в файле")
+            return
+        parent_level.last_number += 1
+        parent: ChartEvent = parent_level.event
+
+        event = ChartEvent(
+            project_id=self._project.pk,
+            hierarchical_number=f"{parent.hierarchical_number}.{parent_level.last_number}",
+            name=task.name.strip()[:NAME_MAX_LENGTH],
+            planned_start=task.planned_start,
+            planned_duration=self._get_planned_duration(task),
+            percentage_completion=task.percentage_completion,
+            actual_start=task.actual_start,
+            actual_end=task.actual_end if task.percentage_completion == 100 else None,
+            responsible_id=self._get_responsible_id(task),
+        )
+        # Родитель из текущей порции еще не создан - идентификатор проставится при вставке
+        event._import_parent = parent
+        event._import_uid = task.uid
+        event.planned_end = self._calendar.add_working_days(event.planned_start, event.planned_duration)
+        if event.actual_start is None or event.percentage_completion == 0:
+            set_event_actual_dates(event, self._calendar)
+        else:
+            event.actual_duration = self._calendar.count_working_days(
+                event.actual_start, event.actual_end or self._current_date
+            )
+
+        self._stack.append(_ImportLevel(event, task.uid))
+        self._pending.append(event)
+        self._uid_map[task.uid] = None
+        self._links.extend((predecessor, task.uid, task.source) for predecessor in task.predecessors)
+
+    def _close_levels(self, depth: int):
+        """
+        Закрытие событий стека глубже `depth`: их поддеревья прочитаны
+
+        Порядок как при изменении дочернего события: сначала процент выполнения (и фактические даты по нему),
+        затем сводные даты
+        """
+
+        while len(self._stack) > depth:
+            level = self._stack.pop()
+            event = level.event
+            if level.last_number:
+                if self._project.update_percentage_completion:
+                    event.percentage_completion = int(level.children_completion / level.last_number)
+                    set_event_actual_dates(event, self._calendar)
+                if self._project.update_parent_dates:
+                    set_summary_dates(event, level.children_dates, self._calendar)
+                if event.pk is not None:
+                    self._rolled_up.append(event)
+
+            parent_level = self._stack[-1]
+            parent_level.children_completion += event.percentage_completion
+            if self._project.update_parent_dates:
+                parent_level.children_dates = merge_dates(parent_level.children_dates, get_event_dates(event))
+
+    def _get_planned_duration(self, task: ImportTask) -> int:
+        if task.planned_duration is not None:
+            return max(task.planned_duration, 1)
+        if task.planned_end is not None and task.planned_end >= task.planned_start:
+            return max(self._calendar.count_working_days(task.planned_start, task.planned_end), 1)
+        return 1
+
+    def _get_responsible_id(self, task: ImportTask) -> Optional[int]:
+        """Ответственный - только участник проекта (как в форме события)"""
+
+        if not task.responsible:
+            return None
+        if task.responsible not in self._users:
+            participants = ProjectParticipant.objects.filter(
+                project=self._project, participant__username=task.responsible
+            )
+            self._users[task.responsible] = participants.values_list("participant_id", flat=True).first()
+        if self._users[task.responsible] is None:
+            self._error(f"{task.source}: пользователь {task.responsible} не является участником проекта")
+        return self._users[task.responsible]
+
+    def _flush(self):
+        """Создание накопленной порции событий уровнями глубины"""
+
+        # При ошибках импорт будет отменен - порции дальше не пишутся, проверка продолжается
+        if not self._errors:
+            depth = lambda event: event.hierarchical_number.count(".")  # noqa: E731
+            for _, group in groupby(sorted(self._pending, key=depth), key=depth):
+                level = list(group)
+                for event in level:
+                    event.parent_id = event._import_parent.pk
+                ChartEvent.objects.bulk_create(level, batch_size=IMPORT_BATCH_SIZE)
+
+            # После вставки в памяти остаются только идентификаторы событий (и стек уровней)
+            self._uid_map.update((event._import_uid, event.pk) for event in self._pending)
+            self._events += len(self._pending)
+        self._pending.clear()
+
+    def _create_links(self) -> int:
+        links = set()
+        for predecessor_uid, follower_uid, source in self._links:
+            if predecessor_uid not in self._uid_map:
+                self._error(f"{source}: предшественник {predecessor_uid} не найден")
+            elif predecessor_uid != follower_uid:
+                links.add((self._uid_map[predecessor_uid], self._uid_map[follower_uid]))
+
+        if self._errors:
+            return 0
+
+        ChartEventLink.objects.bulk_create(
+            [ChartEventLink(predecessor_id=predecessor, follower_id=follower) for predecessor, follower in links],
+            batch_size=IMPORT_BATCH_SIZE,
+        )
+        return len(links)
+
+
+def import_schedule(
+    project: Project, file: IO[bytes], import_format: str, progress: Optional[Callable[..., None]] = None
+) -> dict[str, int]:
+    """Импорт файла графика (MS Project XML или CSV) в проект"""
+
+    return ScheduleImportService(project).import_tasks(TASK_PARSERS[import_format](file), progress)
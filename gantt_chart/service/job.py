@@ -0,0 +1,384 @@
+import traceback
+from datetime import timedelta
+from time import monotonic
+from typing import Any, Callable, Iterable, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connection, connections, transaction
+from django.db.models import Exists, F, OuterRef, Q, QuerySet
+from django.db.models.sql import UpdateQuery
+from django.db.models.sql.constants import NO_RESULTS
+from django.utils.timezone import now
+from loguru import logger
+
+from gantt_chart.models import BackgroundJob, BackgroundJobStatus, Project, ProjectParticipantRole
+
+from .calendar import recalculate_project_dates
+from .clone import CloneService
+from .exceptions import BackgroundJobException, ScheduleImportException
+from .image import delete_files, get_variant_names, process_project_image
+from .importer import import_schedule
+from .participant import ParticipantService
+from .project import ProjectService
+from .summary import recalculate_summary_dates
+
+User = get_user_model()
+
+JobHandler = Callable[[BackgroundJob, "JobProgress"], Optional[dict[str, Any]]]
+JobCleanup = Callable[[BackgroundJob], None]
+
+JOB_HANDLERS: dict[str, JobHandler] = {}
+JOB_TITLES: dict[str, str] = {}
+JOB_CLEANUPS: dict[str, JobCleanup] = {}
+
+# Ошибки, при которых повторная попытка даст тот же результат
+JOB_PERMANENT_ERRORS = (BackgroundJobException, ObjectDoesNotExist, IntegrityError)
+JOB_CLAIM_CANDIDATES = 10
+JOB_PROGRESS_INTERVAL = 1.0
+
+
+def register_job(kind: str, title: str) -> Callable[[JobHandler], JobHandler]:
+    """Регистрация обработчика фоновой задачи"""
+
+    def decorator(handler: JobHandler) -> JobHandler:
+        JOB_HANDLERS[kind] = handler
+        JOB_TITLES[kind] = title
+        return handler
+
+    return decorator
+
+
+def register_job_cleanup(kind: str) -> Callable[[JobCleanup], JobCleanup]:
+    """
+    Регистрация очистки после задачи (например, удаление загруженного файла)
+
+    Очистка вызывается один раз, когда задача завершилась успешно или с ошибкой без повторных попыток,
+    в том числе когда задачу аварийно завершившегося обработчика снимают с очереди
+    """
+
+    def decorator(cleanup: JobCleanup) -> JobCleanup:
+        JOB_CLEANUPS[kind] = cleanup
+        return cleanup
+
+    return decorator
+
+
+def _cleanup_job(job: BackgroundJob):
+    cleanup = JOB_CLEANUPS.get(job.kind)
+    if cleanup is None:
+        return
+    try:
+        cleanup(job)
+    except Exception:
+        logger.exception(f"JOB {job} cleanup failed")
+
+
+class JobProgress:
+    """
+    Отчет о ходе выполнения задачи
+
+    Запись в БД не чаще раза в `JOB_PROGRESS_INTERVAL` секунд. Внутри транзакции сервиса прогресс пишется
+    через отдельное соединение (в автокоммите), иначе он стал бы виден только после завершения задачи.
+    В SQLite записи последовательны, поэтому внутри транзакции прогресс не пишется
+    """
+
+    __slots__ = ("_job_id", "_written_at", "_connection")
+
+    def __init__(self, job_id: int):
+        self._job_id = job_id
+        self._written_at = 0.0
+        self._connection = None
+
+    def __call__(self, progress: int, message: str = "", force: bool = False):
+        if not force and monotonic() - self._written_at < JOB_PROGRESS_INTERVAL:
+            return
+
+        self._written_at = monotonic()
+        queryset = BackgroundJob.objects.filter(pk=self._job_id, status=BackgroundJobStatus.running)
+        values = {"progress": min(max(int(progress), 0), 100), "message": message[:512], "heartbeat_at": now()}
+        if not connection.in_atomic_block:
+            queryset.update(**values)
+        elif connection.vendor != "sqlite":
+            if self._connection is None:
+                self._connection = connections.create_connection(DEFAULT_DB_ALIAS)
+            query = queryset.query.chain(UpdateQuery)
+            query.add_update_values(values)
+            query.get_compiler(connection=self._connection).execute_sql(NO_RESULTS)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def enqueue_job(
+    kind: str,
+    project: Optional[Project] = None,
+    params: Optional[dict[str, Any]] = None,
+    user: Optional[User] = None,
+    max_attempts: Optional[int] = None,
+    lock_key: Optional[int] = None,
+) -> BackgroundJob:
+    """
+    Постановка задачи в очередь, задачи одного проекта выполняются по порядку постановки
+
+    `lock_key` - ключ очереди задачи без проекта (например, идентификатор уже удаленного проекта)
+    """
+
+    if kind not in JOB_HANDLERS:
+        raise BackgroundJobException(f"Неизвестный тип фоновой задачи: {kind}")
+
+    return BackgroundJob.objects.create(
+        kind=kind,
+        project=project,
+        lock_key=project.pk if project is not None else lock_key,
+        params=params or {},
+        created_by=user if user is not None and user.is_authenticated else None,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def get_claimable_jobs() -> QuerySet[BackgroundJob]:
+    """
+    Задачи, готовые к выполнению
+
+    Задача ждет, пока по ее ключу выполняется другая задача или в очереди есть более ранняя
+    """
+
+    same_key = BackgroundJob.objects.filter(lock_key=OuterRef("lock_key"))
+    blocked = Exists(same_key.filter(status=BackgroundJobStatus.running)) | Exists(
+        same_key.filter(status=BackgroundJobStatus.queued, pk__lt=OuterRef("pk"))
+    )
+    return BackgroundJob.objects.filter(status=BackgroundJobStatus.queued, run_after__lte=now()).filter(
+        Q(lock_key__isnull=True) | ~blocked
+    )
+
+
+def claim_job() -> Optional[BackgroundJob]:
+    """
+    Захват следующей задачи обработчиком
+
+    Перевод в статус "Выполняется" - один UPDATE с повторной проверкой условия очереди, перед ним
+    активные задачи ключа блокируются (`SELECT ... FOR UPDATE`), поэтому два обработчика не захватят
+    задачи одного проекта одновременно. В SQLite записи и так последовательны, блокировка не нужна
+    """
+
+    candidates = get_claimable_jobs().order_by("pk").values_list("pk", "lock_key")[:JOB_CLAIM_CANDIDATES]
+    for job_id, lock_key in candidates:
+        with transaction.atomic():
+            if lock_key is not None and connection.features.has_select_for_update:
+                list(
+                    BackgroundJob.objects.select_for_update()
+                    .filter(lock_key=lock_key, status__in=(BackgroundJobStatus.queued, BackgroundJobStatus.running))
+                    .values_list("pk")
+                )
+            current_time = now()
+            claimed = (
+                get_claimable_jobs()
+                .filter(pk=job_id)
+                .update(
+                    status=BackgroundJobStatus.running,
+                    attempts=F("attempts") + 1,
+                    started_at=current_time,
+                    heartbeat_at=current_time,
+                    progress=0,
+                    message="",
+                )
+            )
+        if claimed:
+            return BackgroundJob.objects.get(pk=job_id)
+
+    return None
+
+
+def _finish_job(job: BackgroundJob, error: Optional[BaseException] = None, result: Optional[dict[str, Any]] = None):
+    fields = {"finished_at": now()}
+    if error is None:
+        fields.update(status=BackgroundJobStatus.succeeded, progress=100, result=result or {}, error="")
+    elif isinstance(error, JOB_PERMANENT_ERRORS) or job.attempts >= job.max_attempts:
+        fields.update(status=BackgroundJobStatus.failed, error=_format_error(error))
+    else:
+        # Повтор с экспоненциальной задержкой
+        delay = timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+        fields.update(
+            status=BackgroundJobStatus.queued, run_after=now() + delay, finished_at=None, error=_format_error(error)
+        )
+
+    updated = BackgroundJob.objects.filter(pk=job.pk, status=BackgroundJobStatus.running).update(**fields)
+    if updated and fields.get("status") != BackgroundJobStatus.queued:
+        _cleanup_job(job)
+
+
+def _format_error(error: BaseException) -> str:
+    return "".join(traceback.format_exception_only(type(error), error)).strip()
+
+
+def execute_job(job_id: int):
+    """Выполнение захваченной задачи (в процессе пула обработчиков)"""
+
+    job = BackgroundJob.objects.get(pk=job_id)
+    handler = JOB_HANDLERS.get(job.kind)
+    logger.debug(f"JOB {job} start, attempt {job.attempts}/{job.max_attempts}")
+
+    progress = JobProgress(job.pk)
+    try:
+        if handler is None:
+            raise BackgroundJobException(f"Неизвестный тип фоновой задачи: {job.kind}")
+        result = handler(job, progress)
+    except Exception as error:
+        logger.exception(f"JOB {job} failed")
+        _finish_job(job, error=error)
+    else:
+        logger.debug(f"JOB {job} done")
+        _finish_job(job, result=result)
+    finally:
+        progress.close()
+
+
+def renew_job_leases(job_ids: Iterable[int]):
+    """Продление аренды задач, выполняющихся в пуле (обработчик жив, даже если задача не сообщает прогресс)"""
+
+    BackgroundJob.objects.filter(pk__in=list(job_ids), status=BackgroundJobStatus.running).update(heartbeat_at=now())
+
+
+def _requeue_jobs(jobs: QuerySet[BackgroundJob], error: str) -> int:
+    """Возврат выполняющихся задач в очередь, задачи без оставшихся попыток завершаются с ошибкой"""
+
+    jobs = jobs.filter(status=BackgroundJobStatus.running)
+    with transaction.atomic():
+        exhausted = list(jobs.filter(attempts__gte=F("max_attempts")))
+        failed = jobs.filter(pk__in=[job.pk for job in exhausted]).update(
+            status=BackgroundJobStatus.failed, error=error, finished_at=now()
+        )
+        requeued = jobs.update(status=BackgroundJobStatus.queued, error=error, run_after=now())
+    for job in exhausted:
+        _cleanup_job(job)
+    return failed + requeued
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Возврат в очередь задач, обработчик которых перестал отвечать (например, процесс был остановлен)
+
+    Вернет количество таких задач
+    """
+
+    stale = BackgroundJob.objects.filter(heartbeat_at__lt=now() - timedelta(seconds=settings.JOB_LEASE_TIMEOUT))
+    return _requeue_jobs(stale, "Обработчик задачи перестал отвечать")
+
+
+def requeue_lost_jobs(job_ids: Iterable[int]) -> int:
+    """
+    Возврат в очередь задач аварийно завершившегося процесса обработчика, не дожидаясь истечения аренды
+
+    Вернет количество таких задач
+    """
+
+    return _requeue_jobs(BackgroundJob.objects.filter(pk__in=list(job_ids)), "Процесс обработчика аварийно завершился")
+
+
+def get_project_jobs(project: Project, limit: int = 10) -> QuerySet[BackgroundJob]:
+    """Последние задачи проекта для отображения на странице проекта"""
+
+    return BackgroundJob.objects.filter(project=project).order_by("-pk")[:limit]
+
+
+def schedule_project_image_processing(project: Project):
+    """
+    Постановка обработки изображения проекта в очередь фоновых задач
+
+    Задача создается в транзакции сохранения проекта и при ее откате не остается в очереди
+    """
+
+    if (project.image.name or "") == project.image_variants.get("source", ""):
+        return
+
+    enqueue_job("project_image", project)
+
+
+def schedule_project_image_deletion(project: Project):
+    """
+    Постановка удаления исходника и вариантов изображения удаленного проекта в очередь фоновых задач
+
+    Задача идет в очередь удаленного проекта - после его незавершенной обработки изображения
+    """
+
+    names = get_variant_names(project.image_variants, project.pk) | {
+        project.image.name,
+        project.image_variants.get("source"),
+    }
+    names -= {None, ""}
+    if names:
+        enqueue_job("project_image_delete", params={"names": sorted(names)}, lock_key=project.pk)
+
+
+@register_job("project_clone", "Создание проекта по шаблону")
+def clone_project_job(job: BackgroundJob, progress: JobProgress) -> dict[str, Any]:
+    source = Project.objects.get(pk=job.lock_key)
+    progress(0, "Копирование событий", force=True)
+    with transaction.atomic():
+        project = CloneService(job.params["days_offset"]).clone_project(source, job.params["name"], progress)
+        if job.created_by_id is not None:
+            ParticipantService(project).set_roles({job.created_by_id: ProjectParticipantRole.supervisor})
+
+    return {"project_id": project.pk, "project_name": project.name}
+
+
+@register_job("project_delete", "Удаление проекта")
+def delete_project_job(job: BackgroundJob, progress: JobProgress) -> dict[str, Any]:
+    project = Project.objects.filter(pk=job.lock_key).first()
+    if project is None:
+        return {"deleted": False}
+
+    progress(0, "Удаление событий", force=True)
+    ProjectService(project).delete(progress)
+    return {"deleted": True}
+
+
+@register_job("project_recalculate_dates", "Пересчет дат по календарю")
+def recalculate_dates_job(job: BackgroundJob, progress: JobProgress) -> dict[str, Any]:
+    progress(0, "Пересчет дат событий", force=True)
+    return {"updated": recalculate_project_dates(job.lock_key, progress)}
+
+
+@register_job("project_recalculate_summary_dates", "Пересчет дат родительских событий")
+def recalculate_summary_dates_job(job: BackgroundJob, progress: JobProgress) -> dict[str, Any]:
+    progress(0, "Пересчет дат родительских событий", force=True)
+    return {"updated": recalculate_summary_dates(job.lock_key, progress)}
+
+
+@register_job("project_import", "Импорт графика")
+def import_schedule_job(job: BackgroundJob, progress: JobProgress) -> dict[str, Any]:
+    project = Project.objects.get(pk=job.lock_key)
+    path = job.params["path"]
+    size = default_storage.size(path) or 1
+    try:
+        with default_storage.open(path, "rb") as file:
+            # Прогресс - доля прочитанного файла
+            return import_schedule(
+                project, file, job.params["format"], lambda _, message: progress(file.tell() * 99 // size, message)
+            )
+    except ScheduleImportException as error:
+        raise BackgroundJobException("\n".join(error.errors)) from error
+
+
+@register_job_cleanup("project_import")
+def delete_import_file(job: BackgroundJob):
+    # Файл нужен до последней попытки импорта
+    default_storage.delete(job.params["path"])
+
+
+@register_job("project_image", "Обработка изображения проекта")
+def process_project_image_job(job: BackgroundJob, progress: JobProgress) -> dict[str, Any]:
+    progress(0, "Построение вариантов изображения", force=True)
+    process_project_image(job.lock_key)
+    return {}
+
+
+@register_job("project_image_delete", "Удаление изображения проекта")
+def delete_project_image_job(job: BackgroundJob, progress: JobProgress) -> dict[str, Any]:
+    delete_files(job.params["names"])
+    return {"deleted": len(job.params["names"])}
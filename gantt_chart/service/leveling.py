@@ -0,0 +1,351 @@
+import heapq
+from array import array
+from datetime import date
+from typing import Any, Callable, Optional
+
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+
+from gantt_chart.models import ChartEvent, ChartEventLink, Project
+
+from .calendar import get_project_calendar
+from .exceptions import ResourceLevelingException
+from .project import bump_project_version
+from .summary import recalculate_summary_dates
+
+LEVELING_BATCH_SIZE = 2000
+# Наибольшее количество событий ответственного в день при выравнивании
+LEVELING_MAX_CAPACITY = 100
+
+# Поля событий, загружаемые для расчета
+_EVENT_FIELDS = (
+    "pk",
+    "parent_id",
+    "hierarchical_number",
+    "name",
+    "planned_start",
+    "planned_duration",
+    "planned_end",
+    "percentage_completion",
+    "responsible_id",
+    "responsible__username",
+    "has_children",
+)
+
+
+def _zeros(typecode: str, count: int) -> array:
+    return array(typecode, bytes(array(typecode).itemsize * count))
+
+
+def _to_csr(edges: list[tuple[int, int]], count: int) -> tuple[array, array]:
+    """Список ребер в сжатые массивы смежности: смещения узлов и концы ребер"""
+
+    offsets = _zeros("i", count + 1)
+    for source, _ in edges:
+        offsets[source + 1] += 1
+    for node in range(count):
+        offsets[node + 1] += offsets[node]
+    targets, position = _zeros("i", len(edges)), array("i", offsets[:-1])
+    for source, target in edges:
+        targets[position[source]] = target
+        position[source] += 1
+    return offsets, targets
+
+
+def _reserve(usage: array, start: int, duration: int):
+    if len(usage) < start + duration:
+        usage.extend(_zeros(usage.typecode, start + duration - len(usage)))
+    for day in range(start, start + duration):
+        usage[day] += 1
+
+
+def _find_slot(usage: array, start: int, duration: int, capacity: int) -> int:
+    """Первый день не раньше `start`, с которого у ответственного есть место `duration` рабочих дней подряд"""
+
+    while True:
+        for day in range(start, min(start + duration, len(usage))):
+            if usage[day] >= capacity:
+                start = day + 1
+                break
+        else:
+            return start
+
+
+class _ScheduleState:
+    """
+    Состояние списочного планирования: самые ранние допустимые дни узлов, количество неизвестных
+    ограничений, узлы, все ограничения которых известны, и очередь событий на размещение
+    """
+
+    __slots__ = ("offsets", "targets", "pending", "durations", "floor", "earliest", "starts", "ready", "queue")
+
+    def __init__(self, offsets: array, targets: array, pending: array, durations: array, floor: array):
+        self.offsets, self.targets, self.pending = offsets, targets, pending
+        self.durations, self.floor = durations, floor
+        self.earliest = _zeros("i", len(pending))
+        for position in range(len(durations)):
+            self.earliest[2 * position] = floor[position]
+        self.starts: dict[int, int] = {}
+        self.ready = [node for node in range(len(pending)) if not pending[node]]
+        self.queue: list[tuple[int, int, int]] = []
+
+    def _release(self, node: int):
+        self.pending[node] -= 1
+        if not self.pending[node]:
+            self.ready.append(node)
+
+    def _resolve(self, node: int, value: int):
+        self.earliest[node] = value
+        end = self.offsets[node + 1]
+        for target in self.targets[self.offsets[node] : end]:  # noqa: E203
+            # Окончание -> начало (связь): не раньше следующего рабочего дня
+            bound = value + 1 if node % 2 and not target % 2 else value
+            self.earliest[target] = max(self.earliest[target], bound)
+            self._release(target)
+
+    def _drain(self):
+        """Разрешение готовых узлов: начала событий без дочерних событий ставятся в очередь"""
+
+        while self.ready:
+            node = self.ready.pop()
+            position = node // 2
+            if not self.durations[position]:
+                self._resolve(node, self.earliest[node])
+            elif node % 2:
+                self._resolve(node, self.starts[position] + self.durations[position] - 1)
+            else:
+                heapq.heappush(self.queue, (self.earliest[node], self.floor[position], position))
+
+    def run(self, place: Callable[[int, int], int]):
+        """Планирование; `place(position, earliest)` вернет день начала события"""
+
+        while self.ready or self.queue:
+            self._drain()
+            if self.queue:
+                start, _, position = heapq.heappop(self.queue)
+                self.starts[position] = start = place(position, start)
+                self._resolve(2 * position, start)
+                self._release(2 * position + 1)
+
+
+class ResourceLevelingService:
+    """
+    Выравнивание загрузки ответственных: предложение более поздних дат начала событий, при которых
+    у ответственного не больше `capacity` событий в рабочий день
+
+    События только сдвигаются вперед, связи (следующий рабочий день после окончания предшественника)
+    и вложенность соблюдаются: связь с контейнером действует на все его дочерние события.
+    Начатые события (процент выполнения больше 0) не сдвигаются и занимают ответственного на своих датах.
+
+    Списочное планирование: граф - сжатые массивы смежности (у каждого события узлы начала и окончания,
+    у контейнера это границы его дочерних событий), события, все ограничения которых известны, - в очереди
+    с приоритетом по самому раннему допустимому дню, затем по исходному дню начала и порядку в графике.
+    Дни - номера рабочих дней календаря проекта
+    """
+
+    __slots__ = ("_project", "_capacity", "_calendar", "_origin")
+
+    def __init__(self, project: Project, capacity: int = 1):
+        self._project = project
+        self._capacity = capacity
+        self._calendar = get_project_calendar(project)
+        self._origin: Optional[date] = None
+
+    def _to_index(self, day: date) -> int:
+        """Номер первого рабочего дня не раньше `day`"""
+
+        return self._calendar.count_working_days(self._origin, day) - int(self._calendar.is_working_day(day))
+
+    def _to_date(self, index: int) -> date:
+        return self._calendar.add_working_days(self._origin, index + 1)
+
+    def _load(self) -> tuple[list[tuple], list[tuple[int, int]]]:
+        has_children = Exists(ChartEvent._base_manager.filter(parent_id=OuterRef("pk")))
+        events = list(
+            ChartEvent._base_manager.filter(project=self._project)
+            .annotate(has_children=has_children)
+            .order_by("hierarchical_number")
+            .values_list(*_EVENT_FIELDS)
+        )
+        links = list(
+            ChartEventLink.objects.filter(follower__project=self._project).values_list("predecessor_id", "follower_id")
+        )
+        return events, links
+
+    def _build_graph(self, events: list[tuple], links: list[tuple[int, int]]) -> tuple[array, ...]:
+        """
+        Граф ограничений: сжатые массивы смежности, количество входящих ребер узлов,
+        длительности событий без дочерних событий и исходные номера дней их начала
+        """
+
+        count = len(events)
+        index = {event[0]: position for position, event in enumerate(events)}
+
+        # Узлы: 2 * i - начало события i, 2 * i + 1 - окончание
+        edges, durations, floor = [], _zeros("i", count), _zeros("i", count)
+        for position, (_, parent_id, _, _, planned_start, duration, *_, has_children) in enumerate(events):
+            parent = index.get(parent_id)
+            if parent is not None:
+                edges.append((2 * parent, 2 * position))
+                edges.append((2 * position + 1, 2 * parent + 1))
+            if not has_children:
+                durations[position] = max(duration, 1)
+                floor[position] = self._to_index(planned_start)
+        for predecessor, follower in links:
+            if predecessor in index and follower in index:
+                edges.append((2 * index[predecessor] + 1, 2 * index[follower]))
+        offsets, targets = _to_csr(edges, 2 * count)
+
+        pending = _zeros("i", 2 * count)
+        for target in targets:
+            pending[target] += 1
+        # Окончание события без дочерних событий определяется его началом
+        for position in range(count):
+            if durations[position]:
+                pending[2 * position + 1] += 1
+
+        return offsets, targets, pending, durations, floor
+
+    def _reserve_fixed(self, events: list[tuple], durations: array, floor: array) -> tuple[dict[int, array], set[int]]:
+        """Занятость ответственных по рабочим дням с начатыми событиями и позиции начатых событий"""
+
+        usage = {event[8]: array("H") for event in events if event[8] is not None}
+        fixed = {position for position in range(len(events)) if durations[position] and events[position][7] > 0}
+        for position in fixed:
+            if events[position][8] is not None:
+                _reserve(usage[events[position][8]], floor[position], durations[position])
+        return usage, fixed
+
+    def schedule(self) -> tuple[list[tuple], dict[int, tuple[int, int]]]:
+        """
+        Расчет: события проекта и для событий без дочерних событий - исходный и предлагаемый номер
+        рабочего дня начала
+        """
+
+        events, links = self._load()
+        self._origin = min((event[4] for event in events), default=date.today())
+        offsets, targets, pending, durations, floor = self._build_graph(events, links)
+        usage, fixed = self._reserve_fixed(events, durations, floor)
+        state = _ScheduleState(offsets, targets, pending, durations, floor)
+        state.run(lambda position, start: self._place(state, usage, fixed, events[position][8], position, start))
+
+        if any(pending):
+            numbers = sorted({events[node // 2][2] for node, left in enumerate(pending) if left})
+            raise ResourceLevelingException(
+                f"Связи событий образуют цикл, выравнивание невозможно: {', '.join(numbers[:10])}"
+            )
+
+        return events, {position: (floor[position], start) for position, start in state.starts.items()}
+
+    def _place(
+        self,
+        state: _ScheduleState,
+        usage: dict[int, array],
+        fixed: set[int],
+        user_id: Optional[int],
+        position: int,
+        start: int,
+    ) -> int:
+        """День начала события: начатые события остаются на месте, остальные - первое свободное окно ответственного"""
+
+        if position in fixed:
+            return state.floor[position]
+        if user_id is not None:
+            start = _find_slot(usage[user_id], start, state.durations[position], self._capacity)
+            _reserve(usage[user_id], start, state.durations[position])
+        return start
+
+    def _get_changes(self, events: list[tuple], starts: dict[int, tuple[int, int]]) -> list[dict[str, Any]]:
+        changes = []
+        for position, (old_start, new_start) in sorted(starts.items()):
+            if new_start == old_start:
+                continue
+            pk, _, number, name, planned_start, duration, planned_end, _, _, username, _ = events[position]
+            new_planned_start = self._to_date(new_start)
+            changes.append(
+                {
+                    "id": pk,
+                    "number": number,
+                    "name": name,
+                    "responsible": username,
+                    "planned_start": planned_start,
+                    "planned_end": planned_end,
+                    "new_planned_start": new_planned_start,
+                    "new_planned_end": self._calendar.add_working_days(new_planned_start, duration),
+                    "delay": new_start - old_start,
+                }
+            )
+        return changes
+
+    def get_changes(self) -> list[dict[str, Any]]:
+        """Сдвигаемые события: исходные и предлагаемые планируемые даты, задержка в рабочих днях"""
+
+        return self._get_changes(*self.schedule())
+
+    def preview(self) -> dict[str, Any]:
+        """
+        Предлагаемые изменения для просмотра перед применением
+
+        `version` - версия проекта на момент расчета: применение проверяет, что график с тех пор не менялся
+        """
+
+        version = str(self._project.project_version)
+        events, starts = self.schedule()
+        changes = self._get_changes(events, starts)
+        new_ends = {change["id"]: change["new_planned_end"] for change in changes}
+        ends = [events[position][6] for position in starts]
+        new_end = max((new_ends.get(events[position][0], events[position][6]) for position in starts), default=None)
+
+        return {
+            "version": version,
+            "capacity": self._capacity,
+            "summary": {
+                "events": len(starts),
+                "moved": len(changes),
+                "max_delay": max((change["delay"] for change in changes), default=0),
+                "end_before": max(ends).isoformat() if ends else None,
+                "end_after": new_end.isoformat() if new_end else None,
+            },
+            "changes": [
+                {
+                    **change,
+                    **{
+                        field: change[field].isoformat()
+                        for field in ("planned_start", "planned_end", "new_planned_start", "new_planned_end")
+                    },
+                }
+                for change in changes
+            ],
+        }
+
+    def apply(self, version: str) -> int:
+        """
+        Применение предложенных дат одним пакетом обновлений
+
+        Расчет повторяется в транзакции, при изменении графика после просмотра (`version`) - исключение.
+        Вернет количество сдвинутых событий
+        """
+
+        with transaction.atomic():
+            if connection.features.has_select_for_update:
+                Project.objects.select_for_update().filter(pk=self._project.pk).exists()
+            current_version = Project.objects.filter(pk=self._project.pk).values_list("project_version", flat=True)
+            if str(current_version.first()) != version:
+                raise ResourceLevelingException("График изменился после расчета, проверьте предложение еще раз")
+
+            changes = self.get_changes()
+            events = [
+                ChartEvent(
+                    pk=change["id"],
+                    planned_start=change["new_planned_start"],
+                    planned_end=change["new_planned_end"],
+                )
+                for change in changes
+            ]
+            ChartEvent.objects.bulk_update(events, ("planned_start", "planned_end"), batch_size=LEVELING_BATCH_SIZE)
+            if events:
+                if self._project.update_parent_dates:
+                    recalculate_summary_dates(self._project.pk)
+                bump_project_version(self._project.pk)
+
+        return len(events)
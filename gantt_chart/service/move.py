@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models import CharField, Value
+from django.db.models.functions import Concat, Substr
+
+from gantt_chart.models import ChartEvent
+from gantt_chart.models.event import get_subtree_ids
+
+from .exceptions import EventMoveException, ProjectLinkException
+from .project import bump_project_version
+from .rollup import update_ancestors_completion, update_ancestors_dates
+
+
+def _rename_subtree(event_id: int, old_number: str, new_number: str) -> int:
+    """Замена префикса иерархического номера у события и всех его потомков одним UPDATE"""
+
+    return ChartEvent._base_manager.filter(pk__in=get_subtree_ids((event_id,))).update(
+        hierarchical_number=Concat(
+            Value(new_number), Substr("hierarchical_number", len(old_number) + 1), output_field=CharField()
+        )
+    )
+
+
+def _get_children(parent: ChartEvent) -> list[tuple[int, int, str]]:
+    """Дочерние события: позиция среди дочерних событий, идентификатор и номер (по позиции)"""
+
+    children = ChartEvent._base_manager.filter(parent_id=parent.pk).values_list("pk", "hierarchical_number")
+    return sorted((int(number.rpartition(".")[2]), pk, number) for pk, number in children)
+
+
+class EventMoveService:
+    """
+    Сервис для перемещения события вместе с поддеревом (смена родителя и/или позиции среди дочерних событий)
+
+    Иерархические номера переписываются UPDATE-запросами по поддеревьям (рекурсивно по `parent_id`):
+    поддерево на время перенумерации отсоединяется от родителя, соседние события сдвигаются,
+    затем поддерево получает итоговый номер и нового родителя
+    """
+
+    __slots__ = ("_event",)
+
+    def __init__(self, event: ChartEvent):
+        self._event = event
+
+    def validate(self, parent: ChartEvent):
+        if self._event.is_root:
+            raise EventMoveException("Корневое событие нельзя переместить")
+        if parent.project_id != self._event.project_id:
+            raise ProjectLinkException(f"Событие {parent} не относится к проекту {self._event.project}")
+        if self._event.get_subtree().filter(pk=parent.pk).exists():
+            raise EventMoveException(f"Событие {self._event} нельзя переместить внутрь собственного поддерева")
+
+    def move(self, parent: ChartEvent, position: int | None = None):
+        """
+        Перемещение события к родителю `parent` на позицию `position` (номер среди дочерних событий, с 1)
+
+        Без позиции (или при позиции больше последней) событие добавляется последним
+        """
+
+        self.validate(parent)
+
+        event = self._event
+        project_id = event.project_id
+        old_parent = event.parent
+        old_number = event.hierarchical_number
+
+        with transaction.atomic():
+            # Поддерево события не должно попадать в поддеревья сдвигаемых соседей
+            ChartEvent._base_manager.filter(pk=event.pk).update(parent=None)
+
+            # Закрытие промежутка на старом месте
+            old_position = int(old_number.rpartition(".")[2])
+            for number, pk, hierarchical_number in _get_children(old_parent):
+                if number > old_position:
+                    _rename_subtree(pk, hierarchical_number, f"{old_parent.hierarchical_number}.{number - 1}")
+
+            # Номер нового родителя мог измениться при сдвиге
+            parent.hierarchical_number = (
+                ChartEvent._base_manager.filter(pk=parent.pk).values_list("hierarchical_number", flat=True).get()
+            )
+            children = _get_children(parent)
+            last_number = children[-1][0] if children else 0
+            new_position = last_number + 1 if position is None or position > last_number else position
+
+            # Освобождение позиции на новом месте
+            for number, pk, hierarchical_number in children:
+                if number >= new_position:
+                    _rename_subtree(pk, hierarchical_number, f"{parent.hierarchical_number}.{number + 1}")
+
+            new_number = f"{parent.hierarchical_number}.{new_position}"
+            _rename_subtree(event.pk, old_number, new_number)
+            ChartEvent._base_manager.filter(pk=event.pk).update(parent=parent)
+
+            if event.project.update_percentage_completion:
+                update_ancestors_completion(project_id, (old_parent.pk, parent.pk))
+            if event.project.update_parent_dates:
+                update_ancestors_dates(project_id, (old_parent.pk, parent.pk))
+            bump_project_version(project_id)
+
+        event.parent = parent
+        event.hierarchical_number = new_number
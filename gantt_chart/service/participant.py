@@ -0,0 +1,68 @@
+from typing import Iterable, Mapping
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from gantt_chart.models import Project, ProjectParticipant
+
+from .exceptions import ParticipantUserException
+from .project import update_project_draft_state
+
+User = get_user_model()
+
+
+class ParticipantService:
+    """
+    Сервис для массового управления участниками проекта
+
+    Участники создаются и обновляются через `bulk_create`/`bulk_update`,
+    статус черновика проекта пересчитывается один раз после коммита
+    """
+
+    __slots__ = ("_project",)
+
+    def __init__(self, project: Project):
+        self._project = project
+
+    def set_roles(self, roles: Mapping[int, str]) -> tuple[int, int]:
+        """Назначение ролей пользователям (идентификатор пользователя -> роль), возвращает (создано, обновлено)"""
+
+        if not roles:
+            return 0, 0
+
+        missing_users = set(roles) - set(User.objects.filter(pk__in=roles).values_list("pk", flat=True))
+        if missing_users:
+            raise ParticipantUserException(f"Пользователи не найдены: {sorted(missing_users)}")
+
+        with transaction.atomic():
+            participants = ProjectParticipant.objects.select_for_update().filter(
+                project=self._project, participant_id__in=roles
+            )
+            existing = {participant.participant_id: participant for participant in participants}
+
+            to_create = [
+                ProjectParticipant(project=self._project, participant_id=user_id, role=role)
+                for user_id, role in roles.items()
+                if user_id not in existing
+            ]
+            to_update = []
+            for user_id, participant in existing.items():
+                if participant.role != roles[user_id]:
+                    participant.role = roles[user_id]
+                    to_update.append(participant)
+
+            ProjectParticipant.objects.bulk_create(to_create)
+            ProjectParticipant.objects.bulk_update(to_update, ("role",))
+            if to_create or to_update:
+                update_project_draft_state(self._project.pk)
+
+        return len(to_create), len(to_update)
+
+    def remove(self, user_ids: Iterable[int]) -> int:
+        """Удаление участников проекта по идентификаторам пользователей, возвращает количество удаленных"""
+
+        with transaction.atomic():
+            # Статус черновика пересчитывается сигналом post_delete (однократно на транзакцию)
+            deleted, _ = ProjectParticipant.objects.filter(project=self._project, participant_id__in=user_ids).delete()
+
+        return deleted
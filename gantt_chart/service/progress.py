@@ -0,0 +1,209 @@
+from datetime import date, timedelta
+from itertools import chain
+from math import ceil
+from typing import Any, Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, IntegerField, OuterRef, QuerySet, Sum
+
+from gantt_chart.models import ChartEvent, EventProgressSample, Project
+
+# Окно скользящего среднего темпа выполнения по умолчанию, дней
+PROGRESS_TREND_WINDOW = 7
+# Наибольший период графика выполнения (`days`), дней
+PROGRESS_MAX_DAYS = 5 * 366
+PROGRESS_BATCH_SIZE = 5000
+
+
+def record_progress(changes: Iterable[tuple[ChartEvent, int]], day: Optional[date] = None) -> int:
+    """
+    Запись изменений процента выполнения событий за день
+
+    `changes` - события и их процент выполнения до изменения. Повторная правка за день обновляет запись дня
+    одним запросом (`INSERT ... ON CONFLICT`), значение до первой правки дня сохраняется
+    """
+
+    day = day or date.today()
+    samples = [
+        EventProgressSample(
+            project_id=event.project_id,
+            event_id=event.pk,
+            date=day,
+            previous_completion=previous,
+            percentage_completion=event.percentage_completion,
+        )
+        for event, previous in changes
+        if previous != event.percentage_completion
+    ]
+    if samples:
+        EventProgressSample.objects.bulk_create(
+            samples,
+            update_conflicts=True,
+            unique_fields=("event", "date"),
+            update_fields=("percentage_completion",),
+        )
+    return len(samples)
+
+
+def get_work_events(project_id: int) -> QuerySet[ChartEvent]:
+    """События проекта без дочерних событий - по ним считается выполненный объем работ"""
+
+    children = ChartEvent._base_manager.filter(parent=OuterRef("pk"))
+    return ChartEvent._base_manager.filter(project_id=project_id, is_root=False).exclude(Exists(children))
+
+
+def get_progress_changes(project_id: int, events: Optional[QuerySet[ChartEvent]] = None) -> dict[date, int]:
+    """
+    Изменение выполненного объема работ проекта (или набора событий `events`) по дням
+
+    Объем - сумма произведений планируемой длительности на процент выполнения событий без дочерних событий,
+    агрегация по дням - одним запросом на стороне БД
+    """
+
+    events = get_work_events(project_id) if events is None else events
+    delta = (F("percentage_completion") - F("previous_completion")) * F("event__planned_duration")
+    rows = (
+        EventProgressSample.objects.filter(project_id=project_id, event__in=events.values("pk"))
+        .values("date")
+        .annotate(delta=Sum(delta, output_field=IntegerField()))
+        .values_list("date", "delta")
+    )
+    return {day: value for day, value in rows if value}
+
+
+def get_project_burnup(
+    project: Project, days: Optional[int] = None, window: int = PROGRESS_TREND_WINDOW
+) -> dict[str, Any]:
+    """
+    Данные графика выполнения (burn-up) и темпа выполнения проекта
+
+    Выполненный объем - в рабочих днях (планируемая длительность с учетом процента выполнения), объем проекта -
+    текущая сумма длительностей. Ряд строится от текущего объема назад по дневным изменениям, поэтому события
+    без истории (импортированные, скопированные) учитываются своим текущим процентом за весь период.
+    Колонки - по дням подряд начиная с `base`. Темп - прирост объема за день и его скользящее среднее
+    за `window` дней, по последнему значению среднего - прогноз даты завершения
+    """
+
+    totals = get_work_events(project.pk).aggregate(
+        scope=Sum("planned_duration"),
+        earned=Sum(F("planned_duration") * F("percentage_completion"), output_field=IntegerField()),
+    )
+    scope, earned = totals["scope"] or 0, totals["earned"] or 0
+    changes = get_progress_changes(project.pk)
+
+    today = date.today()
+    start = min(changes, default=today)
+    if days is not None:
+        start = max(start, today - timedelta(days=days - 1))
+    count = (today - start).days + 1
+
+    # Объем на конец каждого дня: от текущего значения назад, вычитая изменения более поздних дней
+    values = [0] * count
+    later_changes = sum(value for day, value in changes.items() if day > today)
+    current = earned - later_changes
+    for position in range(count - 1, -1, -1):
+        values[position] = current
+        current -= changes.get(start + timedelta(days=position), 0)
+
+    velocity = [value - previous for previous, value in zip([current, *values], values)]
+    trend, window_sum = [], 0
+    for position, value in enumerate(velocity):
+        window_sum += value - (velocity[position - window] if position >= window else 0)
+        trend.append(window_sum / min(position + 1, window))
+
+    forecast_end = None
+    if trend and trend[-1] > 0 and earned < scope * 100:
+        forecast_end = (today + timedelta(days=ceil((scope * 100 - earned) / trend[-1]))).isoformat()
+
+    return {
+        "base": start.isoformat(),
+        "window": window,
+        "scope": scope,
+        "earned": [round(value / 100, 2) for value in values],
+        "percent": [round(value / scope, 2) if scope else 0 for value in values],
+        "velocity": [round(value / 100, 2) for value in velocity],
+        "trend": [round(value / 100, 2) for value in trend],
+        "forecast_end": forecast_end,
+    }
+
+
+def _get_period_start(day: date, monthly_before: date) -> date:
+    if day < monthly_before:
+        return day.replace(day=1)
+    return day - timedelta(days=day.weekday())
+
+
+def _compact_group(group: list[tuple], updated: list[EventProgressSample], deleted: list[int]):
+    """Записи события за период: остается последняя со значением до первой правки периода"""
+
+    previous, last = group[0][3], group[-1]
+    if previous == last[4]:
+        deleted.extend(sample[0] for sample in group)
+        return
+
+    deleted.extend(sample[0] for sample in group[:-1])
+    if previous != last[3]:
+        updated.append(EventProgressSample(pk=last[0], previous_completion=previous))
+
+
+def compact_project_progress(project_id: int, weekly_before: date, monthly_before: date) -> tuple[int, int]:
+    """
+    Прореживание истории процента выполнения проекта
+
+    Записи раньше `weekly_before` объединяются до одной на событие в неделю, раньше `monthly_before` -
+    в месяц: остается последняя запись периода со значением до первой правки периода. Записи без изменения
+    значения удаляются. Значения на конец периода сохраняются, поэтому ряд графика выполнения на границах
+    периодов не меняется. Вернет количество обновленных и удаленных записей
+    """
+
+    rows = (
+        EventProgressSample.objects.filter(project_id=project_id, date__lt=weekly_before)
+        .order_by("event_id", "date")
+        .values_list("pk", "event_id", "date", "previous_completion", "percentage_completion")
+    )
+
+    updated, deleted = [], []
+    group_key, group = None, []
+    for row in chain(rows.iterator(chunk_size=PROGRESS_BATCH_SIZE), (None,)):
+        key = None if row is None else (row[1], _get_period_start(row[2], monthly_before))
+        if group and key != group_key:
+            _compact_group(group, updated, deleted)
+            group = []
+        if row is not None:
+            group_key = key
+            group.append(row)
+
+    with transaction.atomic():
+        EventProgressSample.objects.bulk_update(updated, ("previous_completion",), batch_size=PROGRESS_BATCH_SIZE)
+        for offset in range(0, len(deleted), PROGRESS_BATCH_SIZE):
+            batch = deleted[offset : offset + PROGRESS_BATCH_SIZE]  # noqa: E203
+            EventProgressSample.objects.filter(pk__in=batch).delete()
+
+    return len(updated), len(deleted)
+
+
+def compact_progress_samples(today: Optional[date] = None) -> dict[int, tuple[int, int]]:
+    """
+    Прореживание истории процента выполнения всех проектов по порогам из настроек
+    (`PROGRESS_HISTORY_DAILY_DAYS`, `PROGRESS_HISTORY_WEEKLY_DAYS`)
+
+    Вернет количество обновленных и удаленных записей по проектам, где были изменения
+    """
+
+    today = today or date.today()
+    weekly_before = today - timedelta(days=settings.PROGRESS_HISTORY_DAILY_DAYS)
+    monthly_before = today - timedelta(days=settings.PROGRESS_HISTORY_WEEKLY_DAYS)
+
+    result = {}
+    project_ids = (
+        EventProgressSample.objects.filter(date__lt=weekly_before)
+        .order_by("project_id")
+        .values_list("project_id", flat=True)
+        .distinct()
+    )
+    for project_id in list(project_ids):
+        counts = compact_project_progress(project_id, weekly_before, monthly_before)
+        if any(counts):
+            result[project_id] = counts
+    return result
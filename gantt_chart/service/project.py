@@ -0,0 +1,75 @@
+from typing import Callable, Optional
+from uuid import uuid4
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from gantt_chart.models import ChartEvent, Project, ProjectParticipant, ProjectParticipantRole
+
+from .delete import bulk_delete_events
+from .transaction import OnCommitBatch
+
+
+def _update_projects_version(project_ids: set[int]):
+    """
+    Смена версии проектов
+
+    Обновление идет через `QuerySet.update` (без сигналов `Project`) в режиме автокоммита после коммита
+    транзакции изменений, поэтому строка проекта блокируется на время одного UPDATE, а не всей транзакции
+    """
+
+    for project_id in project_ids:
+        Project.objects.filter(pk=project_id).update(project_version=uuid4())
+
+
+project_version_batch = OnCommitBatch(_update_projects_version)
+
+
+def bump_project_version(*project_ids: int):
+    """Смена версии проектов (однократно на транзакцию)"""
+
+    project_version_batch.add(*project_ids)
+
+
+def _update_projects_draft_state(project_ids: set[int]):
+    """
+    Пересчет статуса черновика проектов одним запросом
+
+    Проект - черновик, если в нем нет участников с ролью "Руководитель" или "Администратор"
+    """
+
+    managers = ProjectParticipant.objects.filter(
+        project=OuterRef("pk"), role__in=(ProjectParticipantRole.supervisor, ProjectParticipantRole.administrator)
+    )
+    Project.objects.filter(pk__in=project_ids).update(is_draft=~Exists(managers))
+
+
+project_draft_state_batch = OnCommitBatch(_update_projects_draft_state)
+
+
+def update_project_draft_state(*project_ids: int):
+    """Пересчет статуса черновика проектов (однократно на транзакцию)"""
+
+    project_draft_state_batch.add(*project_ids)
+
+
+class ProjectService:
+    """Сервис для работы с проектами"""
+
+    __slots__ = ("_project",)
+
+    def __init__(self, project: Project):
+        self._project = project
+
+    def delete(self, progress: Optional[Callable[..., None]] = None):
+        """
+        Удаление проекта
+
+        События удаляются запросами по проекту (`bulk_delete_events`), штатному коллектору остаются
+        сам проект и его участники. `progress(percent, message)` передается в `bulk_delete_events`
+        """
+
+        with transaction.atomic():
+            bulk_delete_events(ChartEvent._base_manager.filter(project=self._project), progress)
+            self._project.root_event = None
+            self._project.delete()
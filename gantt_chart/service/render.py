@@ -0,0 +1,251 @@
+from array import array
+from datetime import date, timedelta
+from io import BytesIO
+from typing import Iterable, Iterator
+from xml.sax.saxutils import escape, quoteattr
+
+from PIL import Image, ImageDraw, ImageFont
+
+from gantt_chart.constants import ChartScale
+
+from .chart import ChartRow
+from .exceptions import ChartTooLargeException
+
+# Ширина одного дня (px) и отступ по краям графика (дни) для каждого масштаба
+SCALE_DAY_WIDTH = {ChartScale.day.value: 30, ChartScale.week.value: 10, ChartScale.month.value: 4}
+SCALE_PADDING_DAYS = {ChartScale.day.value: 2, ChartScale.week.value: 7, ChartScale.month.value: 30}
+
+HEADER_HEIGHT = 40
+ROW_HEIGHT = 24
+BAR_HEIGHT = 16
+LABEL_WIDTH = 320
+LABEL_MAX_CHARS = 48
+SVG_CHUNK_ROWS = 500
+PNG_MAX_PIXELS = 64_000_000
+
+BAR_COLOR = "#b8c2cc"
+PROGRESS_COLOR = "#a3a3ff"
+GRID_COLOR = "#e0e0e0"
+TEXT_COLOR = "#333333"
+ARROW_COLOR = "#666666"
+
+
+class ChartLayout:
+    """
+    Предрасчитанная геометрия графика
+
+    Строки обходятся один раз: даты, прогресс и подписи складываются в компактные массивы,
+    попутно вычисляются границы графика и индекс строк для стрелок зависимостей
+    """
+
+    __slots__ = ("scale", "day_width", "labels", "starts", "ends", "progress", "arrows", "first_day", "last_day")
+
+    def __init__(self, rows: Iterable[ChartRow], links: Iterable[tuple[int, int]], scale: str):
+        self.scale = scale
+        self.day_width = SCALE_DAY_WIDTH[scale]
+        self.labels: list[str] = []
+        self.starts = array("l")
+        self.ends = array("l")
+        self.progress = array("B")
+
+        row_index: dict[int, int] = {}
+        min_day = max_day = None
+        for row in rows:
+            start = row.start.toordinal()
+            end = max(row.end.toordinal(), start)
+            row_index[row.id] = len(self.starts)
+            self.starts.append(start)
+            self.ends.append(end)
+            self.progress.append(min(max(int(row.progress), 0), 100))
+            self.labels.append(f"{row.hierarchical_number} {row.name}"[:LABEL_MAX_CHARS])
+            min_day = start if min_day is None or start < min_day else min_day
+            max_day = end if max_day is None or end > max_day else max_day
+
+        if min_day is None:
+            min_day = max_day = date.today().toordinal()
+
+        padding = SCALE_PADDING_DAYS[scale]
+        self.first_day = min_day - padding
+        self.last_day = max_day + padding
+        self.arrows = [
+            (row_index[predecessor], row_index[follower])
+            for predecessor, follower in links
+            if predecessor in row_index and follower in row_index
+        ]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def width(self) -> int:
+        return LABEL_WIDTH + (self.last_day - self.first_day + 1) * self.day_width
+
+    @property
+    def height(self) -> int:
+        return HEADER_HEIGHT + len(self) * ROW_HEIGHT
+
+    def x(self, day: int) -> int:
+        return LABEL_WIDTH + (day - self.first_day) * self.day_width
+
+    def y(self, index: int) -> int:
+        return HEADER_HEIGHT + index * ROW_HEIGHT
+
+    def bar(self, index: int) -> tuple[int, int, int, int]:
+        """Координаты полосы события: x, y, ширина, ширина прогресса"""
+
+        x = self.x(self.starts[index])
+        width = (self.ends[index] - self.starts[index] + 1) * self.day_width
+        y = self.y(index) + (ROW_HEIGHT - BAR_HEIGHT) // 2
+        return x, y, width, width * self.progress[index] // 100
+
+    def arrow(self, predecessor: int, follower: int) -> list[tuple[int, int]]:
+        """Ломаная стрелки от конца предшественника к началу последователя"""
+
+        x1 = self.x(self.ends[predecessor] + 1)
+        y1 = self.y(predecessor) + ROW_HEIGHT // 2
+        x2 = self.x(self.starts[follower])
+        y2 = self.y(follower) + ROW_HEIGHT // 2
+        return [(x1, y1), (x1 + 6, y1), (x1 + 6, y2), (x2, y2)]
+
+    def iter_ticks(self) -> Iterator[tuple[int, str]]:
+        """Деления шкалы времени: координата и подпись"""
+
+        day = date.fromordinal(self.first_day)
+        last_day = date.fromordinal(self.last_day)
+
+        if self.scale == ChartScale.day.value:
+            while day <= last_day:
+                yield self.x(day.toordinal()), day.strftime("%d")
+                day += timedelta(1)
+            return
+
+        if self.scale == ChartScale.week.value:
+            day += timedelta((7 - day.weekday()) % 7)
+            while day <= last_day:
+                yield self.x(day.toordinal()), day.strftime("%d.%m")
+                day += timedelta(7)
+            return
+
+        day = date(day.year + day.month // 12, day.month % 12 + 1, 1) if day.day != 1 else day
+        while day <= last_day:
+            yield self.x(day.toordinal()), day.strftime("%m.%Y")
+            day = date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+class SvgChartRenderer:
+    """Потоковая отрисовка графика в SVG"""
+
+    content_type = "image/svg+xml"
+
+    __slots__ = ("_layout",)
+
+    def __init__(self, layout: ChartLayout):
+        self._layout = layout
+
+    def __iter__(self) -> Iterator[str]:
+        layout = self._layout
+        yield (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{layout.width}" height="{layout.height}"'
+            f' viewBox="0 0 {layout.width} {layout.height}" font-family="sans-serif" font-size="11">'
+            '<defs><marker id="arrow" markerWidth="6" markerHeight="6" refX="6" refY="3" orient="auto">'
+            f'<path d="M0,0 L6,3 L0,6 z" fill="{ARROW_COLOR}"/></marker></defs>'
+            f'<rect width="{layout.width}" height="{layout.height}" fill="#ffffff"/>'
+        )
+        yield "".join(self._iter_grid())
+
+        chunk = []
+        for index in range(len(layout)):
+            chunk.append(self._bar(index))
+            if len(chunk) == SVG_CHUNK_ROWS:
+                yield "".join(chunk)
+                chunk = []
+        if chunk:
+            yield "".join(chunk)
+
+        for start in range(0, len(layout.arrows), SVG_CHUNK_ROWS):
+            chunk = layout.arrows[start : start + SVG_CHUNK_ROWS]  # noqa: E203
+            yield "".join(self._arrow(*arrow) for arrow in chunk)
+
+        yield "</svg>"
+
+    def _iter_grid(self) -> Iterator[str]:
+        layout = self._layout
+        yield (
+            f'<line x1="0" y1="{HEADER_HEIGHT}" x2="{layout.width}" y2="{HEADER_HEIGHT}" stroke="{GRID_COLOR}"/>'
+            f'<line x1="{LABEL_WIDTH}" y1="0" x2="{LABEL_WIDTH}" y2="{layout.height}" stroke="{GRID_COLOR}"/>'
+        )
+        for x, label in layout.iter_ticks():
+            yield (
+                f'<line x1="{x}" y1="{HEADER_HEIGHT // 2}" x2="{x}" y2="{layout.height}" stroke="{GRID_COLOR}"/>'
+                f'<text x="{x + 2}" y="{HEADER_HEIGHT - 8}" fill="{TEXT_COLOR}">{label}</text>'
+            )
+
+    def _bar(self, index: int) -> str:
+        layout = self._layout
+        x, y, width, progress_width = layout.bar(index)
+        label = escape(layout.labels[index])
+        return (
+            f"<g><title>{label}</title>"
+            f'<text x="4" y="{y + BAR_HEIGHT - 4}" fill="{TEXT_COLOR}">{label}</text>'
+            f'<rect x="{x}" y="{y}" width="{width}" height="{BAR_HEIGHT}" rx="3" fill="{BAR_COLOR}"/>'
+            f'<rect x="{x}" y="{y}" width="{progress_width}" height="{BAR_HEIGHT}" rx="3" fill="{PROGRESS_COLOR}"/>'
+            "</g>"
+        )
+
+    def _arrow(self, predecessor: int, follower: int) -> str:
+        points = " ".join(f"{x},{y}" for x, y in self._layout.arrow(predecessor, follower))
+        return f'<polyline points={quoteattr(points)} fill="none" stroke="{ARROW_COLOR}" marker-end="url(#arrow)"/>'
+
+
+class PngChartRenderer:
+    """Отрисовка графика в PNG (по той же геометрии, что и SVG)"""
+
+    content_type = "image/png"
+
+    __slots__ = ("_layout",)
+
+    def __init__(self, layout: ChartLayout):
+        self._layout = layout
+        if layout.width * layout.height > PNG_MAX_PIXELS:
+            raise ChartTooLargeException(
+                f"График {layout.width}x{layout.height} слишком велик для PNG,"
+                " используйте SVG или более крупный масштаб"
+            )
+
+    def render(self) -> bytes:
+        layout = self._layout
+        image = Image.new("RGB", (layout.width, layout.height), "#ffffff")
+        draw = ImageDraw.Draw(image)
+        font = self._get_font()
+
+        draw.line((0, HEADER_HEIGHT, layout.width, HEADER_HEIGHT), fill=GRID_COLOR)
+        draw.line((LABEL_WIDTH, 0, LABEL_WIDTH, layout.height), fill=GRID_COLOR)
+        for x, label in layout.iter_ticks():
+            draw.line((x, HEADER_HEIGHT // 2, x, layout.height), fill=GRID_COLOR)
+            draw.text((x + 2, HEADER_HEIGHT - 20), label, fill=TEXT_COLOR, font=font)
+
+        for index in range(len(layout)):
+            x, y, width, progress_width = layout.bar(index)
+            draw.text((4, y + 2), layout.labels[index], fill=TEXT_COLOR, font=font)
+            draw.rectangle((x, y, x + width - 1, y + BAR_HEIGHT - 1), fill=BAR_COLOR)
+            if progress_width:
+                draw.rectangle((x, y, x + progress_width - 1, y + BAR_HEIGHT - 1), fill=PROGRESS_COLOR)
+
+        for predecessor, follower in layout.arrows:
+            points = layout.arrow(predecessor, follower)
+            draw.line(points, fill=ARROW_COLOR)
+            x, y = points[-1]
+            draw.polygon(((x, y), (x - 6, y - 3), (x - 6, y + 3)), fill=ARROW_COLOR)
+
+        buffer = BytesIO()
+        image.save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _get_font() -> ImageFont.ImageFont:
+        # DejaVuSans покрывает кириллицу, встроенный шрифт Pillow - только латиницу
+        try:
+            return ImageFont.truetype("DejaVuSans.ttf", 11)
+        except OSError:
+            return ImageFont.load_default()
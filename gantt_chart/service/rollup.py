@@ -0,0 +1,72 @@
+from collections import defaultdict
+from typing import Iterable
+
+from django.db.models import Count, Sum
+
+from gantt_chart.models import ChartEvent
+from gantt_chart.models.event import get_ancestor_ids
+
+from .calendar import get_project_calendar
+from .event import set_event_actual_dates
+from .summary import SUMMARY_UPDATE_FIELDS, get_children_dates, rollup_summary_dates
+
+
+def update_ancestors_completion(project_id: int, event_ids: Iterable[int]):
+    """
+    Пересчет процента выполнения событий и всех их предков по прямым дочерним событиям
+
+    Цепочки предков забираются одним запросом (рекурсивно по `parent_id`), суммы дочерних
+    событий - одним агрегатом, обновление - одним `bulk_update`. Цепочки обходятся снизу вверх,
+    изменение события переносится в сумму его родителя без повторных запросов
+    """
+
+    events = {
+        event.pk: event
+        for event in ChartEvent._base_manager.filter(project_id=project_id, pk__in=get_ancestor_ids(event_ids))
+    }
+    if not events:
+        return
+
+    children = {
+        parent_id: (total, count)
+        for parent_id, total, count in ChartEvent._base_manager.filter(parent_id__in=events)
+        .values("parent_id")
+        .annotate(total=Sum("percentage_completion"), count=Count("pk"))
+        .values_list("parent_id", "total", "count")
+    }
+
+    calendar = get_project_calendar(project_id)
+    delta = defaultdict(int)
+    events_for_update = []
+    for event in sorted(events.values(), key=lambda event: event.hierarchical_number.count("."), reverse=True):
+        total, count = children.get(event.pk, (0, 0))
+        percentage_completion = int((total + delta[event.pk]) / (count or 1))
+        if event.parent_id in events:
+            delta[event.parent_id] += percentage_completion - event.percentage_completion
+        if percentage_completion != event.percentage_completion:
+            event.percentage_completion = percentage_completion
+            set_event_actual_dates(event, calendar)
+            events_for_update.append(event)
+
+    ChartEvent.objects.bulk_update(
+        events_for_update, ("actual_start", "actual_duration", "actual_end", "percentage_completion")
+    )
+
+
+def update_ancestors_dates(project_id: int, event_ids: Iterable[int]):
+    """
+    Пересчет сводных дат событий и всех их предков по прямым дочерним событиям
+
+    Даты дочерних событий вне цепочек забираются одним агрегатом, цепочки пересчитываются снизу вверх
+    """
+
+    events = list(ChartEvent._base_manager.filter(project_id=project_id, pk__in=get_ancestor_ids(event_ids)))
+    if not events:
+        return
+
+    chain_ids = [event.pk for event in events]
+    children_dates = get_children_dates(
+        ChartEvent._base_manager.filter(parent_id__in=chain_ids).exclude(pk__in=chain_ids)
+    )
+    events_for_update = rollup_summary_dates(events, children_dates, get_project_calendar(project_id))
+    ChartEvent.objects.bulk_update(events_for_update, SUMMARY_UPDATE_FIELDS)
@@ -0,0 +1,318 @@
+import gzip
+import io
+import json
+from datetime import date, datetime
+from itertools import groupby
+from typing import IO, Any, Iterable, Optional
+
+from django.contrib.admin.options import get_content_type_for_model
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import CharField
+from django.db.models.functions import Cast
+
+from gantt_chart.models import (
+    ChartEvent,
+    ChartEventLink,
+    Project,
+    ProjectCalendar,
+    ProjectHoliday,
+    ProjectParticipant,
+    UniversalComment,
+)
+from gantt_chart.utils import get_or_create_root_event
+
+from .exceptions import ProjectSnapshotException
+from .project import update_project_draft_state
+
+User = get_user_model()
+
+SNAPSHOT_FORMAT = "online-gantt-snapshot"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_BATCH_SIZE = 2000
+SNAPSHOT_COMPRESS_LEVEL = 6
+
+PROJECT_FIELDS = ("name", "description", "update_percentage_completion", "update_parent_dates")
+# Колонки таблиц снимка: поле выборки -> имя колонки. Пользователи сохраняются логинами,
+# события - исходными идентификаторами (на восстановлении заменяются новыми)
+EVENT_COLUMNS = {
+    "pk": "id",
+    "parent_id": "parent",
+    "hierarchical_number": "hierarchical_number",
+    "name": "name",
+    "planned_start": "planned_start",
+    "planned_duration": "planned_duration",
+    "planned_end": "planned_end",
+    "actual_start": "actual_start",
+    "actual_duration": "actual_duration",
+    "actual_end": "actual_end",
+    "percentage_completion": "percentage_completion",
+    "is_root": "is_root",
+    "responsible__username": "responsible",
+}
+EVENT_DATE_COLUMNS = ("planned_start", "planned_end", "actual_start", "actual_end")
+LINK_COLUMNS = {"predecessor_id": "predecessor", "follower_id": "follower"}
+PARTICIPANT_COLUMNS = {"participant__username": "user", "role": "role"}
+HOLIDAY_COLUMNS = {"date": "date", "name": "name"}
+COMMENT_COLUMNS = {
+    "object_id": "object",
+    "author__username": "author",
+    "comment": "comment",
+    "created_at": "created_at",
+}
+# Комментарии проекта и событий различаются по колонке `model`
+COMMENT_MODELS = (Project, ChartEvent)
+# Таблица снимка -> колонка для подсчета записей
+SNAPSHOT_COUNTERS = (("events", "id"), ("links", "follower"), ("participants", "user"), ("comments", "object"))
+
+
+def _get_columns(rows: Iterable[tuple], columns: Iterable[str]) -> dict[str, list]:
+    """Перевод строк выборки в колонки"""
+
+    columns = tuple(columns)
+    values = list(zip(*rows)) or [()] * len(columns)
+    return {column: list(column_values) for column, column_values in zip(columns, values)}
+
+
+def _dump_dates(values: list[Optional[date]]) -> list[Optional[int]]:
+    return [value.toordinal() if value is not None else None for value in values]
+
+
+def _load_dates(values: list[Optional[int]]) -> list[Optional[date]]:
+    return [date.fromordinal(value) if value is not None else None for value in values]
+
+
+def _get_rows(table: dict[str, list], columns: Iterable[str]) -> Iterable[tuple]:
+    return zip(*(table[column] for column in columns))
+
+
+def get_project_snapshot(project: Project) -> dict[str, Any]:
+    """
+    Снимок проекта: свойства, календарь, события, связи, участники и комментарии
+
+    Таблицы хранятся по колонкам (списки значений одного поля сжимаются лучше строк), каждая таблица
+    читается одним запросом `values_list` без создания моделей. Изображение проекта в снимок не входит
+    """
+
+    events = _get_columns(
+        ChartEvent._base_manager.filter(project=project).order_by("pk").values_list(*EVENT_COLUMNS),
+        EVENT_COLUMNS.values(),
+    )
+    for column in EVENT_DATE_COLUMNS:
+        events[column] = _dump_dates(events[column])
+
+    calendar = ProjectCalendar.objects.filter(project=project).first()
+    holidays = _get_columns(
+        ProjectHoliday.objects.filter(calendar=calendar).order_by("date").values_list(*HOLIDAY_COLUMNS),
+        HOLIDAY_COLUMNS.values(),
+    )
+    holidays["date"] = _dump_dates(holidays["date"])
+
+    comments = {"model": []} | _get_columns((), COMMENT_COLUMNS.values())
+    # Идентификатор объекта комментария - строка
+    event_ids = (
+        ChartEvent._base_manager.filter(project=project)
+        .order_by()
+        .annotate(object_id=Cast("pk", CharField()))
+        .values("object_id")
+    )
+    for model, object_ids in ((Project, [str(project.pk)]), (ChartEvent, event_ids)):
+        model_comments = _get_columns(
+            UniversalComment.objects.filter(content_type=get_content_type_for_model(model), object_id__in=object_ids)
+            .order_by("pk")
+            .values_list(*COMMENT_COLUMNS),
+            COMMENT_COLUMNS.values(),
+        )
+        comments["model"].extend([model.__name__] * len(model_comments["object"]))
+        for column, values in model_comments.items():
+            comments[column].extend(values)
+    comments["created_at"] = [value.isoformat() for value in comments["created_at"]]
+
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "project": {field: getattr(project, field) for field in PROJECT_FIELDS},
+        "calendar": {"weekend_days": calendar.weekend_days if calendar else None, "holidays": holidays},
+        "events": events,
+        "links": _get_columns(
+            ChartEventLink.objects.filter(follower__project=project).order_by().values_list(*LINK_COLUMNS),
+            LINK_COLUMNS.values(),
+        ),
+        "participants": _get_columns(
+            ProjectParticipant.objects.filter(project=project).order_by("pk").values_list(*PARTICIPANT_COLUMNS),
+            PARTICIPANT_COLUMNS.values(),
+        ),
+        "comments": comments,
+    }
+
+
+def dump_project_snapshot(project: Project, file: IO[bytes]) -> dict[str, int]:
+    """Запись сжатого (gzip) снимка проекта в файл, вернет количество записей по таблицам"""
+
+    snapshot = get_project_snapshot(project)
+    with (
+        gzip.GzipFile(fileobj=file, mode="wb", compresslevel=SNAPSHOT_COMPRESS_LEVEL) as archive,
+        io.TextIOWrapper(archive, encoding="utf-8") as text_file,
+    ):
+        json.dump(snapshot, text_file, ensure_ascii=False, separators=(",", ":"))
+
+    return {table: len(snapshot[table][column]) for table, column in SNAPSHOT_COUNTERS}
+
+
+def load_project_snapshot(file: IO[bytes]) -> dict[str, Any]:
+    """Чтение сжатого снимка проекта с проверкой формата"""
+
+    try:
+        with gzip.GzipFile(fileobj=file, mode="rb") as archive:
+            snapshot = json.load(archive)
+    except (OSError, EOFError, ValueError) as error:
+        raise ProjectSnapshotException(f"Файл не является снимком проекта: {error}")
+
+    if not isinstance(snapshot, dict) or snapshot.get("format") != SNAPSHOT_FORMAT:
+        raise ProjectSnapshotException("Файл не является снимком проекта")
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ProjectSnapshotException(f"Неподдерживаемая версия снимка: {snapshot.get('version')}")
+    return snapshot
+
+
+class SnapshotRestoreService:
+    """
+    Восстановление проекта из снимка в новый проект
+
+    События создаются уровнями глубины через `bulk_create` (как при копировании проекта): к моменту вставки
+    уровня идентификаторы родителей уже известны, соответствие идентификаторов снимка и новых хранится в памяти.
+    Связи, участники и комментарии создаются `bulk_create` с заменой идентификаторов. Пользователи сопоставляются
+    по логину: отсутствующие в системе пропускаются (ответственный не назначается, участник и комментарии
+    не создаются) и перечисляются в результате
+    """
+
+    __slots__ = ("_snapshot", "_users", "_missing_users")
+
+    def __init__(self, snapshot: dict[str, Any]):
+        self._snapshot = snapshot
+        usernames = {
+            *snapshot["events"]["responsible"],
+            *snapshot["participants"]["user"],
+            *snapshot["comments"]["author"],
+        } - {None}
+        self._users: dict[str, int] = dict(User.objects.filter(username__in=usernames).values_list("username", "pk"))
+        self._missing_users = sorted(usernames - set(self._users))
+
+    def restore(self, name: Optional[str] = None) -> tuple[Project, dict[str, Any]]:
+        """Создание проекта из снимка (по умолчанию - с названием из снимка), вернет проект и количество записей"""
+
+        values = dict(self._snapshot["project"])
+        values["name"] = name or values["name"]
+        if Project.objects.filter(name=values["name"]).exists():
+            raise ProjectSnapshotException(f"Проект `{values['name']}` уже существует")
+
+        with transaction.atomic():
+            project = Project.objects.create(**values)
+            self._restore_calendar(project)
+            id_map = self._restore_events(project)
+            result = {
+                "events": len(id_map),
+                "links": self._restore_links(id_map),
+                "participants": self._restore_participants(project),
+                "comments": self._restore_comments(project, id_map),
+                "missing_users": self._missing_users,
+            }
+
+        return project, result
+
+    def _restore_calendar(self, project: Project):
+        calendar_data = self._snapshot["calendar"]
+        if calendar_data["weekend_days"] is None:
+            return
+
+        calendar, _ = ProjectCalendar.objects.update_or_create(
+            project=project, defaults={"weekend_days": calendar_data["weekend_days"]}
+        )
+        holidays = calendar_data["holidays"]
+        ProjectHoliday.objects.bulk_create(
+            ProjectHoliday(calendar=calendar, date=holiday_date, name=holiday_name)
+            for holiday_date, holiday_name in zip(_load_dates(holidays["date"]), holidays["name"])
+        )
+
+    def _restore_events(self, project: Project) -> dict[int, int]:
+        events = dict(self._snapshot["events"])
+        for column in EVENT_DATE_COLUMNS:
+            events[column] = _load_dates(events[column])
+        rows = [dict(zip(events, values)) for values in zip(*events.values())]
+
+        # Корневое событие создается вместе с проектом - ему переносятся значения из снимка
+        root = get_or_create_root_event(project)
+        id_map = {}
+        depth = lambda row: row["hierarchical_number"].count(".")  # noqa: E731
+        for _, level in groupby(sorted(rows, key=depth), key=depth):
+            source_ids, new_events = [], []
+            for row in level:
+                source_id, parent_id = row.pop("id"), row.pop("parent")
+                row["responsible_id"] = self._users.get(row.pop("responsible"))
+                if row["is_root"]:
+                    for field, value in row.items():
+                        setattr(root, field, value)
+                    root.name = project.name
+                    root.save()
+                    id_map[source_id] = root.pk
+                else:
+                    source_ids.append(source_id)
+                    new_events.append(ChartEvent(project_id=project.pk, parent_id=id_map.get(parent_id), **row))
+
+            ChartEvent.objects.bulk_create(new_events, batch_size=SNAPSHOT_BATCH_SIZE)
+            id_map.update(zip(source_ids, (new_event.pk for new_event in new_events)))
+
+        return id_map
+
+    def _restore_links(self, id_map: dict[int, int]) -> int:
+        links = [
+            ChartEventLink(predecessor_id=id_map[predecessor], follower_id=id_map[follower])
+            for predecessor, follower in _get_rows(self._snapshot["links"], LINK_COLUMNS.values())
+            if predecessor in id_map and follower in id_map
+        ]
+        ChartEventLink.objects.bulk_create(links, batch_size=SNAPSHOT_BATCH_SIZE)
+        return len(links)
+
+    def _restore_participants(self, project: Project) -> int:
+        participants = [
+            ProjectParticipant(project=project, participant_id=self._users[username], role=role)
+            for username, role in _get_rows(self._snapshot["participants"], PARTICIPANT_COLUMNS.values())
+            if username in self._users
+        ]
+        ProjectParticipant.objects.bulk_create(participants)
+        if participants:
+            update_project_draft_state(project.pk)
+        return len(participants)
+
+    def _restore_comments(self, project: Project, id_map: dict[int, int]) -> int:
+        models = {model.__name__: model for model in COMMENT_MODELS}
+        object_ids = {Project.__name__: lambda _: project.pk, ChartEvent.__name__: lambda pk: id_map.get(int(pk))}
+        comments, created_at = [], []
+        for model_name, object_id, author, comment, comment_created_at in _get_rows(
+            self._snapshot["comments"], ("model", *COMMENT_COLUMNS.values())
+        ):
+            object_id = object_ids[model_name](object_id)
+            if object_id is None or author not in self._users:
+                continue
+            comments.append(
+                UniversalComment(
+                    content_type=get_content_type_for_model(models[model_name]),
+                    object_id=str(object_id),
+                    author_id=self._users[author],
+                    comment=comment,
+                )
+            )
+            created_at.append(datetime.fromisoformat(comment_created_at))
+
+        UniversalComment.objects.bulk_create(comments, batch_size=SNAPSHOT_BATCH_SIZE)
+        # `auto_now_add` проставляет время вставки - исходное время возвращается отдельным обновлением
+        for comment, comment_created_at in zip(comments, created_at):
+            comment.created_at = comment_created_at
+        UniversalComment.objects.bulk_update(comments, ("created_at",), batch_size=SNAPSHOT_BATCH_SIZE)
+        return len(comments)
+
+
+def restore_project_snapshot(file: IO[bytes], name: Optional[str] = None) -> tuple[Project, dict[str, Any]]:
+    """Восстановление проекта из файла снимка"""
+
+    return SnapshotRestoreService(load_project_snapshot(file)).restore(name)
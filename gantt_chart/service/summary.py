@@ -0,0 +1,213 @@
+from datetime import date
+from math import inf
+from typing import Callable, Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, Exists, Max, Min, OuterRef, Q, QuerySet
+from django.utils.timezone import now
+
+from gantt_chart.models import ChartEvent
+
+from .calendar import CalendarDays, get_project_calendar
+from .project import bump_project_version
+
+EventDates = dict[str, Optional[date]]
+
+# Поле -> (агрегат по дочерним событиям, ключ пустого значения при сравнении)
+# Пустая фактическая дата окончания - незавершенное событие: родитель завершен, только когда завершены все дети
+SUMMARY_DATE_FIELDS: dict[str, tuple[Callable, float]] = {
+    "planned_start": (min, inf),
+    "planned_end": (max, -inf),
+    "actual_start": (min, inf),
+    "actual_end": (max, inf),
+}
+SUMMARY_UPDATE_FIELDS = (*SUMMARY_DATE_FIELDS, "planned_duration", "actual_duration")
+SUMMARY_BATCH_SIZE = 500
+
+
+def _key(field: str, value: Optional[date]) -> float:
+    return value.toordinal() if value is not None else SUMMARY_DATE_FIELDS[field][1]
+
+
+def _value(key: float) -> Optional[date]:
+    return None if key in (inf, -inf) else date.fromordinal(int(key))
+
+
+def get_event_dates(event: ChartEvent) -> EventDates:
+    """Даты события, участвующие в сводке родителя"""
+
+    return {field: getattr(event, field) for field in SUMMARY_DATE_FIELDS}
+
+
+def merge_dates(*dates: Optional[EventDates]) -> Optional[EventDates]:
+    """Сводные даты по набору дочерних событий (`None` - нет дочерних событий)"""
+
+    dates = [item for item in dates if item is not None]
+    if not dates:
+        return None
+    return {
+        field: _value(aggregate(_key(field, item[field]) for item in dates))
+        for field, (aggregate, _) in SUMMARY_DATE_FIELDS.items()
+    }
+
+
+def get_children_dates(queryset: QuerySet) -> dict[int, EventDates]:
+    """Сводные даты дочерних событий, сгруппированные по родителю (одним агрегатом)"""
+
+    rows = (
+        queryset.order_by()
+        .values("parent_id")
+        .annotate(
+            min_planned_start=Min("planned_start"),
+            max_planned_end=Max("planned_end"),
+            min_actual_start=Min("actual_start"),
+            max_actual_end=Max("actual_end"),
+            unfinished=Count("pk", filter=Q(actual_end__isnull=True)),
+        )
+        .values_list(
+            "parent_id", "min_planned_start", "max_planned_end", "min_actual_start", "max_actual_end", "unfinished"
+        )
+    )
+    return {
+        parent_id: {
+            "planned_start": planned_start,
+            "planned_end": planned_end,
+            "actual_start": actual_start,
+            "actual_end": None if unfinished else actual_end,
+        }
+        for parent_id, planned_start, planned_end, actual_start, actual_end, unfinished in rows
+    }
+
+
+def set_summary_dates(event: ChartEvent, dates: EventDates, calendar: CalendarDays) -> bool:
+    """Проставление событию сводных дат и длительностей, вернет `True` при изменении"""
+
+    if get_event_dates(event) == dates:
+        return False
+
+    for field, value in dates.items():
+        setattr(event, field, value)
+    event.planned_duration = calendar.count_working_days(event.planned_start, event.planned_end)
+    event.actual_duration = (
+        calendar.count_working_days(event.actual_start, event.actual_end or now().date())
+        if event.actual_start
+        else None
+    )
+    return True
+
+
+def update_event_summary_dates(event: ChartEvent, calendar: CalendarDays):
+    """Даты события-контейнера берутся из его дочерних событий"""
+
+    children_dates = get_children_dates(ChartEvent._base_manager.filter(parent_id=event.pk)).get(event.pk)
+    if children_dates is not None:
+        set_summary_dates(event, children_dates, calendar)
+
+
+def _apply_child_dates(
+    parent_dates: EventDates, old_dates: Optional[EventDates], new_dates: Optional[EventDates]
+) -> tuple[EventDates, bool]:
+    """
+    Сводные даты родителя после изменения дат дочернего события `old_dates` -> `new_dates`
+
+    Вернет новые даты и признак, что границу определяло прежнее значение события (нужен пересчет по детям)
+    """
+
+    dates, recalculate = dict(parent_dates), False
+    for field, (aggregate, _) in SUMMARY_DATE_FIELDS.items():
+        current = _key(field, parent_dates[field])
+        new = _key(field, new_dates[field]) if new_dates is not None else None
+        if new is not None and aggregate(new, current) != current:
+            dates[field] = new_dates[field]
+        elif new != current and old_dates is not None and _key(field, old_dates[field]) == current:
+            recalculate = True
+    return dates, recalculate
+
+
+def update_parents_dates(event: ChartEvent, old_dates: Optional[EventDates], as_deleted: bool = False):
+    """
+    Инкрементальное обновление сводных дат родителей события
+
+    Родитель хранит минимум/максимум дат дочерних событий, поэтому новое значение события сравнивается
+    с сохраненным у родителя: если оно расширяет границу - родитель обновляется без запросов, если граница
+    определялась прежним значением события - пересчитывается одним агрегатом по прямым детям (без обхода поддерева).
+    Подъем по цепочке прекращается на первом родителе, даты которого не изменились
+    """
+
+    calendar = get_project_calendar(event.project)
+    new_dates = None if as_deleted else get_event_dates(event)
+    events_for_update = []
+
+    child = event
+    while child.parent is not None and old_dates != new_dates:
+        parent: ChartEvent = child.parent
+        parent_old_dates = get_event_dates(parent)
+        parent_new_dates, recalculate = _apply_child_dates(parent_old_dates, old_dates, new_dates)
+
+        # Новое событие могло превратить лист в контейнер - прежние даты родителя не являются сводными
+        if recalculate or (old_dates is None and child is event):
+            siblings = ChartEvent._base_manager.filter(parent_id=parent.pk).exclude(pk=child.pk)
+            parent_new_dates = merge_dates(get_children_dates(siblings).get(parent.pk), new_dates)
+            if parent_new_dates is None:
+                # Дочерних событий не осталось - родитель сохраняет свои даты
+                break
+
+        if not set_summary_dates(parent, parent_new_dates, calendar):
+            break
+
+        events_for_update.append(parent)
+        old_dates, new_dates = parent_old_dates, parent_new_dates
+        child = parent
+
+    ChartEvent.objects.bulk_update(events_for_update, SUMMARY_UPDATE_FIELDS)
+
+
+def rollup_summary_dates(
+    events: Iterable[ChartEvent], children_dates: dict[int, EventDates], calendar: CalendarDays
+) -> list[ChartEvent]:
+    """
+    Пересчет сводных дат набора событий снизу вверх
+
+    `children_dates` - сводные даты дочерних событий, не входящих в набор. Вернет измененные события
+    """
+
+    children_dates = dict(children_dates)
+    events_for_update = []
+    for event in sorted(events, key=lambda event: event.hierarchical_number.count("."), reverse=True):
+        dates = children_dates.get(event.pk)
+        if dates is not None and set_summary_dates(event, dates, calendar):
+            events_for_update.append(event)
+        if event.parent_id is not None:
+            children_dates[event.parent_id] = merge_dates(children_dates.get(event.parent_id), get_event_dates(event))
+
+    return events_for_update
+
+
+def recalculate_summary_dates(project_id: int, progress: Optional[Callable[..., None]] = None) -> int:
+    """
+    Полный пересчет сводных дат событий-контейнеров проекта (при включении режима)
+
+    Контейнеры загружаются одним запросом, даты листьев агрегируются одним запросом по родителю.
+    `progress(percent, message)` вызывается после каждого этапа и каждой пачки записи.
+    Вернет количество обновленных событий
+    """
+
+    has_children = Exists(ChartEvent._base_manager.filter(parent_id=OuterRef("pk")))
+    containers = list(ChartEvent._base_manager.filter(has_children, project_id=project_id))
+    if progress is not None:
+        progress(20, f"Загружено событий-контейнеров: {len(containers)}")
+    leaves_dates = get_children_dates(
+        ChartEvent._base_manager.filter(~has_children, project_id=project_id, parent__isnull=False)
+    )
+    if progress is not None:
+        progress(40, "Пересчет сводных дат")
+    events_for_update = rollup_summary_dates(containers, leaves_dates, get_project_calendar(project_id))
+    with transaction.atomic():
+        for start in range(0, len(events_for_update), SUMMARY_BATCH_SIZE):
+            if progress is not None:
+                progress(50 + start * 50 // len(events_for_update), f"Сохранено событий: {start}")
+            end = start + SUMMARY_BATCH_SIZE
+            ChartEvent.objects.bulk_update(events_for_update[start:end], SUMMARY_UPDATE_FIELDS)
+        if events_for_update:
+            bump_project_version(project_id)
+    return len(events_for_update)
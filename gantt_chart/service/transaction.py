@@ -0,0 +1,51 @@
+from typing import Callable, Hashable
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+class _PendingKeys:
+    """Ключи, накопленные в транзакции, и их обработчик (регистрируется в `on_commit`)"""
+
+    __slots__ = ("handler", "keys")
+
+    def __init__(self, handler: Callable[[set], None]):
+        self.handler = handler
+        self.keys = set()
+
+    def __call__(self):
+        self.handler(self.keys)
+
+
+class OnCommitBatch:
+    """
+    Накопление ключей в пределах транзакции с однократной обработкой после коммита
+
+    Сколько бы раз ключ ни добавлялся внутри транзакции, обработчик будет вызван один раз
+    для всего набора ключей после коммита внешней транзакции. Вне транзакции обработчик вызывается сразу.
+    При откате транзакции (или точки сохранения, в которой был зарегистрирован обработчик) ключи отбрасываются
+    """
+
+    __slots__ = ("_handler", "_using")
+
+    def __init__(self, handler: Callable[[set], None], using: str = DEFAULT_DB_ALIAS):
+        self._handler = handler
+        self._using = using
+
+    def add(self, *keys: Hashable):
+        connection = transaction.get_connection(self._using)
+        if not connection.in_atomic_block:
+            self._handler(set(keys))
+            return
+
+        pending = self._get_pending(connection)
+        if pending is None:
+            pending = _PendingKeys(self._handler)
+            transaction.on_commit(pending, using=self._using)
+        pending.keys.update(keys)
+
+    def _get_pending(self, connection) -> _PendingKeys | None:
+        for _, func, *_ in connection.run_on_commit:
+            if isinstance(func, _PendingKeys) and func.handler is self._handler:
+                return func
+
+        return None
@@ -0,0 +1,86 @@
+from datetime import date
+from itertools import accumulate
+from typing import Any, Iterable, Optional
+
+from django.db.models import Exists, OuterRef, Q, QuerySet
+
+from gantt_chart.models import ChartEvent, Project, ProjectParticipant
+
+# Наибольшая длина периода загрузки, дней
+WORKLOAD_MAX_DAYS = 5 * 366
+
+
+def _add_interval(diff: list[int], first: int, last: int, base: int, days: int):
+    """Отрезок [first, last] (порядковые номера дней) в разностном массиве, обрезанный по периоду"""
+
+    first, last = max(first - base, 0), min(last - base, days - 1)
+    if first <= last:
+        diff[first] += 1
+        diff[last + 1] -= 1
+
+
+def get_workload(
+    projects: QuerySet[Project],
+    start: date,
+    end: date,
+    users: Optional[Iterable[int]] = None,
+    capacity: int = 1,
+) -> dict[str, Any]:
+    """
+    Загрузка по дням участников проектов `projects` и ответственных за их события
+
+    Загрузка пользователя считается по его событиям во всех проектах, в том числе не входящих в `projects`
+    (например, недоступных зрителю): в ответе только количества событий по дням, без самих событий и проектов.
+    По каждому пользователю - количество назначенных событий без дочерних событий на каждый день периода:
+    по планируемым датам (`planned`) и выполняемых по фактическим датам (`in_progress`, незавершенное событие -
+    до текущей даты). События выбираются одним запросом, отрезки дат накладываются разностными массивами
+    (+1 в день начала, -1 после окончания) и суммируются одним проходом, поэтому время зависит от количества
+    событий и длины периода, но не от их произведения. Перегрузка - дни, где запланировано больше `capacity`
+    """
+
+    base, days = start.toordinal(), (end - start).days + 1
+    today = date.today()
+    children = ChartEvent._base_manager.filter(parent=OuterRef("pk"))
+    overlap = Q(planned_start__lte=end, planned_end__gte=start) | Q(
+        Q(actual_end__isnull=True) | Q(actual_end__gte=start), actual_start__lte=end
+    )
+    participants = ProjectParticipant.objects.filter(project__in=projects).values("participant_id")
+    responsibles = ChartEvent._base_manager.filter(project__in=projects, responsible__isnull=False).values(
+        "responsible_id"
+    )
+    events = (
+        ChartEvent._base_manager.filter(Q(responsible__in=participants) | Q(responsible__in=responsibles))
+        .filter(overlap, is_root=False)
+        .exclude(Exists(children))
+    )
+    if users is not None:
+        events = events.filter(responsible__in=list(users))
+
+    names, planned, in_progress = {}, {}, {}
+    for user_id, username, planned_start, planned_end, actual_start, actual_end in events.values_list(
+        "responsible_id", "responsible__username", "planned_start", "planned_end", "actual_start", "actual_end"
+    ).iterator(chunk_size=5000):
+        if user_id not in names:
+            names[user_id] = username
+            planned[user_id], in_progress[user_id] = [0] * (days + 1), [0] * (days + 1)
+        _add_interval(planned[user_id], planned_start.toordinal(), planned_end.toordinal(), base, days)
+        if actual_start is not None:
+            finish = actual_end or max(today, actual_start)
+            _add_interval(in_progress[user_id], actual_start.toordinal(), finish.toordinal(), base, days)
+
+    result = []
+    for user_id, username in names.items():
+        planned_counts = list(accumulate(planned[user_id][:days]))
+        result.append(
+            {
+                "id": user_id,
+                "username": username,
+                "planned": planned_counts,
+                "in_progress": list(accumulate(in_progress[user_id][:days])),
+                "peak": max(planned_counts, default=0),
+                "overloaded_days": sum(1 for count in planned_counts if count > capacity),
+            }
+        )
+    result.sort(key=lambda item: (-item["overloaded_days"], item["username"]))
+
+    return {"base": start.isoformat(), "days": days, "capacity": capacity, "users": result}
@@ -1,49 +1,33 @@
-from django.db import transaction
+from uuid import uuid4
+
 from django.db.models import Q
 from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from loguru import logger
 
-from gantt_chart.models import Project, ProjectParticipant, ProjectParticipantRole
-from gantt_chart.utils import delete_file, get_or_create_root_event
+from gantt_chart.models import Project, ProjectCalendar, ProjectHoliday, ProjectParticipant, ProjectParticipantRole
+from gantt_chart.service.job import schedule_project_image_deletion, schedule_project_image_processing
+from gantt_chart.service.project import update_project_draft_state
+from gantt_chart.utils import get_or_create_root_event
 
 
 @receiver(post_delete, sender=Project)
 def auto_delete_image_on_delete(sender: type[Project], instance: Project, **kwargs):
-    """Удаление изображения при удалении записи"""
-
-    try:
-        if instance.image:
-            path = instance.image.path
-            transaction.on_commit(lambda: delete_file(path))
-    except Exception:
-        logger.exception("Ошибка при удалении изображения")
-
-
-@receiver(pre_save, sender=Project)
-def auto_delete_image_on_change(sender: type[Project], instance: Project, **kwargs):
-    """Удаление изображения при замене на новое изображение"""
-
-    if not instance.pk:
-        return
-
-    try:
-        old_instance = sender.objects.get(pk=instance.pk)
-        if not old_instance.image:
-            return
+    """Удаление изображения и его вариантов при удалении записи (фоновой задачей)"""
 
-        old_path = old_instance.image.path
+    schedule_project_image_deletion(instance)
 
-        new_path = instance.image.path
 
-        if old_path != new_path:
-            delete_file(old_path)
+@receiver(post_save, sender=Project)
+def process_image_on_change(sender: type[Project], instance: Project, **kwargs):
+    """
+    Обработка нового изображения фоновой задачей
 
-    except sender.DoesNotExist:
-        return
+    Изменение определяется сравнением с исходником готовых вариантов, без чтения прежней записи из БД.
+    Файлы прежнего изображения удаляет фоновая задача
+    """
 
-    except Exception:
-        logger.exception("Ошибка при удалении изображения")
+    schedule_project_image_processing(instance)
 
 
 @receiver(pre_save, sender=Project)
@@ -74,7 +58,8 @@ def set_actual_draft_state_from_project(sender: type[Project], instance: Project
 @receiver(post_save, sender=Project)
 def create_root_event(sender: type[Project], instance: Project, **kwargs):
     """Создание корневого события проекта"""
-    get_or_create_root_event(instance)
+    if kwargs.get("created") or instance.root_event_id is None:
+        get_or_create_root_event(instance)
 
 
 @receiver((post_save, post_delete), sender=ProjectParticipant)
@@ -87,7 +72,35 @@ def set_actual_draft_state_from_project_participant(
     Если нет назначенных людей в проекте с ролью "Руководитель" или "Администратор" - проект имеет статус черновика
     """
 
-    logger.debug(f"set_actual_draft_state_from_project_participant | 1. {instance.project.is_draft=}")
-    with transaction.atomic():
-        transaction.on_commit(lambda: instance.project.save())
-    logger.debug(f"set_actual_draft_state_from_project_participant | 2. {instance.project.is_draft=}")
+    # Пересчет идет одним UPDATE после коммита (однократно на проект за транзакцию), без Project.save:
+    # при каскадном удалении проекта обновлять уже нечего, поэтому отключать сигнал не требуется
+    logger.debug(f"set_actual_draft_state_from_project_participant | {instance.project_id=}")
+    update_project_draft_state(instance.project_id)
+
+
+@receiver(pre_save, sender=ProjectCalendar)
+def refresh_calendar_version(sender: type[ProjectCalendar], instance: ProjectCalendar, **kwargs):
+    """Смена версии календаря (сбрасывает закэшированный рабочий календарь)"""
+
+    instance.version = uuid4()
+
+
+@receiver(post_save, sender=ProjectCalendar)
+def set_project_calendar_version(sender: type[ProjectCalendar], instance: ProjectCalendar, **kwargs):
+    """Копия версии календаря в проекте (без `Project.save` и его сигналов)"""
+
+    Project.objects.filter(pk=instance.project_id).update(calendar_version=instance.version)
+
+
+@receiver(post_delete, sender=ProjectCalendar)
+def reset_project_calendar_version(sender: type[ProjectCalendar], instance: ProjectCalendar, **kwargs):
+    Project.objects.filter(pk=instance.project_id).update(calendar_version=None)
+
+
+@receiver((post_save, post_delete), sender=ProjectHoliday)
+def refresh_calendar_version_from_holiday(sender: type[ProjectHoliday], instance: ProjectHoliday, **kwargs):
+    """Смена версии календаря при изменении нерабочих дней"""
+
+    version = uuid4()
+    ProjectCalendar.objects.filter(pk=instance.calendar_id).update(version=version)
+    Project.objects.filter(calendar__pk=instance.calendar_id).update(calendar_version=version)
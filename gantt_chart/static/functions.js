@@ -2,13 +2,178 @@ function test_func() {
     alert("test_func");
 }
 
-function getGanttChartData() {
-    return fetch(`data/`)
-        .then(response => response.json())
-        .then(data => {
-            return data.results;
+// Ширина окна дат (дни), загружаемого за один запрос, и расстояние до края графика (px) для догрузки
+const CHART_WINDOW_DAYS = 120;
+const CHART_SCROLL_THRESHOLD = 300;
+
+function addDays(isoDate, days) {
+    const [year, month, day] = isoDate.split("-").map(Number);
+    return new Date(Date.UTC(year, month - 1, day + days)).toISOString().slice(0, 10);
+}
+
+function getChartDataParams(start, end) {
+    // Фильтры поддерева и ответственного пробрасываются из адреса страницы графика
+    const pageParams = new URLSearchParams(window.location.search);
+    const params = new URLSearchParams({compact: 1, start: start, end: end});
+    for (const name of ["root", "responsible", "baseline"]) {
+        if (pageParams.get(name)) {
+            params.set(name, pageParams.get(name));
+        }
+    }
+    return params;
+}
+
+function getGanttChartData(start, end) {
+    return fetch(`data/?${getChartDataParams(start, end)}`)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Chart data response ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(data => ({tasks: decodeCompactChartData(data), bounds: data.bounds}));
+}
+
+function decodeCompactChartData(data) {
+    // Даты приходят смещением в днях от data.base, зависимости - индексами строк,
+    // предшественники за границей окна дат - идентификаторами
+    const [year, month, day] = data.base.split("-").map(Number);
+    const toDate = (offset) => new Date(Date.UTC(year, month - 1, day + offset)).toISOString().slice(0, 10);
+    const ids = data.id.map(String);
+    const external = data.external_dependencies || ids.map(() => []);
+    // Даты базового плана (при параметре baseline), null - события нет в базовом плане
+    const baselineStart = data.baseline_start || [];
+    const baselineEnd = data.baseline_end || [];
+
+    return ids.map((id, i) => ({
+        id: id,
+        number: data.number ? data.number[i] : "",
+        name: data.name[i],
+        start: toDate(data.start[i]),
+        end: toDate(data.end[i]),
+        progress: data.progress[i],
+        dependencies: [...data.dependencies[i].map(index => ids[index]), ...external[i].map(String)],
+        baseline_start: baselineStart[i] != null ? toDate(baselineStart[i]) : null,
+        baseline_end: baselineEnd[i] != null ? toDate(baselineEnd[i]) : null,
+    }));
+}
+
+function getChartX(gantt, isoDate) {
+    // Координата даты на графике (как Bar.compute_x в Frappe Gantt)
+    const [year, month, day] = isoDate.split("-").map(Number);
+    const hours = (new Date(year, month - 1, day) - gantt.gantt_start) / (3600 * 1000);
+    if (gantt.view_is("Month")) {
+        return hours / 24 * gantt.options.column_width / 30;
+    }
+    return hours / gantt.options.step * gantt.options.column_width;
+}
+
+function drawBaselineBars(gantt) {
+    // Полоса базового плана - тонкая линия под полосой события, перерисовывается после каждой отрисовки графика
+    for (const bar of gantt.bars) {
+        const task = bar.task;
+        if (!task.baseline_start) {
+            continue;
+        }
+        const x = getChartX(gantt, task.baseline_start);
+        const rect = document.createElementNS("http://www.w3.org/2000/svg", "rect");
+        rect.setAttribute("class", "bar-baseline");
+        rect.setAttribute("x", x);
+        rect.setAttribute("y", bar.y + bar.height + 2);
+        // Дата окончания входит в событие
+        rect.setAttribute("width", Math.max(getChartX(gantt, addDays(task.baseline_end, 1)) - x, 1));
+        rect.setAttribute("height", 4);
+        rect.setAttribute("fill", "#6c757d");
+        rect.setAttribute("opacity", "0.7");
+        gantt.layers.bar.appendChild(rect);
+    }
+}
+
+function getChartTasks(chart) {
+    // Порядок строк совпадает с порядком на сервере (по иерархическому номеру)
+    return [...chart.tasks.values()].sort((a, b) => (a.number < b.number ? -1 : a.number > b.number ? 1 : 0));
+}
+
+function mergeChartTasks(chart, tasks) {
+    for (const task of tasks) {
+        chart.tasks.set(task.id, task);
+    }
+}
+
+function loadGanttChart() {
+    const today = new Date().toISOString().slice(0, 10);
+    const chart = {
+        tasks: new Map(),
+        start: addDays(today, -CHART_WINDOW_DAYS),
+        end: addDays(today, CHART_WINDOW_DAYS),
+        bounds: null,
+        loading: false,
+        gantt: null,
+    };
+
+    return getGanttChartData(chart.start, chart.end)
+        .then(({tasks, bounds}) => {
+            chart.bounds = bounds;
+            if (tasks.length === 0 && bounds.start !== null && (bounds.end < chart.start || bounds.start > chart.end)) {
+                // Вокруг текущей даты событий нет - окно переносится к началу графика
+                chart.start = bounds.start;
+                chart.end = addDays(bounds.start, 2 * CHART_WINDOW_DAYS);
+                return getGanttChartData(chart.start, chart.end).then(data => data.tasks);
+            }
+            return tasks;
+        })
+        .then(tasks => {
+            mergeChartTasks(chart, tasks);
+            chart.gantt = createGanttChart(getChartTasks(chart));
+            bindChartScrollLoading(chart);
+            return chart;
+        });
+}
+
+function loadChartWindow(chart, start, end) {
+    chart.loading = true;
+    return getGanttChartData(start, end)
+        .then(({tasks}) => {
+            chart.start = start < chart.start ? start : chart.start;
+            chart.end = end > chart.end ? end : chart.end;
+            if (tasks.length > 0) {
+                mergeChartTasks(chart, tasks);
+                refreshGanttChart(chart);
+            }
         })
-        .catch(err => console.error(err));
+        .catch(err => console.error(err))
+        .finally(() => {
+            chart.loading = false;
+        });
+}
+
+function refreshGanttChart(chart) {
+    // После перерисовки прокрутка возвращается к той же дате
+    const gantt = chart.gantt;
+    const container = gantt.$svg.parentElement;
+    const hourWidth = gantt.options.column_width / gantt.options.step;
+    const visibleTime = gantt.gantt_start.getTime() + (container.scrollLeft / hourWidth) * 3600 * 1000;
+
+    gantt.refresh(getChartTasks(chart));
+    container.scrollLeft = ((visibleTime - gantt.gantt_start.getTime()) / (3600 * 1000)) * hourWidth;
+}
+
+function bindChartScrollLoading(chart) {
+    const container = chart.gantt.$svg.parentElement;
+    container.addEventListener("scroll", () => {
+        if (chart.loading || chart.bounds.start === null) {
+            return;
+        }
+        if (container.scrollLeft < CHART_SCROLL_THRESHOLD && chart.start > chart.bounds.start) {
+            loadChartWindow(chart, addDays(chart.start, -CHART_WINDOW_DAYS), addDays(chart.start, -1));
+        }
+        else if (
+            container.scrollLeft + container.clientWidth > container.scrollWidth - CHART_SCROLL_THRESHOLD
+            && chart.end < chart.bounds.end
+        ) {
+            loadChartWindow(chart, addDays(chart.end, 1), addDays(chart.end, CHART_WINDOW_DAYS));
+        }
+    });
 }
 
 function createGanttChart(tasks) {
@@ -17,26 +182,45 @@ function createGanttChart(tasks) {
         tasks,
         {
             language: "ru",
+            // Смена масштаба и обновление задач перерисовывают график заново
+            on_view_change: () => gantt_chart && drawBaselineBars(gantt_chart),
         },
     );
 
     gantt_chart.render();
+    drawBaselineBars(gantt_chart);
 
     document.querySelector(".chart-controls #day-btn").addEventListener("click", () => {
         gantt_chart.change_view_mode("Day");
+        setExportScale("day");
     })
 
     document.querySelector(".chart-controls #week-btn").addEventListener("click", () => {
         gantt_chart.change_view_mode("Week");
+        setExportScale("week");
     })
 
     document.querySelector(".chart-controls #month-btn").addEventListener("click", () => {
         gantt_chart.change_view_mode("Month");
+        setExportScale("month");
     })
 
     // document.querySelector(".chart-controls #year-btn").addEventListener("click", () => {
     //     gantt_chart.change_view_mode("Year");
     // })
+
+    return gantt_chart;
+}
+
+function setExportScale(scale) {
+    for (const buttonId of ["export-svg-btn", "export-png-btn"]) {
+        const _button = document.getElementById(buttonId);
+        if (_button !== null) {
+            const url = new URL(_button.href);
+            url.searchParams.set("scale", scale);
+            _button.href = url.toString();
+        }
+    }
 }
 
 function getCurrentProjectVersion() {
@@ -1,3 +1,538 @@
-from django.test import TestCase
+import io
+from datetime import date, timedelta
+from tempfile import TemporaryDirectory
+from typing import Optional
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+from PIL import Image as PILImage
+
+from gantt_chart.constants import PROJECT_IDENTIFIER_FIELD, ExportTable
+from gantt_chart.models import (
+    BackgroundJob,
+    BackgroundJobStatus,
+    ChartEvent,
+    ChartEventLink,
+    Project,
+    ProjectCalendar,
+    ProjectParticipant,
+    ProjectParticipantRole,
+)
+from gantt_chart.service import EventService
+from gantt_chart.service.baseline import create_baseline, get_baseline_comparison
+from gantt_chart.service.calendar import recalculate_project_dates
+from gantt_chart.service.clone import CloneService
+from gantt_chart.service.earned_value import EarnedValueService
+from gantt_chart.service.exceptions import EventMoveException, ResourceLevelingException, ScheduleImportException
+from gantt_chart.service.export import get_export_table, iter_csv
+from gantt_chart.service.importer import import_schedule
+from gantt_chart.service.job import claim_job, enqueue_job, execute_job, requeue_lost_jobs
+from gantt_chart.service.leveling import ResourceLevelingService
+from gantt_chart.service.move import EventMoveService
+from gantt_chart.service.progress import PROGRESS_MAX_DAYS
+from gantt_chart.service.project import ProjectService
+from gantt_chart.service.workload import get_workload
+from gantt_chart.utils import get_or_create_root_event
+
+User = get_user_model()
+
+START_DATE = date(2024, 1, 1)
+
+
+class ProjectTestCase(TestCase):
+    """Проект с руководителем и создание событий через `EventService`"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("supervisor", password="password")
+        cls.project = cls.create_project("Проект")
+
+    @classmethod
+    def create_project(cls, name: str, user: Optional[User] = None) -> Project:
+        project = Project.objects.create(name=name)
+        ProjectParticipant.objects.create(
+            project=project, participant=user or cls.user, role=ProjectParticipantRole.supervisor
+        )
+        project.refresh_from_db()
+        return project
+
+    @staticmethod
+    def create_event(
+        parent: ChartEvent, name: str, start: date = START_DATE, duration: int = 3, **fields
+    ) -> ChartEvent:
+        event = ChartEvent(
+            project_id=parent.project_id,
+            parent=parent,
+            name=name,
+            planned_start=start,
+            planned_duration=duration,
+            **fields,
+        )
+        service = EventService(event)
+        service.validate()
+        service.save()
+        return event
+
+    def get_root(self, project: Optional[Project] = None) -> ChartEvent:
+        return get_or_create_root_event(project or self.project)
+
+    def get_numbers(self, project: Optional[Project] = None) -> dict[int, str]:
+        events = ChartEvent.objects.filter(project=project or self.project)
+        return dict(events.values_list("pk", "hierarchical_number"))
+
+
+class EventDeleteTest(ProjectTestCase):
+    def test_delete_subtree_keeps_events_with_same_number_prefix(self):
+        root = self.get_root()
+        children = [self.create_event(root, f"Событие {index}") for index in range(1, 12)]
+        first, tenth = children[0], children[9]
+        first_child = self.create_event(first, "Событие 1.1")
+        tenth_child = self.create_event(tenth, "Событие 10.1")
+        ChartEventLink.objects.create(predecessor=first_child, follower=tenth_child)
+        self.assertEqual((first.hierarchical_number, tenth.hierarchical_number), ("1.1", "1.10"))
+
+        EventService(first).delete()
+
+        numbers = self.get_numbers()
+        self.assertNotIn(first.pk, numbers)
+        self.assertNotIn(first_child.pk, numbers)
+        self.assertEqual(numbers[tenth.pk], "1.10")
+        self.assertEqual(numbers[tenth_child.pk], "1.10.1")
+        self.assertFalse(ChartEventLink.objects.filter(follower=tenth_child).exists())
+
+    def test_delete_project(self):
+        project = self.create_project("Удаляемый проект")
+        root = self.get_root(project)
+        first = self.create_event(root, "Первое")
+        second = self.create_event(first, "Второе")
+        ChartEventLink.objects.create(predecessor=first, follower=second)
+        steps = []
+
+        ProjectService(project).delete(lambda percent, message: steps.append(percent))
+
+        self.assertFalse(Project.objects.filter(pk=project.pk).exists())
+        self.assertFalse(ChartEvent.objects.filter(project_id=project.pk).exists())
+        self.assertFalse(ChartEventLink.objects.filter(follower_id=second.pk).exists())
+        self.assertEqual(steps, sorted(steps))
+        self.assertTrue(ChartEvent.objects.filter(project=self.project).exists())
+
+
+class EventMoveTest(ProjectTestCase):
+    def test_move_renumbers_subtree_and_siblings(self):
+        root = self.get_root()
+        first, second, third = (self.create_event(root, name) for name in ("Первое", "Второе", "Третье"))
+        first_child = self.create_event(first, "Дочернее")
+
+        EventMoveService(first).move(third, 1)
+
+        numbers = self.get_numbers()
+        self.assertEqual(numbers[second.pk], "1.1")
+        self.assertEqual(numbers[third.pk], "1.2")
+        self.assertEqual(numbers[first.pk], "1.2.1")
+        self.assertEqual(numbers[first_child.pk], "1.2.1.1")
+        self.assertEqual(ChartEvent.objects.get(pk=first.pk).parent_id, third.pk)
+
+    def test_move_into_own_subtree(self):
+        root = self.get_root()
+        event = self.create_event(root, "Событие")
+        child = self.create_event(event, "Дочернее")
+
+        with self.assertRaises(EventMoveException):
+            EventMoveService(event).move(child)
+
+
+class CloneTest(ProjectTestCase):
+    def test_clone_project_drops_responsible(self):
+        root = self.get_root()
+        first = self.create_event(root, "Первое", responsible=self.user)
+        second = self.create_event(first, "Второе", responsible=self.user)
+        ChartEventLink.objects.create(predecessor=first, follower=second)
+
+        copy = CloneService(days_offset=7).clone_project(self.project, "Копия")
+
+        events = ChartEvent.objects.filter(project=copy, is_root=False)
+        self.assertEqual(
+            sorted(events.values_list("hierarchical_number", "name", "planned_start", "responsible")),
+            [("1.1", "Первое", date(2024, 1, 8), None), ("1.1.1", "Второе", date(2024, 1, 8), None)],
+        )
+        links = ChartEventLink.objects.filter(follower__project=copy)
+        self.assertEqual(
+            list(links.values_list("predecessor__hierarchical_number", "follower__hierarchical_number")),
+            [("1.1", "1.1.1")],
+        )
+
+    def test_clone_subtree_keeps_responsible_of_participants(self):
+        root = self.get_root()
+        event = self.create_event(root, "Событие", responsible=self.user)
+        self.create_event(event, "Дочернее", responsible=self.user)
+        other_project = Project.objects.create(name="Другой проект")
+
+        copy = CloneService().clone_subtree(event, root)
+        other_copy = CloneService().clone_subtree(event, self.get_root(other_project))
+
+        self.assertEqual(copy.hierarchical_number, "1.2")
+        self.assertEqual(set(copy.get_subtree().values_list("responsible", flat=True)), {self.user.pk})
+        self.assertEqual(other_copy.hierarchical_number, "1.1")
+        self.assertEqual(set(other_copy.get_subtree().values_list("responsible", flat=True)), {None})
+
+    def test_clone_subtree_renumbers_children(self):
+        root = self.get_root()
+        event = self.create_event(root, "Событие")
+        children = [self.create_event(event, f"Дочернее {index}") for index in range(1, 4)]
+        # Повторяющиеся и пропущенные номера старых данных
+        ChartEvent.objects.filter(pk=children[1].pk).update(hierarchical_number="1.1.1")
+        ChartEvent.objects.filter(pk=children[2].pk).update(hierarchical_number="1.1.10")
+
+        copy = CloneService().clone_subtree(event, root)
+
+        numbers = self.get_numbers()
+        self.assertEqual(copy.hierarchical_number, "1.2")
+        self.assertEqual(
+            sorted(ChartEvent.objects.filter(parent=copy).values_list("hierarchical_number", "name")),
+            [("1.2.1", "Дочернее 1"), ("1.2.2", "Дочернее 2"), ("1.2.3", "Дочернее 3")],
+        )
+        self.assertEqual(len(set(numbers.values())), len(numbers) - 1)
+
+
+class ExportImportTest(ProjectTestCase):
+    def get_csv(self, project: Project) -> str:
+        return "".join(iter_csv(get_export_table(project, ExportTable.events.value)))
+
+    def test_csv_round_trip(self):
+        root = self.get_root()
+        for index in range(12):
+            event = self.create_event(root, f"Событие {index}", date(2024, 1, 1 + index), 2 + index % 3)
+            if index % 5 == 0:
+                self.create_event(event, f"Дочернее {index}", date(2024, 1, 2 + index))
+        target = self.create_project("Импорт")
+
+        result = import_schedule(target, io.BytesIO(self.get_csv(self.project).encode()), "csv")
+
+        fields = ("hierarchical_number", "name", "planned_start", "planned_duration")
+        source = ChartEvent.objects.filter(project=self.project, is_root=False)
+        imported = ChartEvent.objects.filter(project=target, is_root=False)
+        self.assertEqual(result["events"], source.count())
+        self.assertEqual(sorted(imported.values_list(*fields)), sorted(source.values_list(*fields)))
+
+    def test_csv_import_rows_out_of_order(self):
+        root = self.get_root()
+        event = self.create_event(root, "Событие")
+        self.create_event(event, "Дочернее")
+        self.create_event(root, "Другое")
+        header, exported_root, *lines = self.get_csv(self.project).splitlines()
+        data = "\n".join([header, exported_root, lines[0], lines[2], lines[1]])
+
+        with self.assertRaises(ScheduleImportException) as context:
+            import_schedule(self.create_project("Импорт"), io.BytesIO(data.encode()), "csv")
+
+        self.assertEqual(context.exception.errors, ["строка 5: родительская задача 1.1 не найдена выше в файле"])
+
+    def test_export_orders_numbers_numerically(self):
+        root = self.get_root()
+        for index in range(11):
+            self.create_event(root, f"Событие {index}")
+
+        rows = get_export_table(self.project, ExportTable.events.value).rows
+
+        self.assertEqual([row[0] for row in rows], ["1", *(f"1.{index}" for index in range(1, 12))])
+
+    def test_export_escapes_formulas(self):
+        self.create_event(self.get_root(), "=HYPERLINK(1)")
+
+        self.assertIn(";'=HYPERLINK(1);", self.get_csv(self.project))
+
+    def test_csv_import_missing_parent(self):
+        data = "Номер иерархии;Название;Планируемая дата начала\n1;А;2024-01-01\n2.1;Б;2024-01-01\n"
+
+        with self.assertRaises(ScheduleImportException) as context:
+            import_schedule(self.project, io.BytesIO(data.encode()), "csv")
+
+        self.assertIn("родительская задача 2 не найдена выше в файле", context.exception.errors[0])
+        self.assertFalse(ChartEvent.objects.filter(project=self.project, is_root=False).exists())
+
+    def test_csv_import_responsible_must_be_participant(self):
+        User.objects.create_user("outsider", password="password")
+        data = (
+            "Номер иерархии;Название;Планируемая дата начала;Ответственный\n"
+            "1;А;2024-01-01;supervisor\n"
+            "2;Б;2024-01-01;outsider\n"
+        )
+
+        with self.assertRaises(ScheduleImportException) as context:
+            import_schedule(self.project, io.BytesIO(data.encode()), "csv")
+
+        self.assertEqual(context.exception.errors, ["строка 3: пользователь outsider не является участником проекта"])
+
+    def test_mspdi_import(self):
+        data = """<?xml version="1.0"?>
+            <Project xmlns="http://schemas.microsoft.com/project">
+                <Tasks>
+                    <Task><UID>0</UID><Name>Проект</Name><OutlineLevel>0</OutlineLevel></Task>
+                    <Task><UID>1</UID><Name>Этап</Name><OutlineLevel>1</OutlineLevel>
+                        <Start>2024-01-01T08:00:00</Start><Finish>2024-01-05T17:00:00</Finish></Task>
+                    <Task><UID>2</UID><Name>Работа</Name><OutlineLevel>2</OutlineLevel>
+                        <Start>2024-01-01T08:00:00</Start><Finish>2024-01-02T17:00:00</Finish>
+                        <PercentComplete>50</PercentComplete></Task>
+                    <Task><UID>3</UID><Name>Проверка</Name><OutlineLevel>2</OutlineLevel>
+                        <Start>2024-01-03T08:00:00</Start><Finish>2024-01-05T17:00:00</Finish>
+                        <PredecessorLink><PredecessorUID>2</PredecessorUID></PredecessorLink></Task>
+                </Tasks>
+                <Resources><Resource><UID>1</UID><Name>Исполнитель</Name></Resource></Resources>
+            </Project>
+        """
+
+        result = import_schedule(self.project, io.BytesIO(data.encode()), "xml")
+
+        self.assertEqual(result, {"events": 3, "links": 1})
+        events = ChartEvent.objects.filter(project=self.project, is_root=False)
+        self.assertEqual(
+            sorted(events.values_list("hierarchical_number", "name", "planned_start", "planned_end")),
+            [
+                ("1.1", "Этап", date(2024, 1, 1), date(2024, 1, 5)),
+                ("1.1.1", "Работа", date(2024, 1, 1), date(2024, 1, 2)),
+                ("1.1.2", "Проверка", date(2024, 1, 3), date(2024, 1, 5)),
+            ],
+        )
+        links = ChartEventLink.objects.filter(follower__project=self.project)
+        self.assertEqual(
+            list(links.values_list("predecessor__name", "follower__name")),
+            [("Работа", "Проверка")],
+        )
+
+
+class ResourceLevelingTest(ProjectTestCase):
+    def setUp(self):
+        root = self.get_root()
+        self.first = self.create_event(root, "Первое", responsible=self.user, percentage_completion=0)
+        self.second = self.create_event(root, "Второе", responsible=self.user, percentage_completion=0)
+
+    def test_preview_and_apply(self):
+        preview = ResourceLevelingService(self.project).preview()
+
+        self.assertEqual(preview["summary"]["moved"], 1)
+        self.assertEqual(preview["summary"]["max_delay"], 3)
+        self.assertEqual(preview["summary"]["end_after"], "2024-01-06")
+
+        self.assertEqual(ResourceLevelingService(self.project).apply(preview["version"]), 1)
+        dates = sorted(
+            ChartEvent.objects.filter(pk__in=(self.first.pk, self.second.pk)).values_list(
+                "planned_start", "planned_end"
+            )
+        )
+        self.assertEqual(dates, [(date(2024, 1, 1), date(2024, 1, 3)), (date(2024, 1, 4), date(2024, 1, 6))])
+        self.assertEqual(ResourceLevelingService(self.project).preview()["summary"]["moved"], 0)
+
+    def test_capacity_and_started_events(self):
+        self.assertEqual(ResourceLevelingService(self.project, capacity=2).get_changes(), [])
+
+        ChartEvent.objects.filter(pk=self.first.pk).update(percentage_completion=10)
+        ChartEvent.objects.filter(pk=self.second.pk).update(percentage_completion=0)
+        changes = ResourceLevelingService(self.project).get_changes()
+        self.assertEqual([change["id"] for change in changes], [self.second.pk])
+
+    def test_links_are_respected(self):
+        ChartEventLink.objects.create(predecessor=self.second, follower=self.first)
+
+        changes = ResourceLevelingService(self.project, capacity=2).get_changes()
+
+        self.assertEqual([(change["id"], change["delay"]) for change in changes], [(self.first.pk, 3)])
+
+    def test_stale_version(self):
+        with self.assertRaises(ResourceLevelingException):
+            ResourceLevelingService(self.project).apply("stale")
+
+    def test_cycle(self):
+        ChartEventLink.objects.create(predecessor=self.first, follower=self.second)
+        ChartEventLink.objects.create(predecessor=self.second, follower=self.first)
+
+        with self.assertRaises(ResourceLevelingException):
+            ResourceLevelingService(self.project).preview()
+
+
+class CalendarTest(ProjectTestCase):
+    def test_recalculate_project_dates(self):
+        # Пятница, без календаря выходных нет
+        event = self.create_event(self.get_root(), "Событие", date(2024, 1, 5), 2)
+        self.assertEqual(event.planned_end, date(2024, 1, 6))
+        ProjectCalendar.objects.create(project=self.project, weekend_days="5,6")
+
+        self.assertGreaterEqual(recalculate_project_dates(self.project.pk), 1)
+
+        self.assertEqual(ChartEvent.objects.get(pk=event.pk).planned_end, date(2024, 1, 8))
+
+
+class ChartFilterTest(ProjectTestCase):
+    def setUp(self):
+        self.client.force_login(self.user)
+        root = self.get_root()
+        self.event = self.create_event(root, "Событие")
+        self.child = self.create_event(self.event, "Дочернее")
+        self.other = self.create_event(root, "Другое", date(2024, 2, 1))
+        ChartEventLink.objects.create(predecessor=self.other, follower=self.child)
+        self.kwargs = {PROJECT_IDENTIFIER_FIELD: self.project.pk}
+
+    def test_data_subtree(self):
+        url = reverse("chart_data_planned", kwargs=self.kwargs)
+
+        data = self.client.get(url, {"compact": 1, "root": self.event.pk}).json()
+
+        self.assertEqual(set(data["id"]), {self.event.pk, self.child.pk})
+        self.assertEqual(data["external_dependencies"][data["id"].index(self.child.pk)], [self.other.pk])
+        self.assertEqual(self.client.get(url, {"compact": 1, "root": 0}).status_code, 404)
+        self.assertEqual(
+            self.client.get(url, {"compact": 1, "start": "2024-02-01", "end": "2024-01-01"}).status_code, 400
+        )
+
+    def test_export_with_filter(self):
+        url = reverse("chart_export", kwargs={**self.kwargs, "type_date": "planned", "export_format": "svg"})
+
+        response = self.client.get(url, {"root": self.event.pk})
+        svg = b"".join(response.streaming_content).decode()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Дочернее", svg)
+        self.assertNotIn("Другое", svg)
+        self.assertEqual(self.client.get(url, {"root": 0}).status_code, 404)
+        self.assertEqual(self.client.get(url, {"start": "не дата"}).status_code, 400)
+
+    def test_baseline_links_keep_filters(self):
+        baseline = create_baseline(self.project, "Базовый план", self.user)
+        url = reverse("chart", kwargs={**self.kwargs, "type_date": "planned"})
+
+        response = self.client.get(url, {"root": self.event.pk, "responsible": self.user.pk, "baseline": 0})
+
+        self.assertEqual(response.context["no_baseline_query"], f"root={self.event.pk}&responsible={self.user.pk}")
+        self.assertEqual(
+            response.context["baselines"],
+            [(baseline, f"root={self.event.pk}&responsible={self.user.pk}&baseline={baseline.pk}")],
+        )
+
+
+class BaselineTest(ProjectTestCase):
+    def test_comparison(self):
+        root = self.get_root()
+        moved = self.create_event(root, "Сдвинутое")
+        kept = self.create_event(root, "Без изменений")
+        baseline = create_baseline(self.project, "Базовый план", self.user)
+        moved.planned_start += timedelta(days=2)
+        service = EventService(moved)
+        service.validate()
+        service.save()
+        added = self.create_event(root, "Новое")
+
+        comparison = get_baseline_comparison(self.project, baseline)
+
+        slippage = dict(zip(comparison["id"], comparison["end_slippage"]))
+        self.assertEqual(comparison["number"], ["1", "1.1", "1.2", "1.3"])
+        self.assertEqual((slippage[moved.pk], slippage[kept.pk], slippage[added.pk]), (2, 0, None))
+        self.assertEqual(comparison["summary"]["added"], 1)
+        self.assertEqual(comparison["summary"]["delayed"], 1)
+
+
+class ProgressTest(ProjectTestCase):
+    def test_days_limit(self):
+        self.client.force_login(self.user)
+        self.create_event(self.get_root(), "Событие")
+        url = reverse("project_progress", kwargs={PROJECT_IDENTIFIER_FIELD: self.project.pk})
+
+        self.assertEqual(self.client.get(url, {"days": PROGRESS_MAX_DAYS + 1}).status_code, 400)
+        response = self.client.get(url, {"days": 30})
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(response.json()["earned"]), 30)
+
+
+class EarnedValueTest(ProjectTestCase):
+    def test_subtree_budget(self):
+        root = self.get_root()
+        children = [self.create_event(root, f"Событие {index}") for index in range(1, 11)]
+        self.create_event(children[0], "Работа 1.1", duration=4)
+        self.create_event(children[9], "Работа 1.10", duration=7)
+
+        service = EarnedValueService(self.project, children[0])
+
+        self.assertEqual(service.budget, 4)
+        self.assertEqual(service.get_planned_value(date(2024, 1, 10)), 4)
+        self.assertEqual(EarnedValueService(self.project).budget, 8 * 3 + 4 + 7)
+
+    def test_project_page_loads_values_from_api(self):
+        self.client.force_login(self.user)
+        self.create_event(self.get_root(), "Событие", duration=4)
+        kwargs = {PROJECT_IDENTIFIER_FIELD: self.project.pk}
+
+        page = self.client.get(reverse("project_detail", kwargs=kwargs))
+        data = self.client.get(reverse("project_earned_value", kwargs=kwargs)).json()
+
+        self.assertNotIn("earned_value", page.context)
+        self.assertContains(page, reverse("project_earned_value", kwargs=kwargs))
+        self.assertEqual(data["bac"], 4)
+        self.assertEqual(data["date"], [now().date().isoformat()])
+
+
+class WorkloadTest(ProjectTestCase):
+    def test_events_of_other_projects(self):
+        other_project = self.create_project("Закрытый проект")
+        self.create_event(self.get_root(other_project), "Событие", date(2024, 1, 2), 2, responsible=self.user)
+        viewer = User.objects.create_user("viewer", password="password")
+        visible_project = self.create_project("Открытый проект", viewer)
+        ProjectParticipant.objects.create(
+            project=visible_project, participant=self.user, role=ProjectParticipantRole.specialist
+        )
+
+        workload = get_workload(Project.objects.filter(pk=visible_project.pk), date(2024, 1, 1), date(2024, 1, 5))
+
+        users = {user["username"]: user for user in workload["users"]}
+        self.assertEqual(set(users), {"supervisor"})
+        self.assertEqual(users["supervisor"]["planned"], [0, 1, 1, 0, 0])
+
+
+class BackgroundJobTest(ProjectTestCase):
+    def test_lost_jobs_release_project_queue(self):
+        lost = enqueue_job("project_recalculate_dates", self.project, max_attempts=2)
+        next_job = enqueue_job("project_recalculate_summary_dates", self.project)
+        self.assertEqual(claim_job().pk, lost.pk)
+        self.assertIsNone(claim_job())
+
+        self.assertEqual(requeue_lost_jobs([lost.pk]), 1)
+        self.assertEqual(claim_job().pk, lost.pk)
+        requeue_lost_jobs([lost.pk])
+
+        lost.refresh_from_db()
+        self.assertEqual((lost.status, lost.attempts), (BackgroundJobStatus.failed, 2))
+        self.assertEqual(claim_job().pk, next_job.pk)
+
+    def test_import_file_deleted_after_last_attempt(self):
+        with TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            path = default_storage.save("imports/plan.csv", ContentFile(b"data"))
+            job = enqueue_job("project_import", self.project, {"path": path, "format": "unknown"}, max_attempts=2)
+
+            execute_job(claim_job().pk)
+            self.assertTrue(default_storage.exists(path))
+            BackgroundJob.objects.filter(pk=job.pk).update(run_after=now())
+            execute_job(claim_job().pk)
+
+            job.refresh_from_db()
+            self.assertEqual(job.status, BackgroundJobStatus.failed)
+            self.assertFalse(default_storage.exists(path))
+
+    def test_project_image_jobs(self):
+        buffer = io.BytesIO()
+        PILImage.new("RGB", (800, 400), "red").save(buffer, format="PNG")
+        with TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            self.project.image.save("cover.png", ContentFile(buffer.getvalue()))
+            self.assertEqual(BackgroundJob.objects.get().kind, "project_image")
+
+            execute_job(claim_job().pk)
+            self.project.refresh_from_db()
+            self.assertTrue(self.project.image_ready)
+            names = [self.project.image.name, *self.project.image_variants["webp"].values()]
+            self.assertTrue(all(default_storage.exists(name) for name in names))
+
+            self.project.delete()
+            job = claim_job()
+            self.assertEqual(job.kind, "project_image_delete")
+            execute_job(job.pk)
+            self.assertFalse(any(default_storage.exists(name) for name in names))
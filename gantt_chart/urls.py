@@ -23,11 +23,56 @@ project = [
         login_required(views.ProjectUpdateView.as_view()),
         name=views.ProjectUpdateView._path_name,
     ),
+    path(
+        f"project/<int:{PROJECT_IDENTIFIER_FIELD}>/clone/",
+        login_required(views.ProjectCloneView.as_view()),
+        name=views.ProjectCloneView._path_name,
+    ),
     path(
         f"project/<int:{PROJECT_IDENTIFIER_FIELD}>/delete/",
         login_required(views.ProjectDeleteView.as_view()),
         name=views.ProjectDeleteView._path_name,
     ),
+    path(
+        f"project/<int:{PROJECT_IDENTIFIER_FIELD}>/import/",
+        login_required(views.ProjectImportView.as_view()),
+        name=views.ProjectImportView._path_name,
+    ),
+    path(
+        f"project/<int:{PROJECT_IDENTIFIER_FIELD}>/baselines/create/",
+        login_required(views.ProjectBaselineCreateView.as_view()),
+        name=views.ProjectBaselineCreateView._path_name,
+    ),
+    path(
+        f"project/<int:{PROJECT_IDENTIFIER_FIELD}>/baselines/<int:baseline_pk>/comparison/",
+        login_required(views.ProjectBaselineComparisonAPIView.as_view()),
+        name=views.ProjectBaselineComparisonAPIView._path_name,
+    ),
+    path(
+        f"project/<int:{PROJECT_IDENTIFIER_FIELD}>/progress/",
+        login_required(views.ProjectProgressAPIView.as_view()),
+        name=views.ProjectProgressAPIView._path_name,
+    ),
+    path(
+        f"project/<int:{PROJECT_IDENTIFIER_FIELD}>/earned-value/",
+        login_required(views.ProjectEarnedValueAPIView.as_view()),
+        name=views.ProjectEarnedValueAPIView._path_name,
+    ),
+    path(
+        f"project/<int:{PROJECT_IDENTIFIER_FIELD}>/leveling/",
+        login_required(views.ProjectLevelingView.as_view()),
+        name=views.ProjectLevelingView._path_name,
+    ),
+    path(
+        f"project/<int:{PROJECT_IDENTIFIER_FIELD}>/leveling/preview/",
+        login_required(views.ProjectLevelingAPIView.as_view()),
+        name=views.ProjectLevelingAPIView._path_name,
+    ),
+    path(
+        f"project/<int:{PROJECT_IDENTIFIER_FIELD}>/jobs/",
+        login_required(views.ProjectJobListAPIView.as_view()),
+        name=views.ProjectJobListAPIView._path_name,
+    ),
 ]
 
 participant = [
@@ -51,6 +96,11 @@ participant = [
         login_required(views.ProjectParticipantDeleteView.as_view()),
         name=views.ProjectParticipantDeleteView._path_name,
     ),
+    path(
+        f"project/<int:{PROJECT_IDENTIFIER_FIELD}>/participant/bulk/",
+        login_required(views.ProjectParticipantBulkAPIView.as_view()),
+        name=views.ProjectParticipantBulkAPIView._path_name,
+    ),
 ]
 
 event = [
@@ -69,6 +119,21 @@ event = [
         login_required(views.event_create_or_update),
         name=views.event_create_or_update._path_name_update,
     ),
+    path(
+        f"project/<int:{PROJECT_IDENTIFIER_FIELD}>/events/<int:{EVENT_IDENTIFIER_FIELD}>/clone/",
+        login_required(views.event_clone),
+        name=views.event_clone._path_name,
+    ),
+    path(
+        f"project/<int:{PROJECT_IDENTIFIER_FIELD}>/events/<int:{EVENT_IDENTIFIER_FIELD}>/move/",
+        login_required(views.event_move),
+        name=views.event_move._path_name,
+    ),
+    path(
+        f"project/<int:{PROJECT_IDENTIFIER_FIELD}>/export/<str:table>/<str:export_format>/",
+        login_required(views.table_export),
+        name=views.table_export._path_name,
+    ),
     path(
         f"project/<int:{PROJECT_IDENTIFIER_FIELD}>/events/<int:{EVENT_IDENTIFIER_FIELD}>/delete/",
         login_required(views.EventDeleteView.as_view()),
@@ -105,6 +170,11 @@ chart = [
         login_required(views.chart),
         name=views.chart._path_name,
     ),
+    path(
+        f"project/<int:{PROJECT_IDENTIFIER_FIELD}>/chart/<str:type_date>/export/<str:export_format>/",
+        login_required(views.chart_export),
+        name=views.chart_export._path_name,
+    ),
     path(
         f"project/<int:{PROJECT_IDENTIFIER_FIELD}>/chart/planned/data/",
         login_required(views.ChartEventDataListAPIView.as_view(type_date=TypeDate.planned.value)),
@@ -131,6 +201,15 @@ comment = [
     ),
 ]
 
+workload = [
+    path("workload/", login_required(views.WorkloadView.as_view()), name=views.WorkloadView._path_name),
+    path("workload/data/", login_required(views.WorkloadAPIView.as_view()), name=views.WorkloadAPIView._path_name),
+]
+
+stats = [
+    path("stats/queries/", views.query_stats, name=views.query_stats._path_name),
+]
+
 urlpatterns = [
     # Главная
     path("", redirect_to_index),
@@ -140,6 +219,8 @@ urlpatterns = [
     *event_link,
     *chart,
     *comment,
+    *workload,
+    *stats,
     # Select2
     path("participant_select2/", login_required(views.ProjectParticipantListAPIView.as_view())),
     path("event_select2/", login_required(views.SelectEventListAPIView.as_view())),
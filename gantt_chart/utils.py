@@ -1,9 +1,5 @@
-from os import remove as os_remove
-from os.path import isfile
-
 from django.contrib.auth import get_user_model
-from django.db.models import Model, Q, QuerySet
-from django.db.models.signals import ModelSignal
+from django.db.models import Q, QuerySet
 from django.utils.timezone import now
 
 from gantt_chart.models import ChartEvent, ChartEventLink, Project, ProjectParticipantRole
@@ -11,13 +7,6 @@ from gantt_chart.models import ChartEvent, ChartEventLink, Project, ProjectParti
 User = get_user_model()
 
 
-def delete_file(path: str):
-    """Удаление файла"""
-
-    if isfile(path):
-        os_remove(path)
-
-
 def filter_queryset_project_by_user(queryset: QuerySet[Project], user: User) -> QuerySet[Project]:
     """Фильтрация доступных проектов по пользователю"""
 
@@ -36,19 +25,10 @@ def filter_queryset_event_links_by_event(queryset: QuerySet[ChartEventLink], eve
     return queryset.filter(predecessor=event).distinct()
 
 
-class SignalDisconnectContextManager:
-    """Менеджер контекста для отключения сигнала"""
-
-    def __init__(self, signal: ModelSignal, sender: Model, receiver: callable):
-        self.signal = signal
-        self.sender = sender
-        self.receiver = receiver
+def get_number_key(hierarchical_number: str) -> tuple[int, ...]:
+    """Ключ сортировки иерархического номера по числам ("1.2" < "1.10"), а не по строке"""
 
-    def __enter__(self):
-        self.signal.disconnect(receiver=self.receiver, sender=self.sender)
-
-    def __exit__(self, *args, **kwargs):
-        self.signal.connect(receiver=self.receiver, sender=self.sender)
+    return tuple(int(part) if part.isdigit() else -1 for part in hierarchical_number.split("."))
 
 
 def get_or_create_root_event(project: Project) -> ChartEvent:
@@ -56,12 +36,17 @@ def get_or_create_root_event(project: Project) -> ChartEvent:
     if root_event:
         return root_event
 
+    # Ссылка могла быть не сохранена (устаревший инстанс проекта) - сначала ищется существующее корневое событие
+    root_event = ChartEvent.objects.filter(project=project, is_root=True).order_by("pk").first()
+    if root_event:
+        return _set_root_event(project, root_event)
+
     responsible = project.participants_role.filter(role=ProjectParticipantRole.supervisor).last()
 
     current_date = now().date()
     data = {
         "project": project,
-        "hierarchical_number": 1,
+        "hierarchical_number": "1",
         "name": project.name,
         "planned_start": current_date,
         "planned_end": current_date,
@@ -72,4 +57,11 @@ def get_or_create_root_event(project: Project) -> ChartEvent:
     if responsible:
         data["responsible"] = responsible.participant
 
-    return ChartEvent.objects.create(**data)
+    return _set_root_event(project, ChartEvent.objects.create(**data))
+
+
+def _set_root_event(project: Project, root_event: ChartEvent) -> ChartEvent:
+    # Обновление без Project.save, чтобы не вызывать повторно сигналы проекта
+    Project.objects.filter(pk=project.pk).update(root_event=root_event)
+    project.root_event = root_event
+    return root_event
@@ -2,3 +2,5 @@
 from .errors import *
 from .event import *
 from .project import *
+from .stats import *
+from .workload import *
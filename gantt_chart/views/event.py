@@ -1,25 +1,50 @@
 from typing import Any
+from urllib.parse import urlencode
 
+from django.core.exceptions import BadRequest
 from django.db.models.query import QuerySet
 from django.forms import ValidationError
 from django.forms.models import BaseModelForm
-from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest, HttpResponseRedirect, JsonResponse, QueryDict
+from django.http import (
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseRedirect,
+    JsonResponse,
+    QueryDict,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
 from django.views.generic import CreateView, DeleteView, ListView, UpdateView
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.exceptions import NotFound
 from rest_framework.filters import SearchFilter
 from rest_framework.generics import ListAPIView
-
-from gantt_chart.constants import EVENT_IDENTIFIER_FIELD, PROJECT_IDENTIFIER_FIELD, TypeDate
+from rest_framework.response import Response
+
+from gantt_chart.constants import (
+    EVENT_IDENTIFIER_FIELD,
+    PROJECT_IDENTIFIER_FIELD,
+    ChartExportFormat,
+    ChartScale,
+    ExportTable,
+    TableExportFormat,
+    TypeDate,
+)
 from gantt_chart.forms import (
     ChartEventLinkCreateForm,
     ChartEventLinkSaveForm,
     ChartEventSaveForm,
+    DynamicChartEventCloneForm,
     DynamicChartEventCreateForm,
+    DynamicChartEventMoveForm,
     DynamicChartEventUpdateForm,
 )
-from gantt_chart.models import ChartEvent, ChartEventLink
+from gantt_chart.models import ChartEvent, ChartEventLink, Project, ProjectBaseline
 from gantt_chart.permissions import (
     EventProjectPermissionRequiredMixin,
     ProjectPermission,
@@ -30,8 +55,30 @@ from gantt_chart.permissions import (
     get_project,
     project_permission_required,
 )
-from gantt_chart.serializers import ChartEventActualSerializer, ChartEventPlannedSerializer, EventSerializer
+from gantt_chart.serializers import (
+    ChartBaselineSerializer,
+    ChartEventActualSerializer,
+    ChartEventPlannedSerializer,
+    ChartFilterSerializer,
+    EventSerializer,
+)
 from gantt_chart.service import EventService
+from gantt_chart.service.chart import (
+    CHART_FILTER_PARAMS,
+    CHART_ROWS_CHUNK_SIZE,
+    ChartFilter,
+    build_chart_tasks,
+    get_chart_filter,
+    get_chart_links,
+    get_chart_rows_queryset,
+    get_compact_chart_data,
+    to_chart_rows,
+)
+from gantt_chart.service.clone import CloneService
+from gantt_chart.service.exceptions import ChartTooLargeException, EventMoveException, ProjectLinkException
+from gantt_chart.service.export import XLSX_CONTENT_TYPE, get_export_table, iter_csv, iter_xlsx
+from gantt_chart.service.move import EventMoveService
+from gantt_chart.service.render import ChartLayout, PngChartRenderer, SvgChartRenderer
 from gantt_chart.utils import filter_queryset_event_links_by_event, filter_queryset_events_by_project
 
 from .mixins import EventLinkMixin
@@ -115,6 +162,77 @@ event_create_or_update._path_name_create = "event_create"
 event_create_or_update._path_name_update = "event_update"
 
 
+@project_permission_required(perms=can_work_project.__name__)
+def event_move(request: HttpRequest, *args, **kwargs):
+    """Перемещение события проекта (вместе с дочерними событиями) к другому родителю или на другую позицию"""
+
+    project_pk = kwargs[PROJECT_IDENTIFIER_FIELD]
+    project = get_project(project_pk=project_pk)
+    event = get_object_or_404(
+        ChartEvent.objects.select_related("project", "parent"), pk=kwargs[EVENT_IDENTIFIER_FIELD], project=project
+    )
+    Form = DynamicChartEventMoveForm(project_pk).get_form()  # noqa: N806
+    form = Form(request.POST or None, initial={"parent": event.parent})
+
+    if request.method == "POST" and form.is_valid():
+        try:
+            EventMoveService(event).move(form.cleaned_data["parent"], form.cleaned_data["position"])
+
+            return redirect(EventListView._path_name, **{PROJECT_IDENTIFIER_FIELD: project_pk})
+
+        except (EventMoveException, ProjectLinkException) as exception:
+            form.add_error(None, str(exception))
+
+    context = {
+        "title": "Переместить событие проекта",
+        "header": f"Переместить событие {event}",
+        "button": "Переместить",
+        "form": form,
+        "project": project,
+    }
+
+    return render(request, "create_or_update_element.html", context=context)
+
+
+event_move._path_name = "event_move"
+
+
+@project_permission_required(perms=can_work_project.__name__)
+def event_clone(request: HttpRequest, *args, **kwargs):
+    """Копирование события проекта вместе с дочерними событиями и связями между ними"""
+
+    project_pk = kwargs[PROJECT_IDENTIFIER_FIELD]
+    project = get_project(project_pk=project_pk)
+    event = get_object_or_404(ChartEvent, pk=kwargs[EVENT_IDENTIFIER_FIELD], project=project)
+    Form = DynamicChartEventCloneForm(project_pk).get_form()  # noqa: N806
+    form = Form(request.POST or None, initial={"parent": event.parent, "days_offset": 0})
+
+    if request.method == "POST" and form.is_valid():
+        parent = form.cleaned_data["parent"]
+        try:
+            if parent.project_id != project.pk:
+                raise ProjectLinkException(f"Событие {parent} не относится к проекту {project}")
+            CloneService(form.cleaned_data["days_offset"]).clone_subtree(event, parent)
+
+            return redirect(EventListView._path_name, **{PROJECT_IDENTIFIER_FIELD: project_pk})
+
+        except ProjectLinkException as exception:
+            form.add_error(None, str(exception))
+
+    context = {
+        "title": "Копировать событие проекта",
+        "header": f"Копировать событие {event}",
+        "button": "Копировать",
+        "form": form,
+        "project": project,
+    }
+
+    return render(request, "create_or_update_element.html", context=context)
+
+
+event_clone._path_name = "event_clone"
+
+
 class EventDeleteView(EventProjectPermissionRequiredMixin, DeleteView):
     """Удаление события проекта"""
 
@@ -123,10 +241,10 @@ class EventDeleteView(EventProjectPermissionRequiredMixin, DeleteView):
     model = ChartEvent
     template_name = "delete_element.html"
 
-    def get_object(self, queryset: QuerySet) -> ChartEvent:
+    def get_object(self, queryset: QuerySet | None = None) -> ChartEvent:
         obj: ChartEvent = super().get_object(queryset)
         if obj.is_root:
-            raise HttpResponseBadRequest("Нельзя удалить корневое событие")
+            raise BadRequest("Нельзя удалить корневое событие")
 
         return obj
 
@@ -257,7 +375,28 @@ def chart(request, *args, **kwargs):
     another_url = reverse_lazy(
         chart._path_name, kwargs={PROJECT_IDENTIFIER_FIELD: project_pk, "type_date": another_type_date}
     )
-    context = {"project": project, "another_url": another_url}
+    # Выбор базового плана меняет в адресе страницы только параметр `baseline`, фильтры графика сохраняются
+    query = request.GET.copy()
+    query.pop("baseline", None)
+    baselines = []
+    for baseline in project.baselines.order_by("-pk"):
+        query["baseline"] = baseline.pk
+        baselines.append((baseline, query.urlencode()))
+    query.pop("baseline", None)
+    context = {
+        "project": project,
+        "another_url": another_url,
+        "type_date": current_type_date,
+        "project_version": str(project.project_version),
+        "baselines": baselines,
+        "no_baseline_query": query.urlencode(),
+        "current_baseline": request.GET.get("baseline", ""),
+        # Фильтры графика из адреса страницы пробрасываются в выгрузку SVG/PNG
+        "export_query": urlencode(
+            {"scale": ChartScale.week.value}
+            | {name: request.GET[name] for name in CHART_FILTER_PARAMS if request.GET.get(name)}
+        ),
+    }
 
     return render(request, "chart.html", context=context)
 
@@ -265,7 +404,88 @@ def chart(request, *args, **kwargs):
 chart._path_name = "chart"
 
 
+@project_permission_required(perms=can_watch_project.__name__)
+def chart_export(request, *args, **kwargs):
+    """
+    Выгрузка графика в SVG/PNG, отрисованного на сервере
+
+    Масштаб задается GET-параметром `scale` (day, week, month),
+    фильтр строк - GET-параметрами `start`/`end`, `root` и `responsible` (как у данных графика)
+    """
+
+    project = get_project(**kwargs)
+    type_date = kwargs["type_date"]
+    export_format = kwargs["export_format"]
+    scale = request.GET.get("scale", ChartScale.week.value)
+    if type_date not in TypeDate.values() or export_format not in ChartExportFormat.values():
+        raise Http404
+    if scale not in ChartScale.values():
+        return HttpResponseBadRequest(f"Неизвестный масштаб графика: {scale}")
+    serializer = ChartFilterSerializer(data=request.GET)
+    if not serializer.is_valid():
+        return HttpResponseBadRequest(f"Некорректный фильтр графика: {serializer.errors}")
+
+    chart_filter = get_chart_filter(serializer.validated_data)
+    try:
+        rows = get_chart_rows_queryset(project, type_date, chart_filter)
+    except ChartEvent.DoesNotExist:
+        raise Http404("Корневое событие поддерева не найдено в проекте")
+    links = get_chart_links(project, rows if chart_filter is not None else None)
+    layout = ChartLayout(to_chart_rows(rows.iterator(chunk_size=CHART_ROWS_CHUNK_SIZE), type_date), links, scale)
+    filename = f"chart_{project.pk}_{type_date}_{scale}.{export_format}"
+
+    if export_format == ChartExportFormat.svg.value:
+        renderer = SvgChartRenderer(layout)
+        response = StreamingHttpResponse(iter(renderer), content_type=renderer.content_type)
+    else:
+        try:
+            renderer = PngChartRenderer(layout)
+        except ChartTooLargeException as exception:
+            return HttpResponseBadRequest(str(exception))
+        response = HttpResponse(renderer.render(), content_type=renderer.content_type)
+
+    response["Content-Disposition"] = f'inline; filename="{filename}"'
+    return response
+
+
+chart_export._path_name = "chart_export"
+
+
+@project_permission_required(perms=can_watch_project.__name__)
+def table_export(request, *args, **kwargs):
+    """Потоковая выгрузка событий или связей проекта в CSV/XLSX"""
+
+    project = get_project(**kwargs)
+    table = kwargs["table"]
+    export_format = kwargs["export_format"]
+    if table not in ExportTable.values() or export_format not in TableExportFormat.values():
+        raise Http404
+
+    export_table = get_export_table(project, table)
+    if export_format == TableExportFormat.csv.value:
+        response = StreamingHttpResponse(iter_csv(export_table), content_type="text/csv; charset=utf-8")
+    else:
+        response = StreamingHttpResponse(iter_xlsx(export_table), content_type=XLSX_CONTENT_TYPE)
+
+    response["Content-Disposition"] = f'attachment; filename="project_{project.pk}_{table}.{export_format}"'
+    return response
+
+
+table_export._path_name = "table_export"
+
+
+@method_decorator(gzip_page, name="dispatch")
 class ChartEventDataListAPIView(ProjectPermissionMixin, ListAPIView):
+    """
+    Данные графика проекта
+
+    Задачи собираются из кортежей `values_list` (без инстансов модели и сериализаторов),
+    сериализаторы `ChartEventPlannedSerializer`/`ChartEventActualSerializer` задают формат ответа.
+    При GET-параметре `compact` отдаются все подходящие события в колоночном формате (без пагинации).
+    GET-параметры фильтра: `start`/`end` - окно дат, `root` - корень поддерева, `responsible` - ответственный.
+    GET-параметр `baseline` добавляет в компактный формат даты базового плана
+    """
+
     type_date: TypeDate = None
 
     permission_required = can_watch_project.__name__
@@ -282,14 +502,44 @@ class ChartEventDataListAPIView(ProjectPermissionMixin, ListAPIView):
         project = self.get_project()
         return super().get_queryset().filter(project=project)
 
+    def get_chart_filter(self) -> ChartFilter | None:
+        serializer = ChartFilterSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return get_chart_filter(serializer.validated_data)
+
+    def get_baseline(self, project: Project) -> ProjectBaseline | None:
+        serializer = ChartBaselineSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        baseline_id = serializer.validated_data.get("baseline")
+        if baseline_id is None:
+            return None
+        return get_object_or_404(ProjectBaseline, project=project, pk=baseline_id)
 
-def version(request, project_pk: int, type_date: str):
-    def get_version_mock():
-        from random import randint
+    def list(self, request, *args, **kwargs):
+        project = self.get_project()
+        chart_filter = self.get_chart_filter()
+        try:
+            if request.query_params.get("compact"):
+                baseline = self.get_baseline(project)
+                return Response(get_compact_chart_data(project, self.type_date, chart_filter, baseline))
+
+            page = self.paginate_queryset(get_chart_rows_queryset(project, self.type_date, chart_filter))
+        except ChartEvent.DoesNotExist:
+            raise NotFound("Корневое событие поддерева не найдено в проекте")
+
+        tasks = build_chart_tasks(list(to_chart_rows(page, self.type_date)))
+        return self.get_paginated_response(tasks)
 
-        return str(randint(0, 1))
 
-    return JsonResponse({"version": get_version_mock()}, safe=False)
+@project_permission_required(perms=can_watch_project.__name__)
+def version(request, *args, **kwargs):
+    """Текущая версия проекта (для опроса изменений графика)"""
+
+    project_version = (
+        Project.objects.filter(pk=kwargs[PROJECT_IDENTIFIER_FIELD]).values_list("project_version", flat=True).first()
+    )
+
+    return JsonResponse({"version": str(project_version)}, safe=False)
 
 
 class SelectEventListAPIView(ListAPIView):
@@ -1,36 +1,66 @@
 from typing import Any
+from uuid import uuid4
 
 from django.contrib.admin.options import get_content_type_for_model
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import transaction
 from django.db.models.query import QuerySet
 from django.forms.models import BaseModelForm
 from django.http import HttpResponse, HttpResponseRedirect, QueryDict
-from django.shortcuts import redirect
+from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
+from django.utils.timezone import now
 from django.views.decorators.csrf import csrf_exempt
-from django.views.generic import CreateView, DeleteView, DetailView, ListView, UpdateView
+from django.views.decorators.gzip import gzip_page
+from django.views.generic import CreateView, DeleteView, DetailView, FormView, ListView, UpdateView
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter
 from rest_framework.generics import ListAPIView
+from rest_framework.response import Response
+from rest_framework.status import HTTP_400_BAD_REQUEST
+from rest_framework.views import APIView
 
 from gantt_chart.constants import GANTT_CHART_MODELS, PROJECT_IDENTIFIER_FIELD
 from gantt_chart.forms import (
+    ProjectBaselineForm,
+    ProjectCloneForm,
     ProjectForm,
+    ProjectLevelingForm,
     ProjectParticipantCreateForm,
     ProjectParticipantSaveForm,
     ProjectParticipantUpdateForm,
+    ScheduleImportForm,
     UniversalCommentForm,
     UniversalCommentSaveForm,
 )
-from gantt_chart.models import Project, ProjectParticipant, UniversalComment, ChartEvent
+from gantt_chart.models import ChartEvent, Project, ProjectBaseline, ProjectParticipant, UniversalComment
 from gantt_chart.permissions import (
+    ProjectPermission,
+    ProjectPermissionMixin,
     ProjectPermissionRequiredMixin,
     can_change_project,
     can_delete_project,
     can_watch_project,
 )
-from gantt_chart.serializers import ProjectParticipantSerializer
-from gantt_chart.utils import SignalDisconnectContextManager, filter_queryset_project_by_user
+from gantt_chart.serializers import (
+    BackgroundJobSerializer,
+    EarnedValueSerializer,
+    ProjectLevelingSerializer,
+    ProjectParticipantBulkSerializer,
+    ProjectParticipantSerializer,
+    ProjectProgressSerializer,
+)
+from gantt_chart.service import ParticipantService
+from gantt_chart.service.baseline import create_baseline, get_baseline_comparison
+from gantt_chart.service.earned_value import EarnedValueService, get_earned_value_dates
+from gantt_chart.service.exceptions import ParticipantUserException, ResourceLevelingException
+from gantt_chart.service.importer import get_import_format
+from gantt_chart.service.job import enqueue_job, get_project_jobs
+from gantt_chart.service.leveling import LEVELING_MAX_CAPACITY, ResourceLevelingService
+from gantt_chart.service.progress import PROGRESS_TREND_WINDOW, get_project_burnup
+from gantt_chart.utils import filter_queryset_project_by_user
 from gantt_chart.views.mixins import ProjectParticipantMixin
 
 User = get_user_model()
@@ -59,10 +89,11 @@ class ProjectDetailView(ProjectPermissionRequiredMixin, DetailView):
     permission_required = can_watch_project.__name__
     model = Project
     template_name = "gantt_chart/project.html"
+    queryset = Project.objects.select_related("root_event")
 
     def get_context_data(self, **kwargs) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        obj = self.get_object()
+        obj = self.object
         root_event = ChartEvent.objects.get_root_from_project(obj)
         universal_comments = UniversalComment.objects.filter_with_content_type(
             content_type=self.model, object_id=obj.pk
@@ -71,6 +102,8 @@ class ProjectDetailView(ProjectPermissionRequiredMixin, DetailView):
         context["object_type"] = self.model.__name__
         context["root_event"] = root_event
         context["universal_comments"] = universal_comments
+        context["jobs"] = BackgroundJobSerializer(get_project_jobs(obj), many=True).data
+        context["baselines"] = obj.baselines.order_by("-pk")
         form = UniversalCommentForm()
         context["form"] = form
 
@@ -100,10 +133,233 @@ class ProjectUpdateView(ProjectPermissionRequiredMixin, UpdateView):
     template_name = "create_or_update_element.html"
     extra_context = {"title": "Редактировать проект", "header": "Обновить проект", "button": "Сохранить"}
 
+    def form_valid(self, form: BaseModelForm) -> HttpResponseRedirect:
+        response = super().form_valid(form)
+        # При включении сводных дат даты родительских событий один раз пересчитываются целиком,
+        # дальше они поддерживаются инкрементально при сохранении событий
+        if "update_parent_dates" in form.changed_data and self.object.update_parent_dates:
+            enqueue_job("project_recalculate_summary_dates", self.object, user=self.request.user)
+        return response
+
     def get_success_url(self):
         return reverse_lazy(ProjectDetailView._path_name, kwargs={PROJECT_IDENTIFIER_FIELD: self.object.pk})
 
 
+class ProjectCloneView(ProjectPermissionRequiredMixin, FormView):
+    """Создание проекта по шаблону (копия событий и связей проекта)"""
+
+    _path_name = "project_clone"
+    permission_required = can_watch_project.__name__
+    form_class = ProjectCloneForm
+    template_name = "create_or_update_element.html"
+    extra_context = {"title": "Копировать проект", "header": "Создать проект по шаблону", "button": "Создать"}
+
+    def get_initial(self) -> dict[str, Any]:
+        return {"name": f"{self.get_project().name} (копия)", "days_offset": 0}
+
+    def form_valid(self, form: ProjectCloneForm) -> HttpResponseRedirect:
+        # Копирование выполняется фоновой задачей, ход выполнения виден на странице исходного проекта
+        project = self.get_project()
+        enqueue_job(
+            "project_clone",
+            project,
+            params={"name": form.cleaned_data["name"], "days_offset": form.cleaned_data["days_offset"]},
+            user=self.request.user,
+        )
+
+        return HttpResponseRedirect(
+            reverse_lazy(ProjectDetailView._path_name, kwargs={PROJECT_IDENTIFIER_FIELD: project.pk})
+        )
+
+
+class ProjectImportView(ProjectPermissionRequiredMixin, FormView):
+    """Импорт графика из файла MS Project XML или CSV"""
+
+    _path_name = "project_import"
+    permission_required = can_change_project.__name__
+    form_class = ScheduleImportForm
+    template_name = "create_or_update_element.html"
+    extra_context = {"title": "Импорт графика", "header": "Импортировать график", "button": "Импортировать"}
+
+    def form_valid(self, form: ScheduleImportForm) -> HttpResponseRedirect:
+        # Файл сохраняется в хранилище, разбор и запись событий выполняются фоновой задачей
+        project = self.get_project()
+        file = form.cleaned_data["file"]
+        path = default_storage.save(f"imports/{project.pk}/{uuid4().hex}_{file.name}", file)
+        enqueue_job(
+            "project_import",
+            project,
+            params={"path": path, "format": get_import_format(file.name)},
+            user=self.request.user,
+        )
+
+        return HttpResponseRedirect(
+            reverse_lazy(ProjectDetailView._path_name, kwargs={PROJECT_IDENTIFIER_FIELD: project.pk})
+        )
+
+
+class ProjectBaselineCreateView(ProjectPermissionRequiredMixin, FormView):
+    """Сохранение текущих планируемых дат событий базовым планом"""
+
+    _path_name = "project_baseline_create"
+    permission_required = can_change_project.__name__
+    form_class = ProjectBaselineForm
+    template_name = "create_or_update_element.html"
+    extra_context = {"title": "Базовый план", "header": "Сохранить базовый план", "button": "Сохранить"}
+
+    def form_valid(self, form: ProjectBaselineForm) -> HttpResponseRedirect:
+        project = self.get_project()
+        create_baseline(project, form.cleaned_data["name"], self.request.user)
+
+        return HttpResponseRedirect(
+            reverse_lazy(ProjectDetailView._path_name, kwargs={PROJECT_IDENTIFIER_FIELD: project.pk})
+        )
+
+
+@method_decorator(gzip_page, name="dispatch")
+class ProjectBaselineComparisonAPIView(ProjectPermissionMixin, APIView):
+    """
+    Сравнение текущего плана с базовым: отклонения по событиям и сводные по поддеревьям
+
+    Формат - колонки со смещениями дат, как у компактных данных графика (`service.baseline.get_baseline_comparison`)
+    """
+
+    _path_name = "project_baseline_comparison"
+    permission_required = can_watch_project.__name__
+    permission_classes = (ProjectPermission,)
+
+    def get(self, request, *args, **kwargs):
+        project = self.get_project()
+        baseline = get_object_or_404(ProjectBaseline, project=project, pk=kwargs["baseline_pk"])
+        return Response(get_baseline_comparison(project, baseline))
+
+
+@method_decorator(gzip_page, name="dispatch")
+class ProjectProgressAPIView(ProjectPermissionMixin, APIView):
+    """
+    График выполнения проекта (burn-up) и темп выполнения по истории процента выполнения событий
+
+    `?days=` - последние N дней, `?window=` - окно скользящего среднего темпа (`service.progress.get_project_burnup`)
+    """
+
+    _path_name = "project_progress"
+    permission_required = can_watch_project.__name__
+    permission_classes = (ProjectPermission,)
+
+    def get(self, request, *args, **kwargs):
+        serializer = ProjectProgressSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        return Response(
+            get_project_burnup(self.get_project(), data.get("days"), data.get("window", PROGRESS_TREND_WINDOW))
+        )
+
+
+@method_decorator(gzip_page, name="dispatch")
+class ProjectEarnedValueAPIView(ProjectPermissionMixin, APIView):
+    """
+    Показатели освоенного объема (PV, EV, SV, SPI) проекта или поддерева события `?event=` на даты
+
+    Даты - `?dates=` (можно несколько) или ряд `?start=&end=&step=`, по умолчанию - текущая дата
+    """
+
+    _path_name = "project_earned_value"
+    permission_required = can_watch_project.__name__
+    permission_classes = (ProjectPermission,)
+
+    def get(self, request, *args, **kwargs):
+        project = self.get_project()
+        serializer = EarnedValueSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        event = None
+        if data.get("event") is not None:
+            event = get_object_or_404(ChartEvent, project=project, pk=data["event"])
+        if "start" in data:
+            days = get_earned_value_dates(data["start"], data["end"], data["step"])
+        else:
+            days = data.get("dates") or [now().date()]
+
+        return Response(
+            {"event": event.pk if event is not None else None, **EarnedValueService(project, event).evaluate(days)}
+        )
+
+
+class ProjectLevelingView(ProjectPermissionRequiredMixin, FormView):
+    """
+    Выравнивание загрузки ответственных: просмотр предлагаемых сдвигов событий и применение одним пакетом
+    """
+
+    _path_name = "project_leveling"
+    permission_required = can_change_project.__name__
+    form_class = ProjectLevelingForm
+    template_name = "gantt_chart/project_leveling.html"
+    extra_context = {"title": "Выравнивание загрузки"}
+    preview_rows = 500
+
+    def get_capacity(self) -> int:
+        data = self.request.POST if self.request.method == "POST" else self.request.GET
+        try:
+            capacity = int(data.get("capacity", 1))
+        except ValueError:
+            capacity = 1
+        return min(max(capacity, 1), LEVELING_MAX_CAPACITY)
+
+    def get_initial(self) -> dict[str, Any]:
+        return {"capacity": self.get_capacity(), "version": self.get_project().project_version}
+
+    def get_context_data(self, **kwargs) -> dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        project = self.get_project()
+        context["project"] = project
+        context["capacity"] = self.get_capacity()
+        try:
+            preview = ResourceLevelingService(project, context["capacity"]).preview()
+        except ResourceLevelingException as exception:
+            context["error"] = str(exception)
+        else:
+            context["summary"] = preview["summary"]
+            context["changes"] = preview["changes"][: self.preview_rows]
+            context["hidden_changes"] = max(len(preview["changes"]) - self.preview_rows, 0)
+        return context
+
+    def form_valid(self, form: ProjectLevelingForm) -> HttpResponse:
+        project = self.get_project()
+        try:
+            ResourceLevelingService(project, form.cleaned_data["capacity"]).apply(form.cleaned_data["version"])
+        except ResourceLevelingException as exception:
+            form.add_error(None, str(exception))
+            return self.form_invalid(form)
+
+        return HttpResponseRedirect(
+            reverse_lazy(ProjectDetailView._path_name, kwargs={PROJECT_IDENTIFIER_FIELD: project.pk})
+        )
+
+
+@method_decorator(gzip_page, name="dispatch")
+class ProjectLevelingAPIView(ProjectPermissionMixin, APIView):
+    """
+    Предлагаемые сдвиги событий для выравнивания загрузки ответственных (`?capacity=` - событий в день)
+
+    Применяются страницей выравнивания с той же версией проекта (`service.leveling.ResourceLevelingService`)
+    """
+
+    _path_name = "project_leveling_preview"
+    permission_required = can_watch_project.__name__
+    permission_classes = (ProjectPermission,)
+
+    def get(self, request, *args, **kwargs):
+        serializer = ProjectLevelingSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        try:
+            return Response(
+                ResourceLevelingService(self.get_project(), serializer.validated_data["capacity"]).preview()
+            )
+        except ResourceLevelingException as exception:
+            return Response({"detail": str(exception)}, status=HTTP_400_BAD_REQUEST)
+
+
 class ProjectDeleteView(ProjectPermissionRequiredMixin, DeleteView):
     """Удаление проекта"""
 
@@ -114,15 +370,10 @@ class ProjectDeleteView(ProjectPermissionRequiredMixin, DeleteView):
     success_url = reverse_lazy(ProjectListView._path_name)
 
     def form_valid(self, form: BaseModelForm) -> HttpResponseRedirect:
-        from gantt_chart.signals import post_delete, set_actual_draft_state_from_project_participant
+        # События удаляются фоновой задачей, проект пропадет из списка после ее выполнения
+        enqueue_job("project_delete", self.object, user=self.request.user)
 
-        success_url = self.get_success_url()
-        with SignalDisconnectContextManager(
-            post_delete, ProjectParticipant, set_actual_draft_state_from_project_participant
-        ):
-            self.object.delete()
-
-        return HttpResponseRedirect(success_url)
+        return HttpResponseRedirect(self.get_success_url())
 
 
 class ProjectParticipantListView(ProjectPermissionRequiredMixin, ListView):
@@ -253,9 +504,50 @@ def comment_hanlde(request, object_type: str, object_id: str, pk: int | None = N
     return redirect_to
 
 
+class ProjectJobListAPIView(ProjectPermissionMixin, ListAPIView):
+    """Последние фоновые задачи проекта (для обновления статуса на странице проекта)"""
+
+    _path_name = "project_jobs"
+    permission_required = can_watch_project.__name__
+    permission_classes = (ProjectPermission,)
+    serializer_class = BackgroundJobSerializer
+    pagination_class = None
+
+    def get_queryset(self) -> QuerySet:
+        return get_project_jobs(self.get_project())
+
+
 class ProjectParticipantListAPIView(ListAPIView):
     queryset = ProjectParticipant.objects.all()
     serializer_class = ProjectParticipantSerializer
     filter_backends = (DjangoFilterBackend, SearchFilter)
     search_fields = ("participant__username", "participant__first_name", "participant__last_name")
     filterset_fields = ("project",)
+
+
+class ProjectParticipantBulkAPIView(ProjectPermissionMixin, APIView):
+    """
+    Массовое изменение участников проекта
+
+    Тело запроса:
+    `{"set": [{"participant": <id пользователя>, "role": <роль>}, ...], "remove": [<id пользователя>, ...]}`
+    """
+
+    _path_name = "project_participant_bulk"
+    permission_required = can_change_project.__name__
+    permission_classes = (ProjectPermission,)
+
+    def post(self, request, *args, **kwargs) -> Response:
+        serializer = ProjectParticipantBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        roles = {item["participant"]: item["role"] for item in serializer.validated_data["set"]}
+
+        participant_service = ParticipantService(self.get_project())
+        try:
+            with transaction.atomic():
+                created, updated = participant_service.set_roles(roles)
+                removed = participant_service.remove(serializer.validated_data["remove"])
+        except ParticipantUserException as error:
+            return Response({"detail": str(error)}, status=HTTP_400_BAD_REQUEST)
+
+        return Response({"created": created, "updated": updated, "removed": removed})
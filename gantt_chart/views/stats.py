@@ -0,0 +1,22 @@
+from django.contrib.auth.decorators import user_passes_test
+from django.http import HttpRequest, JsonResponse
+
+from gantt_chart.middleware import QUERY_STATS
+
+
+@user_passes_test(lambda user: user.is_superuser)
+def query_stats(request: HttpRequest):
+    """
+    Агрегированная статистика SQL запросов по именам URL (только для администраторов)
+
+    Статистика собирается `QueryStatsMiddleware` в памяти процесса, `?clear=1` - сбросить после выдачи
+    """
+
+    snapshot = QUERY_STATS.snapshot()
+    if request.GET.get("clear"):
+        QUERY_STATS.clear()
+
+    return JsonResponse(snapshot)
+
+
+query_stats._path_name = "query_stats"
@@ -0,0 +1,37 @@
+from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
+from django.views.generic import TemplateView
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from gantt_chart.models import Project
+from gantt_chart.serializers import WorkloadSerializer
+from gantt_chart.service.workload import get_workload
+from gantt_chart.utils import filter_queryset_project_by_user
+
+
+class WorkloadView(TemplateView):
+    """Загрузка по дням участников доступных проектов (по событиям всех их проектов)"""
+
+    _path_name = "workload"
+    template_name = "gantt_chart/workload.html"
+    extra_context = {"title": "Загрузка ответственных"}
+
+
+@method_decorator(gzip_page, name="dispatch")
+class WorkloadAPIView(APIView):
+    """
+    Данные загрузки участников проектов, доступных пользователю: количество событий по дням на всех проектах
+    участников (события недоступных проектов учитываются только в количествах)
+
+    `?start=&end=` - период, `?users=` - пользователи (можно несколько), `?capacity=` - порог перегрузки
+    """
+
+    _path_name = "workload_data"
+
+    def get(self, request, *args, **kwargs):
+        serializer = WorkloadSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        projects = filter_queryset_project_by_user(Project.objects.all(), request.user)
+        return Response(get_workload(projects, data["start"], data["end"], data.get("users"), data["capacity"]))